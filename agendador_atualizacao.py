@@ -0,0 +1,214 @@
+"""
+AGENDADOR DE ATUALIZACAO
+Re-verifica telefone/site/instagram de leads que ja estao no Firestore.
+Cada estagio do funil tem um TTL (ex: 'new' semanal, fechados nunca);
+leads com 'scrapedAt' mais velho que o TTL sao priorizados por idade e
+estagio e re-extraidos direto do link 'googleMaps' salvo, sem fazer
+busca, respeitando um orcamento de leads por hora.
+
+Como rodar:
+    python agendador_atualizacao.py            # um ciclo
+    python agendador_atualizacao.py --continuo # um ciclo por hora
+"""
+
+import sys, time, traceback
+from datetime import datetime
+from playwright.sync_api import sync_playwright
+
+from log_firestore import gravar
+from scraper_firebase_direto import (
+    SONDAR_SITES, extrair_lead_por_url, firestore, init_firebase, montar_doc_firebase,
+)
+from sondagem_sites import sondar_leads
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+DIA = 24 * 3600
+
+# None = nunca re-verificar
+TTL_POR_ESTAGIO = {
+    "new":            7 * DIA,
+    "contacted":      14 * DIA,
+    "proposal_sent":  14 * DIA,
+    "negotiation":    30 * DIA,
+    "no_opportunity": 60 * DIA,
+    "refused":        90 * DIA,
+    "won":            None,
+    "lost":           None,
+}
+
+# quanto maior, mais cedo entra na fila quando vencido
+PESO_ESTAGIO = {
+    "new":            3.0,
+    "contacted":      2.0,
+    "proposal_sent":  2.0,
+    "negotiation":    1.5,
+    "no_opportunity": 1.0,
+    "refused":        0.5,
+}
+
+ORCAMENTO_POR_HORA = 60
+
+# so os campos que o scraper realmente observa; estagio, notas, valor e
+# contato sao do usuario e nunca sao sobrescritos. Cada grupo so e gravado
+# se a extracao achou o campo de origem (extracao parcial nao apaga dado).
+CAMPOS_POR_ORIGEM = {
+    "WhatsApp":  ["phone", "whatsapp", "linkWhatsApp"],
+    "Instagram": ["instagram"],
+    "Site":      ["website"],
+}
+NAO_ENCONTRADO = {"", "Nao encontrado", "Não encontrado", "SEM SITE"}
+CAMPOS_LIDOS   = ["stage", "googleMaps", "niche", "territory", "website", "scrapedAt", "createdAt"]
+
+# ================================================================
+# SELECAO
+# ================================================================
+
+def _epoch(valor):
+    if valor is None:
+        return 0.0
+    if isinstance(valor, datetime):
+        return valor.timestamp()
+    return float(valor)
+
+
+def prioridade(doc, agora):
+    """Devolve a prioridade do lead ou None se ainda nao venceu."""
+    if not doc.get("googleMaps"):
+        return None
+    ttl = TTL_POR_ESTAGIO.get(doc.get("stage") or "new", 7 * DIA)
+    if ttl is None:
+        return None
+    idade = agora - _epoch(doc.get("scrapedAt") or doc.get("createdAt"))
+    if idade < ttl:
+        return None
+    return (idade / ttl) * PESO_ESTAGIO.get(doc.get("stage") or "new", 1.0)
+
+
+def selecionar_vencidos(docs, limite, agora=None):
+    """docs: iteravel de (id, dict). Devolve os 'limite' mais urgentes."""
+    agora = agora or time.time()
+    fila = []
+    for doc_id, doc in docs:
+        p = prioridade(doc, agora)
+        if p is not None:
+            fila.append((p, doc_id, doc))
+    fila.sort(key=lambda x: x[0], reverse=True)
+    return [(doc_id, doc) for _, doc_id, doc in fila[:limite]]
+
+
+def ler_docs(db, territorio=None):
+    q = db.collection("leads")
+    if territorio:
+        q = q.where("territory", "==", territorio)
+    for snap in q.select(CAMPOS_LIDOS).stream():
+        yield snap.id, snap.to_dict()
+
+# ================================================================
+# RE-EXTRACAO
+# ================================================================
+
+def campos_extraidos(lead, doc):
+    """
+    Campos do doc que a re-extracao pode gravar: so os que foram achados.
+    O websiteQuality so muda quando o site mudou: com SONDAR_SITES vem da
+    nova sondagem (indeterminada = nao grava); site igual mantem a sondagem
+    que ja esta no doc em vez da heuristica por substring.
+    """
+    novo  = montar_doc_firebase(lead)
+    dados = {}
+    for origem, campos in CAMPOS_POR_ORIGEM.items():
+        if str(lead.get(origem) or "").strip() not in NAO_ENCONTRADO:
+            dados.update({k: novo[k] for k in campos})
+
+    if "website" in dados and dados["website"] != doc.get("website"):
+        if SONDAR_SITES:
+            lead["WebsiteQuality"] = None
+            sondar_leads([lead])   # indeterminado deixa o None
+        if lead.get("WebsiteQuality"):
+            dados["websiteQuality"] = lead["WebsiteQuality"]
+    return dados
+
+
+def atualizar_lead(db, page, doc_id, doc):
+    try:
+        lead = extrair_lead_por_url(page, doc["googleMaps"], doc.get("niche", ""), doc.get("territory", ""))
+    except Exception as e:
+        print(f"   ERRO ao abrir {doc_id}: {type(e).__name__}: {e}")
+        lead = None
+
+    if lead is None:
+        # marca mesmo assim para nao ficar preso no topo da fila
+        gravar(db, "leads", doc_id, {"scrapedAt": firestore.SERVER_TIMESTAMP, "scrapeFalhou": True})
+        return False
+
+    dados = campos_extraidos(lead, doc)
+    dados["scrapedAt"]    = firestore.SERVER_TIMESTAMP
+    dados["updatedAt"]    = firestore.SERVER_TIMESTAMP
+    dados["scrapeFalhou"] = False
+    gravar(db, "leads", doc_id, dados)
+    return True
+
+
+def executar_ciclo(db, orcamento=ORCAMENTO_POR_HORA, territorio=None):
+    """
+    Re-extrai ate 'orcamento' leads vencidos, espalhados ao longo de uma
+    hora. Devolve (atualizados, falhas).
+    """
+    inicio   = time.time()
+    vencidos = selecionar_vencidos(ler_docs(db, territorio), orcamento)
+
+    print("\n" + "="*60)
+    print("CLICK FACIL - ATUALIZACAO DE LEADS")
+    print("="*60)
+    print(f"Vencidos selecionados: {len(vencidos)} | Orcamento/hora: {orcamento}")
+    print("="*60 + "\n")
+    if not vencidos:
+        return 0, 0
+
+    intervalo = 3600.0 / orcamento
+    ok = falhas = 0
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=False, slow_mo=50)
+        ctx     = browser.new_context(viewport={"width": 1400, "height": 900}, locale="pt-BR")
+        page    = ctx.new_page()
+
+        for i, (doc_id, doc) in enumerate(vencidos, 1):
+            t0 = time.time()
+            print(f"\n[{i}/{len(vencidos)}] {doc_id} ({doc.get('stage', 'new')})")
+            try:
+                if atualizar_lead(db, page, doc_id, doc):
+                    ok += 1
+                else:
+                    falhas += 1
+            except Exception as e:
+                falhas += 1
+                print(f"   ERRO: {type(e).__name__}: {e}")
+                traceback.print_exc()
+
+            restante = intervalo - (time.time() - t0)
+            if restante > 0 and i < len(vencidos):
+                time.sleep(restante)
+
+        browser.close()
+
+    print(f"\nCiclo concluido: {ok} atualizados, {falhas} falhas em {(time.time() - inicio)/60:.1f} min")
+    return ok, falhas
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    db = init_firebase()
+    if db is None:
+        sys.exit(1)
+
+    if "--continuo" in sys.argv:
+        while True:
+            t0 = time.time()
+            executar_ciclo(db)
+            time.sleep(max(0, 3600 - (time.time() - t0)))
+    else:
+        executar_ciclo(db)
@@ -0,0 +1,283 @@
+"""
+AGREGADOS DE LEADS
+Contagens por territorio x nicho x estagio x websiteQuality (total, sem
+site, sem Instagram, sem telefone, oportunidades) mantidas de forma
+incremental: cada lead gravado entra com um upsert que tira a contribuicao
+antiga dele e soma a nova, e os leads juntados pela deduplicacao saem com
+remover, entao atualizar o resumo custa O(leads alterados) e nao O(todos
+os leads). O estado fica em ARQUIVO_ESTADO junto com a versao do CSV com
+que ele esta em dia; se o CSV mudar por fora, o estado e reconstruido. O
+resumo pequeno para o dashboard e exportado em JSON.
+
+Como rodar (reconstroi tudo a partir do CSV):
+    python agregados_leads.py leads_paragominas.csv
+"""
+
+import json, os, sys
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+
+from links_maps import extrair_place_id
+from pontuacao_leads import calcular_features, oportunidades
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+ARQUIVO_ESTADO = "agregados_leads.json"
+# relativo a raiz do app React: o dashboard busca em /data/resumo_leads.json
+ARQUIVO_RESUMO = os.path.join("public", "data", "resumo_leads.json")
+CONTADORES     = ["total", "semSite", "semInstagram", "semTelefone", "oportunidades"]
+# bit de cada contador na mascara guardada por lead ('total' e implicito)
+BITS           = {"semSite": 1, "semInstagram": 2, "semTelefone": 4, "oportunidades": 8}
+
+ESTAGIO_POR_STATUS = {"Pendente": "new"}
+
+# ================================================================
+# LINHAS
+# ================================================================
+
+def _texto(v, padrao):
+    return padrao if v is None or (isinstance(v, float) and v != v) or v == "" else str(v)
+
+
+def linhas_agregadas(df):
+    """[(chave, mascara)] de cada linha do df, na ordem, calculado em lote."""
+    if df.empty:
+        return []
+    fts  = calcular_features(df)
+    mask = (
+        fts["sem_site"].to_numpy().astype(int) * BITS["semSite"]
+        | fts["sem_instagram"].to_numpy().astype(int) * BITS["semInstagram"]
+        | (1 - fts["telefone_valido"].to_numpy().astype(int)) * BITS["semTelefone"]
+        | oportunidades(df).to_numpy().astype(int) * BITS["oportunidades"]
+    )
+    def col(nome):
+        return df[nome].tolist() if nome in df.columns else [None] * len(df)
+    estagios = [
+        _texto(e, None) or ESTAGIO_POR_STATUS.get(_texto(s, ""), _texto(s, "new").lower())
+        for e, s in zip(col("Estagio"), col("Status"))
+    ]
+    chaves = zip(
+        (_texto(t, "") for t in col("Territorio")),
+        (_texto(n, "Outros") for n in col("Nicho")),
+        estagios,
+        (_texto(q, "none") for q in col("WebsiteQuality")),
+    )
+    return [(c, int(m)) for c, m in zip(chaves, mask)]
+
+# ================================================================
+# STORE
+# ================================================================
+
+class AgregadosLeads:
+    """
+    'celulas' guarda os contadores por chave; 'por_lead' guarda, para cada
+    id de lead, a chave e a mascara com que ele foi contado, para que um
+    upsert saiba o que descontar.
+    """
+
+    def __init__(self):
+        self.celulas  = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+        self.por_lead = {}
+        self.versao   = None   # versao_arquivo() do CSV que o estado reflete
+
+    def _aplicar(self, chave, mascara, sinal):
+        cel = self.celulas[chave]
+        cel["total"] += sinal
+        for nome, bit in BITS.items():
+            if mascara & bit:
+                cel[nome] += sinal
+        if cel["total"] <= 0:
+            del self.celulas[chave]
+
+    def upsert(self, lead_id, chave, mascara):
+        anterior = self.por_lead.get(lead_id)
+        if anterior == (chave, mascara):
+            return False
+        if anterior is not None:
+            self._aplicar(*anterior, -1)
+        self._aplicar(chave, mascara, +1)
+        self.por_lead[lead_id] = (chave, mascara)
+        return True
+
+    def remover(self, lead_id):
+        anterior = self.por_lead.pop(lead_id, None)
+        if anterior is not None:
+            self._aplicar(*anterior, -1)
+
+    def upsert_df(self, df, ids):
+        """Upsert em lote das linhas do df; 'ids' na mesma ordem. Devolve quantas mudaram."""
+        return sum(self.upsert(i, c, m) for i, (c, m) in zip(ids, linhas_agregadas(df)))
+
+    # ------------------------------------------------------------
+    # consultas
+    # ------------------------------------------------------------
+
+    def totais(self, territorio=None, nicho=None):
+        soma = dict.fromkeys(CONTADORES, 0)
+        for (t, n, _e, _q), cel in self.celulas.items():
+            if (territorio is None or t == territorio) and (nicho is None or n == nicho):
+                for k in CONTADORES:
+                    soma[k] += cel[k]
+        return soma
+
+    def por_dimensao(self, posicao):
+        """Totais agrupados por uma dimensao da chave (0=territorio, 1=nicho, 2=estagio, 3=qualidade)."""
+        grupos = defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+        for chave, cel in self.celulas.items():
+            g = grupos[chave[posicao]]
+            for k in CONTADORES:
+                g[k] += cel[k]
+        return dict(grupos)
+
+    def resumo(self):
+        return {
+            "geradoEm":          datetime.now().isoformat(timespec="seconds"),
+            "totais":            self.totais(),
+            "porTerritorio":     self.por_dimensao(0),
+            "porNicho":          self.por_dimensao(1),
+            "porEstagio":        self.por_dimensao(2),
+            "porWebsiteQuality": self.por_dimensao(3),
+            "celulas": [
+                {"territory": t, "niche": n, "stage": e, "websiteQuality": q, **cel}
+                for (t, n, e, q), cel in sorted(self.celulas.items())
+            ],
+        }
+
+    # ------------------------------------------------------------
+    # persistencia
+    # ------------------------------------------------------------
+
+    def salvar(self, caminho=ARQUIVO_ESTADO):
+        tmp = caminho + ".parcial"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "celulas":  [[list(k), v] for k, v in self.celulas.items()],
+                "porLead":  {i: [list(c), m] for i, (c, m) in self.por_lead.items()},
+                "versaoOrigem": self.versao,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, caminho)
+
+    @classmethod
+    def carregar(cls, caminho=ARQUIVO_ESTADO):
+        ag = cls()
+        if not os.path.exists(caminho):
+            return ag
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            for k, v in dados.get("celulas", []):
+                ag.celulas[tuple(k)] = v
+            ag.por_lead = {i: (tuple(c), m) for i, (c, m) in dados.get("porLead", {}).items()}
+            ag.versao   = dados.get("versaoOrigem")
+        except Exception as e:
+            print(f"   Agregados corrompidos ({e}), recomecando do zero.")
+            return cls()
+        return ag
+
+    def exportar(self, caminho):
+        """Grava o resumo pequeno que o dashboard le."""
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+
+
+def ids_do_df(df):
+    """
+    Id de cada linha do df, na mesma ordem da chave_lead dos destinos: o
+    place id do Google, senao o link do Maps, senao o id do documento com
+    as coordenadas. Filiais com o mesmo nome na mesma cidade continuam
+    separadas; se duas linhas caissem no mesmo id o total nunca bateria
+    com len(df) e o sincronizar reconstruiria tudo toda vez.
+    """
+    from scraper_firebase_direto import gerar_id_doc
+
+    def col(nome, padrao):
+        if nome not in df.columns:
+            return [padrao] * len(df)
+        return df[nome].where(df[nome].notna(), padrao).astype(str).tolist()
+
+    ids = []
+    for e, c, url, lat, lng in zip(col("Empresa", "sem_nome"), col("Territorio", "belem"), col("Google_Maps", ""),
+                                   col("Latitude", ""), col("Longitude", "")):
+        pid = extrair_place_id(url) if url else None
+        if pid and pid.startswith("0x"):
+            ids.append(pid)
+        elif url:
+            ids.append(url)
+        else:
+            doc = gerar_id_doc({"Empresa": e, "Territorio": c})
+            ids.append(f"{doc}@{lat},{lng}" if lat and lng else doc)
+    return ids
+
+
+def reconstruir(df, ids=None):
+    ag = AgregadosLeads()
+    ag.upsert_df(df, ids_do_df(df) if ids is None else ids)
+    return ag
+
+
+def versao_arquivo(caminho):
+    """Versao barata do arquivo: [tamanho, mtime_ns], ou None se nao existe."""
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def sincronizar(df, delta=None, removidos=(), caminho=ARQUIVO_ESTADO, origem=None, versao_base=None):
+    """
+    Carrega o estado, tira os ids em 'removidos' (leads que a deduplicacao
+    juntou em outros), faz upsert so das linhas 'delta' (mascara booleana
+    sobre o df; None = nenhuma) e salva.
+
+    'origem' e o CSV que o df representa e 'versao_base' a versao_arquivo()
+    dele quando o df foi lido. Se o estado nao estava em dia com essa versao
+    (primeira execucao, CSV editado por fora) ele e reconstruido do df
+    inteiro; depois de salvar, guarda a versao atual de 'origem'. O total
+    contra len(df) continua como segunda conferencia.
+    """
+    ag = AgregadosLeads.carregar(caminho)
+    fora = origem is not None and (ag.versao is None or ag.versao != versao_base)
+    if not fora:
+        for lead_id in removidos:
+            ag.remover(lead_id)
+        if delta is not None and delta.any():
+            parte = df[delta]
+            ag.upsert_df(parte, ids_do_df(parte))
+        fora = ag.totais()["total"] != len(df)
+    if fora:
+        print("   Agregados fora de sincronia com o CSV, reconstruindo.")
+        ag = reconstruir(df)
+    if origem is not None:
+        ag.versao = versao_arquivo(origem)
+    ag.salvar(caminho)
+    return ag
+
+
+def imprimir_totais(tot):
+    total = tot["total"] or 1
+    print(f"\nESTATISTICAS:")
+    print(f"   Total:         {tot['total']}")
+    print(f"   Sem site:      {tot['semSite']} ({tot['semSite']/total*100:.1f}%)")
+    print(f"   Sem Instagram: {tot['semInstagram']} ({tot['semInstagram']/total*100:.1f}%)")
+    print(f"   Sem telefone:  {tot['semTelefone']} ({tot['semTelefone']/total*100:.1f}%)")
+    print(f"   Oportunidades: {tot['oportunidades']} ({tot['oportunidades']/total*100:.1f}%)\n")
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    from pontuacao_leads import repontuar_df
+
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else "leads_paragominas.csv"
+    df, _ = repontuar_df(pd.read_csv(arquivo, encoding="utf-8-sig"))
+    ag = reconstruir(df)
+    ag.versao = versao_arquivo(arquivo)
+    ag.salvar()
+    imprimir_totais(ag.totais())
+    print(f"Agregados salvos: {ARQUIVO_ESTADO} ({len(ag.celulas)} celulas)")
@@ -0,0 +1,357 @@
+"""
+BUSCA POR TILES
+O Google Maps corta cada busca por texto em ~120 resultados, entao uma
+busca "Academias em Belem" nunca cobre a cidade toda. Aqui a caixa da
+cidade e dividida em tiles (viewports lat/lng num zoom escolhido), cada
+tile e buscado separadamente (varias abas/navegadores em paralelo), tiles
+que batem no limite sao subdivididos e os lugares sao deduplicados pelo
+place id. No fim sai um relatorio de cobertura para ajustar o zoom.
+
+Como rodar:
+    python busca_por_tiles.py
+"""
+
+import math, queue, threading, time, traceback
+from contextlib import nullcontext
+from playwright.sync_api import sync_playwright
+
+from governador_taxa import GovernadorTaxa, detectar_bloqueio
+from rastreamento_lentos import RastreadorLentos
+from scraper_firebase_direto import (
+    MOTIVO_NOME_INVALIDO, RECUPERACOES_MAXIMAS, extrair_place_id, extrair_lead_por_url, fechar_banner_consentimento,
+    init_firebase, pagina_quebrada, salvar_no_firebase, sincronizar_local,
+)
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+VIEWPORT           = {"width": 1400, "height": 900}
+LIMITE_POR_BUSCA   = 120   # acima disso o Maps corta a lista
+ZOOM_PADRAO        = 14
+ZOOM_MAXIMO        = 18
+NAVEGADORES        = 3
+ROLAGENS_MAXIMAS   = 40
+
+# (lat_min, lng_min, lat_max, lng_max)
+BBOX_CIDADES = {
+    "Belém":       (-1.4800, -48.5200, -1.2800, -48.3800),
+    "Ananindeua":  (-1.4100, -48.4200, -1.3000, -48.3300),
+    "Paragominas": (-3.0300, -47.3900, -2.9500, -47.3000),
+}
+
+FIM_DA_LISTA = ["chegou ao final da lista", "reached the end of the list"]
+
+# ================================================================
+# TILES
+# ================================================================
+
+def graus_por_tile(zoom, lat):
+    """Tamanho (dlat, dlng) coberto pelo viewport naquele zoom."""
+    dlng = VIEWPORT["width"] * 360.0 / (256 * 2 ** zoom)
+    dlat = VIEWPORT["height"] * 360.0 / (256 * 2 ** zoom) * math.cos(math.radians(lat))
+    return dlat, dlng
+
+
+def gerar_tiles(bbox, zoom=ZOOM_PADRAO):
+    lat_min, lng_min, lat_max, lng_max = bbox
+    dlat, dlng = graus_por_tile(zoom, (lat_min + lat_max) / 2)
+    tiles = []
+    lat = lat_min
+    while lat < lat_max:
+        lng = lng_min
+        while lng < lng_max:
+            tiles.append({
+                "bbox": (lat, lng, min(lat + dlat, lat_max), min(lng + dlng, lng_max)),
+                "zoom": zoom,
+            })
+            lng += dlng
+        lat += dlat
+    return tiles
+
+
+def subdividir_tile(tile):
+    lat_min, lng_min, lat_max, lng_max = tile["bbox"]
+    lat_meio = (lat_min + lat_max) / 2
+    lng_meio = (lng_min + lng_max) / 2
+    return [
+        {"bbox": b, "zoom": tile["zoom"] + 1}
+        for b in [
+            (lat_min,  lng_min,  lat_meio, lng_meio),
+            (lat_min,  lng_meio, lat_meio, lng_max),
+            (lat_meio, lng_min,  lat_max,  lng_meio),
+            (lat_meio, lng_meio, lat_max,  lng_max),
+        ]
+    ]
+
+
+def nome_tile(tile):
+    lat_min, lng_min, lat_max, lng_max = tile["bbox"]
+    return f"z{tile['zoom']}@{(lat_min + lat_max) / 2:.4f},{(lng_min + lng_max) / 2:.4f}"
+
+
+def url_tile(nicho, tile):
+    lat_min, lng_min, lat_max, lng_max = tile["bbox"]
+    return (
+        "https://www.google.com.br/maps/search/"
+        + nicho.replace(" ", "+")
+        + f"/@{(lat_min + lat_max) / 2:.6f},{(lng_min + lng_max) / 2:.6f},{tile['zoom']}z"
+    )
+
+# ================================================================
+# COLETA DE UM TILE
+# ================================================================
+
+def coletar_links_tile(page, nicho, tile):
+    """
+    Busca o nicho no viewport do tile, rola a lista ate o fim e devolve
+    ({place_id: link}, bateu_no_limite), ou (None, False) se a lista nao
+    carregou.
+    """
+    page.goto(url_tile(nicho, tile), wait_until="domcontentloaded")
+    fechar_banner_consentimento(page)
+    try:
+        page.wait_for_selector('div[role="article"]', timeout=15000)
+    except:
+        return None, False
+
+    chegou_ao_fim = False
+    anterior = -1
+    for _ in range(ROLAGENS_MAXIMAS):
+        estado = page.evaluate("""() => {
+            const feed = document.querySelector('div[role="feed"]');
+            if (feed) feed.scrollTop = feed.scrollHeight;
+            return {
+                n: document.querySelectorAll('div[role="article"]').length,
+                texto: feed ? feed.innerText.slice(-400).toLowerCase() : ""
+            };
+        }""")
+        if any(f in estado["texto"] for f in FIM_DA_LISTA):
+            chegou_ao_fim = True
+            break
+        if estado["n"] >= LIMITE_POR_BUSCA or estado["n"] == anterior:
+            break
+        anterior = estado["n"]
+        time.sleep(1.2)
+
+    hrefs = page.eval_on_selector_all(
+        'div[role="article"] a[href*="/maps/place/"]', "els => els.map(e => e.href)"
+    )
+    links = {}
+    for h in hrefs:
+        pid = extrair_place_id(h)
+        if pid and pid not in links:
+            links[pid] = h
+    return links, (len(links) >= LIMITE_POR_BUSCA and not chegou_ao_fim)
+
+# ================================================================
+# POOL DE NAVEGADORES
+# ================================================================
+
+def executar_em_paralelo(itens, trabalho, navegadores=NAVEGADORES, governador=None, rastrear_lentos=False):
+    """
+    Roda trabalho(page, item, enfileirar) para cada item usando N threads,
+    cada uma com seu proprio navegador Playwright. 'enfileirar' permite
+    que um item gere novos itens (ex: subdivisao de tiles). O governador,
+    compartilhado pelas threads, limita abas ativas e requisicoes/s; o
+    trabalho devolve False quando o item nao deu resultado (timeout, lugar
+    sem lead), o que conta como falha para o governador.
+    Com 'rastrear_lentos', itens lentos ou com erro deixam um trace salvo.
+    Se a aba de um worker cair, ele abre outra e refaz o item uma vez.
+    Se nenhum worker conseguir abrir o navegador (ou todos morrerem), a
+    espera termina e os itens restantes sao descartados com aviso.
+    """
+    governador = governador or GovernadorTaxa(concorrencia_maxima=navegadores)
+    fila = queue.Queue()
+    for it in itens:
+        fila.put(it)
+    lock_contagem = threading.Lock()
+    repetidos     = set()
+    recuperacoes  = [0]
+    vivos         = [navegadores]
+
+    def worker():
+        try:
+            with sync_playwright() as p:
+                try:
+                    browser = p.chromium.launch(headless=False, slow_mo=50)
+                except Exception as e:
+                    print(f"   Worker nao abriu o navegador: {type(e).__name__}: {e}")
+                    return
+                atender(browser)
+        finally:
+            with fila.all_tasks_done:
+                vivos[0] -= 1
+                fila.all_tasks_done.notify_all()
+
+    def atender(browser):
+        ctx     = browser.new_context(viewport=VIEWPORT, locale="pt-BR")
+        page    = ctx.new_page()
+        rastreador = RastreadorLentos(ctx) if rastrear_lentos else None
+        recuperacoes_worker = 0
+        while True:
+            item = fila.get()
+            if item is None:
+                fila.task_done()
+                break
+            try:
+                rotulo = nome_tile(item) if isinstance(item, dict) else item
+                # o tempo do lead comeca com a vaga ja concedida: espera/pausa
+                # do governador nao e lentidao do lead
+                with governador.vaga():
+                    with (rastreador.lead(rotulo) if rastreador is not None else nullcontext({})) as registro:
+                        resultado = trabalho(page, item, fila.put)
+                        if resultado is False:
+                            registro["erro"] = "sem resultado"
+                if detectar_bloqueio(page):
+                    governador.bloqueio()
+                elif resultado is False:
+                    governador.falha(page)
+                else:
+                    governador.sucesso()
+            except Exception as e:
+                print(f"   ERRO worker: {type(e).__name__}: {e}")
+                governador.falha(page)
+                if pagina_quebrada(page, e, exigir_lista=False) and recuperacoes_worker < RECUPERACOES_MAXIMAS:
+                    recuperacoes_worker += 1
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+                    page = ctx.new_page()
+                    with lock_contagem:
+                        recuperacoes[0] += 1
+                        chave = repr(item)
+                        if chave not in repetidos:
+                            repetidos.add(chave)
+                            fila.put(item)
+                    print(f"   Worker abriu aba nova ({recuperacoes_worker}/{RECUPERACOES_MAXIMAS}).")
+                else:
+                    traceback.print_exc()
+            finally:
+                fila.task_done()
+        if rastreador is not None:
+            rastreador.fechar()
+        browser.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(navegadores)]
+    for t in threads:
+        t.start()
+    with fila.all_tasks_done:
+        while fila.unfinished_tasks and vivos[0] > 0:
+            fila.all_tasks_done.wait()
+        perdidos = fila.unfinished_tasks
+    if perdidos:
+        print(f"   AVISO: nenhum navegador ativo, {perdidos} itens ficaram sem processar.")
+    for _ in threads:
+        fila.put(None)
+    for t in threads:
+        t.join()
+    if recuperacoes[0]:
+        print(f"   Recuperacoes de aba nos workers: {recuperacoes[0]}")
+
+# ================================================================
+# BUSCA COMPLETA
+# ================================================================
+
+def buscar_por_tiles(nicho, cidade="Belém", bbox=None, zoom=ZOOM_PADRAO, navegadores=NAVEGADORES, governador=None,
+                     tiles=None):
+    """
+    Varre a cidade por tiles e devolve (lugares, relatorio). 'tiles' busca
+    exatamente esses tiles (ex.: o de um job da fila) em vez de gerar a grade.
+    """
+    tiles = tiles or gerar_tiles(bbox or BBOX_CIDADES[cidade], zoom)
+
+    print("\n" + "="*60)
+    print("CLICK FACIL - BUSCA POR TILES")
+    print("="*60)
+    print(f"Cidade: {cidade} | Nicho: {nicho} | Zoom: {zoom} | Tiles: {len(tiles)}")
+    print("="*60 + "\n")
+
+    lock     = threading.Lock()
+    lugares  = {}
+    por_tile = {}
+    inicio   = time.time()
+
+    def trabalho(page, tile, enfileirar):
+        links, no_limite = coletar_links_tile(page, nicho, tile)
+        if links is None:
+            print(f"   Tile {nome_tile(tile)}: lista nao carregou.")
+            with lock:
+                por_tile[nome_tile(tile)] = {"encontrados": 0, "novos": 0, "subdividido": False, "falhou": True}
+            return False
+        with lock:
+            novos = [pid for pid in links if pid not in lugares]
+            for pid in novos:
+                lugares[pid] = links[pid]
+            por_tile[nome_tile(tile)] = {
+                "encontrados": len(links),
+                "novos":       len(novos),
+                "subdividido": no_limite and tile["zoom"] < ZOOM_MAXIMO,
+            }
+        print(f"   Tile {nome_tile(tile)}: {len(links)} lugares ({len(novos)} novos)")
+        if no_limite and tile["zoom"] < ZOOM_MAXIMO:
+            print(f"   Tile {nome_tile(tile)} bateu no limite, subdividindo.")
+            for filho in subdividir_tile(tile):
+                enfileirar(filho)
+
+    executar_em_paralelo(tiles, trabalho, navegadores, governador)
+    return lugares, relatorio_cobertura(por_tile, lugares, time.time() - inicio)
+
+
+def relatorio_cobertura(por_tile, lugares, segundos):
+    total_encontrados = sum(t["encontrados"] for t in por_tile.values())
+    unicos            = len(lugares)
+    relatorio = {
+        "tiles":            len(por_tile),
+        "subdivididos":     sum(1 for t in por_tile.values() if t["subdividido"]),
+        "tilesFalhos":      sum(1 for t in por_tile.values() if t.get("falhou")),
+        "lugaresUnicos":    unicos,
+        "totalEncontrados": total_encontrados,
+        "razaoSobreposicao": round(1 - unicos / total_encontrados, 3) if total_encontrados else 0.0,
+        "mediaPorTile":     round(total_encontrados / len(por_tile), 1) if por_tile else 0.0,
+        "lugaresPorMinuto": round(unicos / (segundos / 60), 1) if segundos else 0.0,
+        "porTile":          por_tile,
+    }
+
+    print("\nCOBERTURA:")
+    print(f"   Tiles buscados:      {relatorio['tiles']} ({relatorio['subdivididos']} subdivididos, "
+          f"{relatorio['tilesFalhos']} sem resposta)")
+    print(f"   Lugares unicos:      {unicos}")
+    print(f"   Media por tile:      {relatorio['mediaPorTile']}")
+    print(f"   Sobreposicao:        {relatorio['razaoSobreposicao']*100:.1f}%")
+    print(f"   Lugares por minuto:  {relatorio['lugaresPorMinuto']}\n")
+    return relatorio
+
+
+def extrair_lugares(lugares, nicho, cidade, db=None, navegadores=NAVEGADORES, governador=None, rastrear_lentos=False):
+    """Abre cada lugar direto pelo link e extrai os dados do lead."""
+    lock  = threading.Lock()
+    leads = []
+
+    def trabalho(page, link, _enfileirar):
+        motivo = {}
+        lead = extrair_lead_por_url(page, link, nicho, cidade, motivo)
+        if lead is None:
+            # nome invalido/patrocinado e pulo normal; timeout e falha
+            return None if motivo.get("motivo") == MOTIVO_NOME_INVALIDO else False
+        salvar_no_firebase(db, lead)
+        with lock:
+            leads.append(lead)
+
+    executar_em_paralelo(list(lugares.values()), trabalho, navegadores, governador, rastrear_lentos)
+    return leads
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    NICHO  = "Academias"
+    CIDADE = "Belém"
+    ZOOM   = ZOOM_PADRAO
+
+    db  = init_firebase()
+    gov = GovernadorTaxa(concorrencia_maxima=NAVEGADORES)
+    lugares, relatorio = buscar_por_tiles(NICHO, CIDADE, zoom=ZOOM, governador=gov)
+    leads = extrair_lugares(lugares, NICHO, CIDADE, db, governador=gov)
+    sincronizar_local(leads, CIDADE)
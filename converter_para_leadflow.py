@@ -2,6 +2,11 @@ import json
 import os
 from datetime import datetime
 
+from links_maps import extrair_coordenadas
+from agregados_leads import ARQUIVO_RESUMO, sincronizar as sincronizar_agregados, versao_arquivo
+from pontuacao_leads import repontuar_df
+from registro_lead import RegistroLead
+
 def converter_para_leadflow():
     """
     Converte os dados do scraper (leads_paragominas.csv) 
@@ -23,39 +28,24 @@ def converter_para_leadflow():
     
     # Lê o CSV
     import pandas as pd
+    versao_csv = versao_arquivo(arquivo_csv)
     df = pd.read_csv(arquivo_csv)
+    df, _ = repontuar_df(df)
     
     print(f"📂 Lendo {len(df)} leads de '{arquivo_csv}'...")
     
-    # Converte para o formato do LeadFlow
+    # Converte para o formato do LeadFlow (um RegistroLead por linha, sem iterrows)
+    data_contato = datetime.now().strftime("%Y-%m-%d")
     leads_leadflow = []
     
-    for index, row in df.iterrows():
-        # Limpa o WhatsApp
-        whatsapp_limpo = ""
-        if pd.notna(row.get('WhatsApp')) and row['WhatsApp'] != "Não encontrado":
-            whatsapp_limpo = str(row['WhatsApp']).replace("(", "").replace(")", "").replace("-", "").replace(" ", "")
-        
-        # Monta o lead no formato do LeadFlow
-        lead = {
-            "id": str(index + 1),
-            "empresa": str(row.get('Empresa', '')),
-            "contato": "",  # Scraper não extrai nome de contato específico
-            "email": "",    # Scraper não extrai email ainda
-            "telefone": str(row.get('WhatsApp', '')) if pd.notna(row.get('WhatsApp')) else "",
-            "whatsapp": whatsapp_limpo,
-            "site": str(row.get('Site', '')) if pd.notna(row.get('Site')) else "SEM SITE",
-            "instagram": str(row.get('Instagram', '')) if pd.notna(row.get('Instagram')) else "",
-            "googleMaps": str(row.get('Google_Maps', '')) if pd.notna(row.get('Google_Maps')) else "",
-            "nicho": str(row.get('Nicho', '')) if pd.notna(row.get('Nicho')) else "",
-            "status": "Novo",  # Todos os leads começam como "Novo"
-            "notas": str(row.get('Notas', '')) if pd.notna(row.get('Notas')) else "",
-            "dataContato": datetime.now().strftime("%Y-%m-%d"),
-            "valor": 0,
-            "linkWhatsApp": str(row.get('Link_WhatsApp', '')) if pd.notna(row.get('Link_WhatsApp')) else ""
-        }
-        
-        leads_leadflow.append(lead)
+    for index, registro in enumerate(RegistroLead.de_df(df)):
+        # Coordenadas: colunas do scraper ou, em CSVs antigos, o pin do link do Maps
+        if registro.latitude is None or registro.longitude is None:
+            registro.latitude, registro.longitude = extrair_coordenadas(registro.google_maps, aceitar_viewport=False)
+        leads_leadflow.append(registro.para_leadflow(index + 1, data_contato))
+    
+    # Serializa uma vez so e reusa nos quatro arquivos
+    json_leads = json.dumps(leads_leadflow, ensure_ascii=False, indent=2)
     
     # Salva em múltiplos formatos para garantir compatibilidade
 
@@ -65,8 +55,15 @@ def converter_para_leadflow():
     os.makedirs(pasta_public_data, exist_ok=True)
     arquivo_json_publico = os.path.join(pasta_public_data, "leadsData.json")
     with open(arquivo_json_publico, 'w', encoding='utf-8') as f:
-        json.dump(leads_leadflow, f, ensure_ascii=False, indent=2)
+        f.write(json_leads)
     print(f"✅ JSON para o App salvo em: {arquivo_json_publico}")
+
+    # Resumo agregado (contagens por território × nicho × estágio × qualidade)
+    # o CSV nao muda aqui: sem delta, so reconstroi se o estado nao esta em dia com ele
+    agregados = sincronizar_agregados(df, origem=arquivo_csv, versao_base=versao_csv)
+    arquivo_resumo = ARQUIVO_RESUMO
+    agregados.exportar(arquivo_resumo)
+    print(f"✅ Resumo para o dashboard salvo em: {arquivo_resumo}")
     
     # 2. TypeScript export (para importação direta)
     arquivo_ts = "leads_leadflow.ts"
@@ -74,7 +71,7 @@ def converter_para_leadflow():
         f.write("// Dados gerados automaticamente pelo scraper\n")
         f.write("// Última atualização: " + datetime.now().strftime("%d/%m/%Y %H:%M:%S") + "\n\n")
         f.write("export const leads = ")
-        f.write(json.dumps(leads_leadflow, ensure_ascii=False, indent=2))
+        f.write(json_leads)
         f.write(";\n\n")
         f.write("export default leads;\n")
     print(f"✅ TypeScript salvo: {arquivo_ts}")
@@ -85,7 +82,7 @@ def converter_para_leadflow():
         f.write("// Dados gerados automaticamente pelo scraper\n")
         f.write("// Última atualização: " + datetime.now().strftime("%d/%m/%Y %H:%M:%S") + "\n\n")
         f.write("export const leads = ")
-        f.write(json.dumps(leads_leadflow, ensure_ascii=False, indent=2))
+        f.write(json_leads)
         f.write(";\n\n")
         f.write("export default leads;\n")
     print(f"✅ JavaScript salvo: {arquivo_js}")
@@ -99,7 +96,7 @@ def converter_para_leadflow():
             f.write("// Dados gerados automaticamente pelo scraper\n")
             f.write("// Última atualização: " + datetime.now().strftime("%d/%m/%Y %H:%M:%S") + "\n\n")
             f.write("export const leadsData = ")
-            f.write(json.dumps(leads_leadflow, ensure_ascii=False, indent=2))
+            f.write(json_leads)
             f.write(";\n\n")
             f.write("export default leadsData;\n")
         print(f"✅ Integrado com LeadFlow: {arquivo_destino}")
@@ -112,16 +109,12 @@ def converter_para_leadflow():
     print(f"📊 ESTATÍSTICAS:")
     print(f"   Total de leads: {len(leads_leadflow)}")
     
-    # Conta quantos têm problemas
-    sem_site = sum(1 for lead in leads_leadflow if "SEM SITE" in lead['site'])
-    sem_telefone = sum(1 for lead in leads_leadflow if not lead['telefone'] or lead['telefone'] == "Não encontrado")
-    sem_instagram = sum(1 for lead in leads_leadflow if not lead['instagram'] or lead['instagram'] == "Não encontrado")
-    com_oportunidade = sum(1 for lead in leads_leadflow if "OPORTUNIDADE" in lead['notas'])
-    
-    print(f"   🎯 Sem site: {sem_site}")
-    print(f"   📱 Sem telefone: {sem_telefone}")
-    print(f"   📸 Sem Instagram: {sem_instagram}")
-    print(f"   💰 Oportunidades detectadas: {com_oportunidade}")
+    # Contagens vêm dos agregados (sem varrer a lista de novo)
+    totais = agregados.totais()
+    print(f"   🎯 Sem site: {totais['semSite']}")
+    print(f"   📱 Sem telefone: {totais['semTelefone']}")
+    print(f"   📸 Sem Instagram: {totais['semInstagram']}")
+    print(f"   💰 Oportunidades detectadas: {totais['oportunidades']}")
     
     print(f"\n{'='*60}")
     print(f"📋 PRÓXIMOS PASSOS:")
@@ -144,7 +137,7 @@ def converter_para_leadflow():
         print(f"   Status: {lead['status']}")
         print(f"   Site: {lead['site']}")
         print(f"   Telefone: {lead['telefone']}")
-        print(f"   Notas: {lead['notas']}")
+        print(f"   Notas: {lead['notas']} (score {lead['score']})")
         print()
     
     if len(leads_leadflow) > 3:
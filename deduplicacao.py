@@ -0,0 +1,403 @@
+"""
+DEDUPLICACAO DE LEADS
+Substitui o drop_duplicates(subset=["Empresa"]), que juntava filiais
+diferentes com o mesmo nome e deixava passar quase-duplicatas. Usa place
+id, telefone normalizado, nome normalizado e coordenadas do pin. Para nao
+comparar todos contra todos (O(n^2)) os leads sao agrupados em blocos
+(mesmo place id, mesmo telefone, celula de grade vizinha, token raro do
+nome) e so pares dentro de um bloco sao comparados. Os pares aceitos sao
+unidos com union-find em clusters, que viram um lead cada.
+
+Como rodar:
+    python deduplicacao.py leads_paragominas.csv
+    python deduplicacao.py --benchmark 500000
+"""
+
+import json, math, re, sys, time, unicodedata
+from collections import defaultdict
+
+from links_maps import extrair_coordenadas, extrair_place_id
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+TAMANHO_CELULA_GRAUS = 0.001   # ~110 m no equador
+MAX_BLOCO            = 200     # blocos maiores sao genericos demais
+DIST_MESMO_LUGAR_M   = 60
+DIST_PROXIMO_M       = 150
+SIM_NOME_FORTE       = 0.85
+SIM_NOME_MEDIA       = 0.5
+REGRAS_FRACAS        = {"nome+telefone_parcial"}
+
+PALAVRAS_VAZIAS = {
+    "de", "da", "do", "das", "dos", "e", "a", "o", "em", "the",
+    "ltda", "me", "eireli", "epp", "sa", "s", "cia", "filial", "unidade",
+}
+VALORES_VAZIOS = {"", "nan", "none", "sem site", "nao encontrado", "não encontrado"}
+
+# ================================================================
+# NORMALIZACAO
+# ================================================================
+
+def _sem_acentos(txt):
+    return unicodedata.normalize("NFKD", txt).encode("ascii", "ignore").decode("ascii")
+
+
+def normalizar_nome(nome):
+    if not isinstance(nome, str):
+        return ()
+    txt = re.sub(r"[^a-z0-9 ]", " ", _sem_acentos(nome).lower())
+    return tuple(sorted({t for t in txt.split() if t not in PALAVRAS_VAZIAS}))
+
+
+def normalizar_telefone(tel):
+    """Ultimos 10-11 digitos, sem DDI nem zero de operadora; None se invalido."""
+    if tel is None or (isinstance(tel, float) and math.isnan(tel)):
+        return None
+    num = re.sub(r"\D", "", str(tel))
+    if num.startswith("55") and len(num) > 11:
+        num = num[2:]
+    num = num.lstrip("0")
+    return num[-11:] if len(num) >= 8 else None
+
+
+def valor_vazio(v):
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return True
+    return str(v).strip().lower().split(" (")[0] in VALORES_VAZIOS
+
+
+def distancia_m(lat1, lng1, lat2, lng2):
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return 6371000 * math.hypot(x, y)
+
+
+def preparar(registro):
+    url = registro.get("Google_Maps")
+    pid = extrair_place_id(url) if isinstance(url, str) else None
+    lat, lng = registro.get("Latitude"), registro.get("Longitude")
+    if valor_vazio(lat) or valor_vazio(lng):
+        lat, lng = extrair_coordenadas(url, aceitar_viewport=False)
+    return {
+        "pid":    pid if pid and pid.startswith("0x") else None,
+        "tel":    normalizar_telefone(registro.get("WhatsApp")),
+        "tokens": normalizar_nome(registro.get("Empresa")),
+        "lat":    float(lat) if lat is not None else None,
+        "lng":    float(lng) if lng is not None else None,
+    }
+
+# ================================================================
+# COMPARACAO
+# ================================================================
+
+def similaridade_nome(a, b):
+    if not a or not b:
+        return 0.0
+    sa, sb = set(a), set(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def regra_duplicado(a, b):
+    """Nome da regra que casou, ou None se forem lugares diferentes."""
+    if a["pid"] and b["pid"]:
+        return "place_id" if a["pid"] == b["pid"] else None
+
+    dist = None
+    if a["lat"] is not None and b["lat"] is not None:
+        dist = distancia_m(a["lat"], a["lng"], b["lat"], b["lng"])
+    sim = similaridade_nome(a["tokens"], b["tokens"])
+    mesmo_tel = a["tel"] is not None and a["tel"] == b["tel"]
+    tel_conflita = a["tel"] and b["tel"] and a["tel"] != b["tel"]
+
+    if mesmo_tel and (sim >= SIM_NOME_MEDIA or (dist is not None and dist <= DIST_MESMO_LUGAR_M)):
+        return "telefone"
+    if dist is not None and dist <= DIST_PROXIMO_M and sim >= SIM_NOME_FORTE and not tel_conflita:
+        return "nome+local"
+    if dist is None and sim == 1.0 and not tel_conflita and (a["tel"] or b["tel"]):
+        return "nome+telefone_parcial"
+    return None
+
+
+class UniaoBusca:
+    def __init__(self, n):
+        self.pai = list(range(n))
+
+    def achar(self, i):
+        while self.pai[i] != i:
+            self.pai[i] = self.pai[self.pai[i]]
+            i = self.pai[i]
+        return i
+
+    def unir(self, i, j):
+        ri, rj = self.achar(i), self.achar(j)
+        if ri == rj:
+            return False
+        self.pai[max(ri, rj)] = min(ri, rj)
+        return True
+
+# ================================================================
+# MOTOR
+# ================================================================
+
+def _celula(p):
+    if p["lat"] is None:
+        return None
+    return (math.floor(p["lat"] / TAMANHO_CELULA_GRAUS), math.floor(p["lng"] / TAMANHO_CELULA_GRAUS))
+
+
+def encontrar_clusters(registros):
+    """
+    Devolve (clusters, relatorio). Cada cluster e a lista de indices (em
+    ordem) dos registros que representam o mesmo lugar.
+    """
+    inicio = time.perf_counter()
+    preps  = [preparar(r) for r in registros]
+    n      = len(preps)
+    uf     = UniaoBusca(n)
+
+    blocos = defaultdict(list)
+    celulas = defaultdict(list)
+    for i, p in enumerate(preps):
+        if p["pid"]:
+            blocos["id:" + p["pid"]].append(i)
+        if p["tel"]:
+            blocos["tel:" + p["tel"]].append(i)
+        for t in p["tokens"]:
+            if len(t) > 2:
+                blocos["nome:" + t].append(i)
+        c = _celula(p)
+        if c:
+            celulas[c].append(i)
+
+    comparacoes = 0
+    por_regra   = defaultdict(int)
+    ignorados   = 0
+    fracos      = defaultdict(set)   # sem pin -> candidatos so por nome igual
+
+    def comparar(i, j):
+        nonlocal comparacoes
+        if uf.achar(i) == uf.achar(j):
+            return
+        comparacoes += 1
+        regra = regra_duplicado(preps[i], preps[j])
+        if regra in REGRAS_FRACAS:
+            # nome igual sem pin casa com toda filial de uma rede; so une
+            # depois, se sobrar um candidato so
+            if preps[i]["lat"] is None:
+                fracos[i].add(j)
+            if preps[j]["lat"] is None:
+                fracos[j].add(i)
+        elif regra and uf.unir(i, j):
+            por_regra[regra] += 1
+
+    for chave, membros in blocos.items():
+        if len(membros) > MAX_BLOCO and not chave.startswith("id:"):
+            ignorados += 1
+            continue
+        for a in range(len(membros)):
+            for b in range(a + 1, len(membros)):
+                comparar(membros[a], membros[b])
+
+    for (cx, cy), membros in celulas.items():
+        if len(membros) > MAX_BLOCO:
+            ignorados += 1
+            continue
+        for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+            vizinhos = membros if (dx, dy) == (0, 0) else celulas.get((cx + dx, cy + dy), ())
+            if len(vizinhos) > MAX_BLOCO:
+                continue
+            for i in membros:
+                for j in vizinhos:
+                    if (dx, dy) != (0, 0) or i < j:
+                        comparar(i, j)
+
+    ambiguos = 0
+    for i, candidatos in fracos.items():
+        raizes = {uf.achar(j) for j in candidatos} - {uf.achar(i)}
+        if len(raizes) == 1:
+            if uf.unir(i, raizes.pop()):
+                por_regra["nome+telefone_parcial"] += 1
+        elif raizes:
+            ambiguos += 1
+
+    grupos = defaultdict(list)
+    for i in range(n):
+        grupos[uf.achar(i)].append(i)
+    clusters = list(grupos.values())
+
+    relatorio = {
+        "registros":        n,
+        "clusters":         len(clusters),
+        "duplicatasRemovidas": n - len(clusters),
+        "comparacoes":      comparacoes,
+        "comparacoesPorRegistro": round(comparacoes / n, 2) if n else 0.0,
+        "blocosIgnorados":  ignorados,
+        "semPinAmbiguos":   ambiguos,
+        "uniaoPorRegra":    dict(por_regra),
+        "segundos":         round(time.perf_counter() - inicio, 2),
+        "maioresClusters":  [
+            [registros[i].get("Empresa") for i in c]
+            for c in sorted((c for c in clusters if len(c) > 1), key=len, reverse=True)[:10]
+        ],
+    }
+    return clusters, relatorio
+
+
+def mesclar_cluster(registros, indices):
+    """O registro mais recente (ultimo) vence; campos vazios vem dos outros."""
+    base = dict(registros[indices[-1]])
+    for i in reversed(indices[:-1]):
+        for k, v in registros[i].items():
+            if valor_vazio(base.get(k)) and not valor_vazio(v):
+                base[k] = v
+    return base
+
+
+def deduplicar_registros(registros):
+    clusters, relatorio = encontrar_clusters(registros)
+    clusters.sort(key=lambda c: c[-1])
+    return [mesclar_cluster(registros, c) for c in clusters], relatorio
+
+
+def deduplicar_df(df):
+    import pandas as pd
+
+    registros, relatorio = deduplicar_registros(df.to_dict(orient="records"))
+    return pd.DataFrame(registros, columns=df.columns), relatorio
+
+
+def imprimir_relatorio(rel):
+    print("\nDEDUPLICACAO:")
+    print(f"   Registros:      {rel['registros']}")
+    print(f"   Clusters:       {rel['clusters']} ({rel['duplicatasRemovidas']} duplicatas)")
+    print(f"   Comparacoes:    {rel['comparacoes']} ({rel['comparacoesPorRegistro']}/registro)")
+    print(f"   Por regra:      {rel['uniaoPorRegra']}")
+    if rel.get("semPinAmbiguos"):
+        print(f"   Sem pin:        {rel['semPinAmbiguos']} com mais de um candidato (nao unidos)")
+    print(f"   Tempo:          {rel['segundos']}s")
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+RAMOS = ["academia", "clinica odontologica", "odonto", "pet shop", "salao de beleza", "barbearia",
+         "studio", "farmacia", "padaria", "auto pecas", "otica", "restaurante"]
+PALAVRAS = ["vida", "saude", "sorriso", "forma", "top", "prime", "bella", "nova", "real", "fit",
+            "center", "express", "premium", "popular", "central", "amazonia", "paraense", "estrela"]
+PRENOMES = ["Maria", "Jose", "Ana", "Joao", "Antonio", "Francisco", "Carlos", "Paulo", "Pedro",
+            "Lucas", "Luiz", "Marcos", "Rafael", "Daniel", "Juliana", "Fernanda", "Patricia", "Sandra"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira",
+              "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Barbosa"]
+REDES = ["Drogasil", "Smart Fit", "Odonto Company", "Petz", "Oticas Carol", "Sorridents"]
+
+
+def _nome_realista(rnd):
+    """Nomes como os do Maps: poucos ramos e palavras, muita repeticao entre lugares diferentes."""
+    ramo = rnd.choice(RAMOS).title()
+    molde = rnd.random()
+    if molde < 0.05:
+        return rnd.choice(REDES)  # rede: mesmo nome em dezenas de enderecos
+    if molde < 0.35:
+        return f"{ramo} {rnd.choice(PALAVRAS).title()}"
+    if molde < 0.6:
+        return f"{ramo} {rnd.choice(PRENOMES)}"
+    if molde < 0.8:
+        return f"{rnd.choice(PRENOMES)} {rnd.choice(SOBRENOMES)} {ramo}"
+    return f"{ramo} {rnd.choice(PALAVRAS).title()} {rnd.choice(SOBRENOMES)}"
+
+
+def _variante(rnd, r):
+    """Como o mesmo lugar volta numa busca de outro nicho/tile ou de outra execucao."""
+    r = dict(r)
+    nome = r["Empresa"]
+    sorteio = rnd.random()
+    if sorteio < 0.3:
+        nome = nome.upper() + " LTDA"
+    elif sorteio < 0.5:
+        nome = nome.lower()
+    elif sorteio < 0.6:
+        nome = nome + " - Unidade " + rnd.choice(["Centro", "Marco", "Umarizal"])
+    r["Empresa"] = nome
+    if r["WhatsApp"] and rnd.random() < 0.3:
+        r["WhatsApp"] = "+55 " + re.sub(r"\D", "", r["WhatsApp"])
+    if rnd.random() < 0.2:
+        r["Google_Maps"] = "https://www.google.com.br/maps/search/" + nome.replace(" ", "+")  # sem pin
+    elif rnd.random() < 0.5:
+        lat, lng = extrair_coordenadas(r["Google_Maps"], aceitar_viewport=False)
+        lat += rnd.uniform(-0.0002, 0.0002)
+        lng += rnd.uniform(-0.0002, 0.0002)
+        r["Google_Maps"] = f"https://www.google.com.br/maps/place/x/data=!3d{lat:.7f}!4d{lng:.7f}"
+    return r
+
+
+def gerar_sinteticos(n, taxa_dup=0.2, seed=42):
+    """
+    Leads sinteticos com nomes repetidos de verdade (redes, 'Academia
+    Vida' em varios bairros) e variantes das duplicatas. '_origem' guarda
+    o lugar real de cada registro para o avaliar() medir acertos.
+    """
+    import random
+
+    rnd = random.Random(seed)
+    base = []
+    for i in range(int(n * (1 - taxa_dup))):
+        lat = -1.45 + rnd.uniform(-0.15, 0.15)
+        lng = -48.48 + rnd.uniform(-0.15, 0.15)
+        tem_tel = rnd.random() < 0.85
+        base.append({
+            "Empresa":     _nome_realista(rnd),
+            "WhatsApp":    f"(91) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}" if tem_tel else None,
+            "Google_Maps": f"https://www.google.com.br/maps/place/x/data=!3d{lat:.7f}!4d{lng:.7f}",
+            "_origem":     i,
+        })
+    regs = list(base)
+    while len(regs) < n:
+        regs.append(_variante(rnd, rnd.choice(base)))
+    rnd.shuffle(regs)
+    return regs
+
+
+def avaliar(registros, clusters):
+    """Precisao/recall por pares contra o '_origem' dos sinteticos."""
+    def pares(k):
+        return k * (k - 1) // 2
+
+    previstos = certos = 0
+    for c in clusters:
+        previstos += pares(len(c))
+        contagem = defaultdict(int)
+        for i in c:
+            contagem[registros[i]["_origem"]] += 1
+        certos += sum(pares(k) for k in contagem.values())
+    por_origem = defaultdict(int)
+    for r in registros:
+        por_origem[r["_origem"]] += 1
+    reais = sum(pares(k) for k in por_origem.values())
+    return {
+        "precisao": round(certos / previstos, 4) if previstos else 1.0,
+        "recall":   round(certos / reais, 4) if reais else 1.0,
+    }
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 500000
+        regs = gerar_sinteticos(n)
+        clusters, rel = encontrar_clusters(regs)
+        imprimir_relatorio(rel)
+        q = avaliar(regs, clusters)
+        print(f"   Pares certos:   precisao {q['precisao']:.2%}, recall {q['recall']:.2%}")
+    else:
+        import pandas as pd
+
+        arquivo = sys.argv[1] if len(sys.argv) > 1 else "leads_paragominas.csv"
+        df = pd.read_csv(arquivo, encoding="utf-8-sig")
+        df_final, rel = deduplicar_df(df)
+        imprimir_relatorio(rel)
+        with open("relatorio_deduplicacao.json", "w", encoding="utf-8") as f:
+            json.dump(rel, f, ensure_ascii=False, indent=2)
+        print("Relatorio salvo: relatorio_deduplicacao.json")
@@ -0,0 +1,382 @@
+"""
+DESTINOS DE LEADS (STREAMING)
+Cada lead gerado por iter_leads() passa por uma cadeia de destinos
+(CSV, Firestore, JSON, JSONL no stdout) em lotes pequenos. Assim um
+crash no lead 190 nao perde os 189 anteriores, e a memoria fica
+limitada ao tamanho do lote, nao ao total de leads. O lead vira um
+RegistroLead uma vez ao entrar na cadeia; os lotes e os destinos
+trabalham com o registro e cada destino so converte para o proprio
+formato na saida (linha do CSV/JSON, documento do Firestore). O ganho
+e de memoria por lead no lote; o tempo por lead fica perto do caminho
+com dicts (o scraper e a pontuacao ainda trabalham com o dict, que vira
+registro na entrada da cadeia).
+
+Como rodar:
+    python destinos_leads.py
+    python destinos_leads.py --jsonl | jq .   # JSONL puro no stdout, progresso no stderr
+    python destinos_leads.py --benchmark 50000
+"""
+
+import contextlib, csv, json, os, sys, time, traceback
+import pandas as pd
+
+from filtro_existentes import CAPACIDADE_MIN, FiltroBloom
+from links_maps import extrair_place_id
+from log_firestore import gravar_lote
+from registro_lead import RegistroLead
+from scraper_firebase_direto import (
+    ARQUIVO_CSV, formatar_whatsapp, gerar_id_doc,
+    init_firebase, iter_leads, montar_doc_firebase,
+)
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+TAMANHO_LOTE = 10
+ARQUIVO_JSON = "leads_stream.json"
+ARQUIVO_JSONL = "leads_stream.jsonl"
+
+COLUNAS_CSV = [
+    "Empresa", "Nicho", "Site", "WhatsApp", "Instagram", "Google_Maps",
+    "Latitude", "Longitude", "Territorio", "Status", "Notas", "WebsiteQuality", "Link_WhatsApp",
+    "Nota", "Avaliacoes", "Score",
+]
+
+
+def preparar_linha(registro):
+    """Linha do CSV/JSON (chaves do scraper + Link_WhatsApp) de um RegistroLead."""
+    linha = registro.para_scraper()
+    linha["Link_WhatsApp"] = registro.link_whatsapp
+    return linha
+
+
+def chave_lead(registro):
+    """Identidade do lead para nao repetir linha: place id, senao o link, senao o id do doc."""
+    link = registro.google_maps or ""
+    pid  = extrair_place_id(link) if link else None
+    if pid and pid.startswith("0x"):
+        return pid
+    return link or gerar_id_doc(registro)
+
+
+def filtro_do_csv(caminho, colunas, tamanho_bloco=50000):
+    """
+    Filtro de Bloom com a chave_lead de cada linha do CSV, lendo em blocos
+    so as colunas da chave: a memoria e a do filtro, nao a do historico.
+    """
+    with open(caminho, "rb") as f:
+        linhas = sum(1 for _ in f)
+    filtro = FiltroBloom(max(CAPACIDADE_MIN, 2 * linhas))   # folga para os desta execucao
+    usar = [c for c in ("Empresa", "Google_Maps", "Territorio") if c in colunas]
+    if not usar:
+        return filtro
+    for bloco in pd.read_csv(caminho, encoding="utf-8-sig", dtype=str, usecols=usar,
+                             keep_default_na=False, chunksize=tamanho_bloco):
+        for registro in RegistroLead.de_df(bloco):
+            filtro.add(chave_lead(registro))
+    return filtro
+
+# ================================================================
+# DESTINOS
+# ================================================================
+
+class DestinoCSV:
+    """
+    Acrescenta linhas ao CSV, reaproveitando o cabecalho existente. Leads
+    que ja estao no arquivo (mesmo place id/link) nao sao gravados de novo,
+    entao rodar a mesma busca outra vez nao duplica linhas. As chaves ja
+    vistas ficam num filtro de Bloom (filtro_do_csv); um falso positivo
+    (~0,1%) so deixa o lead fora deste CSV, os outros destinos recebem.
+    Quando o filtro enche ele e refeito a partir do proprio CSV, com o
+    dobro da capacidade, para a taxa de erro nao subir.
+    """
+
+    def __init__(self, caminho=ARQUIVO_CSV):
+        self.caminho = caminho
+        self.vistos  = FiltroBloom()
+        self.pulados = 0
+        existe = os.path.exists(caminho) and os.path.getsize(caminho) > 0
+        colunas = COLUNAS_CSV
+        if existe:
+            with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+                colunas = next(csv.reader(f), None) or COLUNAS_CSV
+            self.vistos = filtro_do_csv(caminho, colunas)
+        self.arquivo = open(caminho, "a", encoding="utf-8" if existe else "utf-8-sig", newline="")
+        self.writer  = csv.DictWriter(self.arquivo, fieldnames=colunas, extrasaction="ignore")
+        if not existe:
+            self.writer.writeheader()
+
+    def escrever(self, lote):
+        novos = []
+        for lead in lote:
+            chave = chave_lead(lead)
+            if chave in self.vistos:
+                self.pulados += 1
+                continue
+            self.vistos.add(chave)
+            novos.append(lead)
+        self.writer.writerows(preparar_linha(l) for l in novos)
+        self.arquivo.flush()
+        if self.vistos.cheio():
+            self.vistos = filtro_do_csv(self.caminho, self.writer.fieldnames)
+
+    def fechar(self):
+        self.arquivo.close()
+        if self.pulados:
+            print(f"   CSV: {self.pulados} leads ja existentes nao foram repetidos.")
+
+
+class DestinoFirestore:
+    """
+    Grava o lote inteiro num unico batch do Firestore, passando pelo log
+    local: sem conexao (db None ou erro) o lote fica pendente para o replay.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def escritas(lote):
+        """(colecao, id, documento) de cada registro: a unica conversao para o Firestore."""
+        return [("leads", gerar_id_doc(r), montar_doc_firebase(r)) for r in lote]
+
+    def escrever(self, lote):
+        gravadas = gravar_lote(self.db, self.escritas(lote))
+        if gravadas:
+            print(f"   Firebase: lote de {gravadas} leads salvo.")
+        else:
+            print(f"   Firebase: lote de {len(lote)} leads guardado no log para replay.")
+
+    def fechar(self):
+        pass
+
+
+class DestinoJSON:
+    """
+    Escreve um array JSON incrementalmente. Enquanto a execucao nao
+    termina o arquivo fica em '<caminho>.parcial'.
+    """
+
+    def __init__(self, caminho=ARQUIVO_JSON):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.arquivo  = open(caminho + ".parcial", "w", encoding="utf-8")
+        self.primeiro = True
+        self.arquivo.write("[\n")
+
+    def escrever(self, lote):
+        for lead in lote:
+            if not self.primeiro:
+                self.arquivo.write(",\n")
+            self.arquivo.write(json.dumps(preparar_linha(lead), ensure_ascii=False, indent=2))
+            self.primeiro = False
+        self.arquivo.flush()
+
+    def fechar(self):
+        self.arquivo.write("\n]\n")
+        self.arquivo.close()
+        os.replace(self.caminho + ".parcial", self.caminho)
+
+
+class DestinoJSONL:
+    """
+    Um lead por linha, util para encadear com outros comandos. Padrao:
+    ARQUIVO_JSONL. Para usar o stdout, passe sys.stdout e mande o progresso
+    para o stderr (como faz o '--jsonl' da execucao abaixo), senao os
+    prints do iter_leads se misturam com o JSONL.
+    """
+
+    def __init__(self, saida=ARQUIVO_JSONL):
+        self.proprio = isinstance(saida, str)
+        self.saida   = open(saida, "a", encoding="utf-8") if self.proprio else saida
+
+    def escrever(self, lote):
+        for lead in lote:
+            self.saida.write(json.dumps(preparar_linha(lead), ensure_ascii=False) + "\n")
+        self.saida.flush()
+
+    def fechar(self):
+        if self.proprio:
+            self.saida.close()
+
+# ================================================================
+# CADEIA
+# ================================================================
+
+class CadeiaDestinos:
+    """
+    Buffer limitado que repassa os leads para todos os destinos a cada
+    'tamanho_lote'. Falha em um destino nao impede os outros. Aceita o
+    dict do scraper ou um RegistroLead; o buffer guarda registros.
+    """
+
+    def __init__(self, destinos, tamanho_lote=TAMANHO_LOTE):
+        self.destinos     = destinos
+        self.tamanho_lote = tamanho_lote
+        self.buffer       = []
+        self.total        = 0
+
+    def adicionar(self, lead):
+        self.buffer.append(lead if isinstance(lead, RegistroLead) else RegistroLead.de_scraper(lead))
+        if len(self.buffer) >= self.tamanho_lote:
+            self.descarregar()
+
+    def descarregar(self):
+        if not self.buffer:
+            return
+        for d in self.destinos:
+            try:
+                d.escrever(self.buffer)
+            except Exception as e:
+                print(f"   ERRO destino {type(d).__name__}: {type(e).__name__}: {e}")
+                traceback.print_exc()
+        self.total += len(self.buffer)
+        self.buffer = []
+
+    def fechar(self):
+        self.descarregar()
+        for d in self.destinos:
+            try:
+                d.fechar()
+            except Exception as e:
+                print(f"   ERRO ao fechar {type(d).__name__}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+
+def processar_stream(leads, destinos, tamanho_lote=TAMANHO_LOTE):
+    """Consome qualquer iteravel de leads e devolve quantos foram gravados."""
+    with CadeiaDestinos(destinos, tamanho_lote) as cadeia:
+        for lead in leads:
+            cadeia.adicionar(lead)
+    return cadeia.total
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def _linha_dict(lead):
+    """Como era antes: cada destino copiava o dict do lead."""
+    wpp = formatar_whatsapp(lead.get("WhatsApp"))
+    linha = dict(lead)
+    linha["Link_WhatsApp"] = ("https://wa.me/" + wpp) if wpp else None
+    return linha
+
+
+def _pipeline_dicts(leads, caminho_csv, caminho_jsonl, tamanho_lote=TAMANHO_LOTE):
+    """
+    O caminho anterior, para comparar: lotes de dicts, o CSV e o JSONL
+    copiando o dict e o Firestore montando um RegistroLead por lead.
+    """
+    with open(caminho_csv, "w", encoding="utf-8-sig", newline="") as f_csv, \
+         open(caminho_jsonl, "w", encoding="utf-8") as f_jsonl:
+        writer = csv.DictWriter(f_csv, fieldnames=COLUNAS_CSV, extrasaction="ignore")
+        writer.writeheader()
+        vistos = set()
+        buffer = []
+
+        def descarregar():
+            novos = []
+            for lead in buffer:
+                link = lead.get("Google_Maps") or ""
+                pid  = extrair_place_id(link) if link else None
+                chave = pid if pid and pid.startswith("0x") else (link or gerar_id_doc(lead))
+                if chave not in vistos:
+                    vistos.add(chave)
+                    novos.append(lead)
+            writer.writerows(_linha_dict(l) for l in novos)
+            # o que ia para o gravar_lote; no benchmark nao vai para a rede
+            escritas = [("leads", gerar_id_doc(l), montar_doc_firebase(l)) for l in buffer]
+            for lead in buffer:
+                f_jsonl.write(json.dumps(_linha_dict(lead), ensure_ascii=False) + "\n")
+            buffer.clear()
+
+        for lead in leads:
+            buffer.append(lead)
+            if len(buffer) >= tamanho_lote:
+                descarregar()
+        descarregar()
+
+
+class _FirestoreSemRede(DestinoFirestore):
+    """Monta os documentos do lote sem mandar para o Firestore nem para o log."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def escrever(self, lote):
+        self.escritas(lote)
+
+
+def _limpar(arquivos):
+    for caminho in arquivos:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def benchmark(n=50000, pasta="bench_destinos"):
+    """Mesmos leads pelos destinos CSV + Firestore (sem rede) + JSONL, antes e depois."""
+    from pontuacao_leads import pontuar_lead
+    from registro_lead import _medir, _sintetico
+
+    os.makedirs(pasta, exist_ok=True)
+    leads = [_sintetico(i) for i in range(n)]
+    for lead in leads:
+        pontuar_lead(lead)   # traz as colunas Score_<feature>, como no iter_leads
+
+    antes  = [os.path.join(pasta, "antes.csv"), os.path.join(pasta, "antes.jsonl")]
+    depois = [os.path.join(pasta, "depois.csv"), os.path.join(pasta, "depois.jsonl")]
+    _, t_antes, _, m_antes = _medir(lambda: _pipeline_dicts(iter(leads), *antes), 3, lambda: _limpar(antes))
+
+    def registros():
+        destinos = [DestinoCSV(depois[0]), _FirestoreSemRede(), DestinoJSONL(depois[1])]
+        processar_stream(iter(leads), destinos)
+
+    _, t_depois, _, m_depois = _medir(registros, 3, lambda: _limpar(depois))
+    iguais, faltando = [], []
+    for a, b in zip(antes, depois):
+        with open(a, encoding="utf-8") as fa, open(b, encoding="utf-8") as fb:
+            la, lb = fa.read().splitlines(), fb.read().splitlines()
+        iguais.append(la == lb)
+        faltando.append(len(set(la) - set(lb)))
+
+    print(f"\nBENCHMARK DESTINOS ({n} leads, lotes de {TAMANHO_LOTE}, CSV + Firestore sem rede + JSONL):")
+    print(f"   Lotes de dicts:          {t_antes:6.2f}s  {t_antes/n*1e6:6.1f} us/lead  pico {m_antes/1024/1024:5.1f} MB")
+    print(f"   Lotes de RegistroLead:   {t_depois:6.2f}s  {t_depois/n*1e6:6.1f} us/lead  pico {m_depois/1024/1024:5.1f} MB")
+    print(f"   Saidas identicas: CSV={iguais[0]} JSONL={iguais[1]}")
+    if faltando[0]:
+        print(f"   CSV: {faltando[0]} linhas a menos (falsos positivos do filtro de Bloom, "
+              f"{faltando[0] / n:.3%} dos leads)")
+    for caminho in antes + depois:
+        os.remove(caminho)
+    os.rmdir(pasta)
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    NICHO     = "Clinica Odontologica"
+    CIDADE    = "Paragominas"
+    ESTADO    = "PA"
+    MAX_LEADS = 200
+
+    if "--benchmark" in sys.argv[1:]:
+        resto = [x for x in sys.argv[1:] if x != "--benchmark"]
+        benchmark(int(resto[0]) if resto else 50000)
+    elif "--jsonl" in sys.argv[1:]:
+        # stdout fica so com o JSONL; todo o resto (progresso, erros) vai para o stderr
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            total = processar_stream(iter_leads(NICHO, CIDADE, ESTADO, MAX_LEADS), [DestinoJSONL(stdout)])
+            print(f"\nFINALIZADO! {total} leads emitidos em JSONL.")
+    else:
+        db = init_firebase()
+        destinos = [DestinoCSV(), DestinoFirestore(db), DestinoJSON()]
+        total = processar_stream(iter_leads(NICHO, CIDADE, ESTADO, MAX_LEADS), destinos)
+        print(f"\nFINALIZADO! {total} leads gravados em streaming.")
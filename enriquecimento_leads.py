@@ -0,0 +1,47 @@
+"""
+ENRIQUECIMENTO DE LEADS
+Heuristicas puras de Notas/WebsiteQuality a partir do texto do site e do
+Instagram. Ficam fora do scraper para o pos-processamento em lote (e os
+processos filhos dele) poder usar sem importar Playwright/Firebase.
+
+Como rodar:
+    python enriquecimento_leads.py https://linktr.ee/x "Nao encontrado"
+"""
+
+import sys
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+SITES_RUINS = ["linktree", "linktr.ee", "bio.link", "meulink.com", "beacons.ai", "sites.google.com"]
+
+# ================================================================
+# HEURISTICAS
+# ================================================================
+
+def analisar_qualidade(site, instagram):
+    problemas = []
+    if site == "SEM SITE":
+        problemas.append("Sem site proprio")
+    elif "linktree" in site.lower() or "linktr.ee" in site.lower():
+        problemas.append("Usando Linktree ao inves de site")
+    if "nao encontrado" in instagram.lower():
+        problemas.append("Sem Instagram")
+    return "Oportunidade" if problemas else "Nao"
+
+
+def qualidade_site_campo(site):
+    if not site or site.upper() == "SEM SITE":
+        return "none"
+    if any(r in site.lower() for r in SITES_RUINS):
+        return "poor"
+    return "good"
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    site      = sys.argv[1] if len(sys.argv) > 1 else "SEM SITE"
+    instagram = sys.argv[2] if len(sys.argv) > 2 else "Nao encontrado"
+    print(f"Notas: {analisar_qualidade(site, instagram)} | WebsiteQuality: {qualidade_site_campo(site)}")
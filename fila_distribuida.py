@@ -0,0 +1,611 @@
+"""
+FILA DISTRIBUIDA DE JOBS
+Para rodar o scraper em varias maquinas/processos ao mesmo tempo. Cada
+job (nicho + cidade, ou nicho + tile) fica numa fila compartilhada; um
+worker pega o job com um lease (prazo de visibilidade), renova o lease
+com heartbeats enquanto trabalha e marca como concluido com o numero de
+leads. Se o worker morrer o lease expira e o job volta para a fila.
+Enfileirar um job igual a um pendente/em execucao nao duplica; igual a um
+ja concluido (ou falho) coloca ele de novo na fila. Os jobs de tile
+reservam os place ids num conjunto compartilhado pela fila antes de
+extrair, entao um lugar que aparece em dois tiles e extraido uma vez so.
+O conjunto e separado por nicho + cidade e a reserva vale por
+RESERVA_LUGARES_S: uma rodada nova depois disso extrai de novo.
+
+Backends:
+    sqlite:///fila_jobs.db   um host, varios processos (padrao)
+    redis://host:6379/0      varios hosts (precisa do pacote redis)
+    fake://nome              fakeredis em memoria (um por nome, no mesmo processo), para testes
+
+Como rodar:
+    python fila_distribuida.py enfileirar "Academias" Belém Ananindeua
+    python fila_distribuida.py enfileirar-tiles "Academias" Belém
+    python fila_distribuida.py worker
+    python fila_distribuida.py status
+    python fila_distribuida.py simular 4     # 4 processos, jobs falsos
+"""
+
+import hashlib, json, os, socket, sqlite3, sys, threading, time, traceback, uuid
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+FILA_URL         = os.environ.get("FILA_URL", "sqlite:///fila_jobs.db")
+VISIBILIDADE_S   = 10 * 60    # lease sem heartbeat por mais que isso expira
+HEARTBEAT_S      = 60
+TENTATIVAS_MAX   = 3
+JANELA_TAXA_S    = 60 * 60    # janela do leads/hora
+OCIOSO_MAX_S     = 5 * 60     # worker sai depois de tanto tempo sem job
+RESERVA_LUGARES_S = 24 * 60 * 60  # place id reservado por um job de tile
+
+# ================================================================
+# JOBS
+# ================================================================
+
+def id_job(payload):
+    """Id estavel do payload: o mesmo job enfileirado de novo cai no mesmo registro."""
+    txt = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(txt.encode(), digest_size=8).hexdigest()
+
+
+def escopo_lugares(payload):
+    """Conjunto de place ids reservados de um job: o mesmo nicho na mesma cidade."""
+    return f"{payload['nicho']}|{payload['cidade']}"
+
+
+def nome_worker():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:4]}"
+
+
+def _taxa(eventos, agora, janela):
+    """leads/hora a partir de [(ts, leads)] dentro da janela."""
+    if not eventos:
+        return 0.0
+    inicio = max(agora - janela, min(ts for ts, _ in eventos))
+    horas = max(agora - inicio, 60) / 3600
+    return round(sum(n for _, n in eventos) / horas, 1)
+
+# ================================================================
+# BACKEND SQLITE
+# ================================================================
+
+class FilaSQLite:
+    """Varios processos no mesmo host; cada operacao e uma transacao IMMEDIATE."""
+
+    def __init__(self, caminho="fila_jobs.db", tentativas_max=TENTATIVAS_MAX):
+        self.caminho = caminho
+        self.tentativas_max = tentativas_max
+        con = sqlite3.connect(self.caminho, timeout=30)
+        with con:
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY, payload TEXT NOT NULL,
+                    estado TEXT NOT NULL DEFAULT 'pendente',
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT, lease_ate REAL, criado REAL, concluido_em REAL,
+                    leads INTEGER, erro TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_estado ON jobs (estado, criado);
+                CREATE TABLE IF NOT EXISTS producao (ts REAL, worker TEXT, job TEXT, leads INTEGER);
+                CREATE TABLE IF NOT EXISTS reservas (
+                    escopo TEXT NOT NULL, place_id TEXT NOT NULL, job TEXT NOT NULL, ts REAL,
+                    PRIMARY KEY (escopo, place_id)
+                );
+            """)
+        con.close()
+
+    def _conexao(self):
+        con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        return _Transacao(con)
+
+    def enfileirar(self, payloads):
+        """Devolve quantos entraram (novos ou reabertos depois de concluidos/falhos)."""
+        agora = time.time()
+        with self._conexao() as con:
+            antes = con.total_changes
+            con.executemany(
+                "INSERT INTO jobs (id, payload, criado) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET estado = 'pendente', tentativas = 0, worker = NULL, "
+                "lease_ate = NULL, criado = excluded.criado, concluido_em = NULL, leads = NULL, erro = NULL "
+                "WHERE jobs.estado IN ('concluido', 'falhou')",
+                [(id_job(p), json.dumps(p, ensure_ascii=False), agora) for p in payloads],
+            )
+            return con.total_changes - antes
+
+    def reservar_lugares(self, place_ids, job_id, escopo="", ttl_s=RESERVA_LUGARES_S):
+        """
+        Marca os place ids como deste job no conjunto 'escopo' e devolve os
+        que ficaram com ele (novos, ja dele numa tentativa anterior, ou com
+        reserva de outro job mais velha que 'ttl_s').
+        """
+        meus = []
+        with self._conexao() as con:
+            agora = time.time()
+            for pid in place_ids:
+                con.execute(
+                    "INSERT INTO reservas VALUES (?, ?, ?, ?) ON CONFLICT (escopo, place_id) "
+                    "DO UPDATE SET job = excluded.job, ts = excluded.ts WHERE reservas.ts < ?",
+                    (escopo, pid, job_id, agora, agora - ttl_s),
+                )
+                dono = con.execute("SELECT job FROM reservas WHERE escopo = ? AND place_id = ?",
+                                   (escopo, pid)).fetchone()[0]
+                if dono == job_id:
+                    meus.append(pid)
+        return meus
+
+    def _reenfileirar_expirados(self, con, agora):
+        con.execute(
+            "UPDATE jobs SET estado = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END, "
+            "worker = NULL, lease_ate = NULL, erro = COALESCE(erro, 'lease expirado') "
+            "WHERE estado = 'em_execucao' AND lease_ate < ?",
+            (self.tentativas_max, agora),
+        )
+
+    def arrendar(self, worker, visibilidade_s=VISIBILIDADE_S):
+        agora = time.time()
+        with self._conexao() as con:
+            self._reenfileirar_expirados(con, agora)
+            linha = con.execute(
+                "SELECT id, payload, tentativas FROM jobs WHERE estado = 'pendente' ORDER BY criado LIMIT 1"
+            ).fetchone()
+            if linha is None:
+                return None
+            con.execute(
+                "UPDATE jobs SET estado = 'em_execucao', worker = ?, lease_ate = ?, tentativas = tentativas + 1 "
+                "WHERE id = ?", (worker, agora + visibilidade_s, linha[0]),
+            )
+            return {"id": linha[0], "payload": json.loads(linha[1]), "tentativa": linha[2] + 1}
+
+    def heartbeat(self, job_id, worker, visibilidade_s=VISIBILIDADE_S):
+        """Renova o lease; False se o job ja nao e deste worker."""
+        with self._conexao() as con:
+            cur = con.execute(
+                "UPDATE jobs SET lease_ate = ? WHERE id = ? AND worker = ? AND estado = 'em_execucao'",
+                (time.time() + visibilidade_s, job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def concluir(self, job_id, worker, leads):
+        agora = time.time()
+        with self._conexao() as con:
+            # a producao conta mesmo com lease perdido: os leads ja foram gravados
+            con.execute("INSERT INTO producao VALUES (?, ?, ?, ?)", (agora, worker, job_id, leads))
+            cur = con.execute(
+                "UPDATE jobs SET estado = 'concluido', concluido_em = ?, leads = ?, lease_ate = NULL, erro = NULL "
+                "WHERE id = ? AND worker = ? AND estado = 'em_execucao'",
+                (agora, leads, job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def falhar(self, job_id, worker, erro):
+        with self._conexao() as con:
+            cur = con.execute(
+                "UPDATE jobs SET estado = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END, "
+                "worker = NULL, lease_ate = NULL, erro = ? WHERE id = ? AND worker = ? AND estado = 'em_execucao'",
+                (self.tentativas_max, str(erro)[:500], job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def estatisticas(self, janela_s=JANELA_TAXA_S):
+        agora = time.time()
+        with self._conexao() as con:
+            self._reenfileirar_expirados(con, agora)
+            estados = dict(con.execute("SELECT estado, COUNT(*) FROM jobs GROUP BY estado").fetchall())
+            eventos = con.execute("SELECT ts, leads, worker FROM producao WHERE ts >= ?", (agora - janela_s,)).fetchall()
+        return _montar_estatisticas(estados, eventos, agora, janela_s)
+
+
+class _Transacao:
+    """Conexao sqlite usada como 'with': BEGIN IMMEDIATE / COMMIT / ROLLBACK e fecha."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __enter__(self):
+        self.con.execute("BEGIN IMMEDIATE")
+        return self.con
+
+    def __exit__(self, tipo, *_):
+        try:
+            self.con.execute("ROLLBACK" if tipo else "COMMIT")
+        finally:
+            self.con.close()
+
+
+def _montar_estatisticas(estados, eventos, agora, janela_s):
+    por_worker = {}
+    for _ts, n, w in eventos:
+        por_worker[w] = por_worker.get(w, 0) + n
+    return {
+        "pendentes":   estados.get("pendente", 0),
+        "emExecucao":  estados.get("em_execucao", 0),
+        "concluidos":  estados.get("concluido", 0),
+        "falhos":      estados.get("falhou", 0),
+        "workersAtivos": len(por_worker),
+        "leadsNaJanela": sum(n for _, n, _w in eventos),
+        "leadsPorHora":  _taxa([(ts, n) for ts, n, _w in eventos], agora, janela_s),
+        "leadsPorWorker": por_worker,
+    }
+
+# ================================================================
+# BACKEND REDIS
+# ================================================================
+
+class FilaRedis:
+    """
+    Varios hosts. Chaves (com 'prefixo'):
+        pendentes  lista de ids (entra a esquerda, sai a direita)
+        leases     zset id -> prazo do lease
+        job:<id>   hash com payload, estado, tentativas, worker, leads, erro
+        producao   zset 'job|worker|leads|ts' -> ts
+        lugares:<escopo>  hash place_id -> id do job que reservou (expira)
+    Mudancas de estado usam WATCH/MULTI, entao dois workers nunca pegam o
+    mesmo job e so um deles devolve um lease expirado para a fila.
+    """
+
+    def __init__(self, cliente, prefixo="clickfacil:fila", tentativas_max=TENTATIVAS_MAX):
+        self.r = cliente
+        self.p = prefixo
+        self.tentativas_max = tentativas_max
+
+    def _k(self, *partes):
+        return ":".join((self.p,) + partes)
+
+    def _transacao(self, chaves, funcao):
+        """Roda funcao(pipe) com WATCH em 'chaves', repetindo em conflito."""
+        from redis.exceptions import WatchError
+
+        with self.r.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*chaves)
+                    return funcao(pipe)
+                except WatchError:
+                    continue
+
+    def enfileirar(self, payloads):
+        """Devolve quantos entraram (novos ou reabertos depois de concluidos/falhos)."""
+        novos = 0
+        for p in payloads:
+            jid = id_job(p)
+
+            def colocar(pipe):
+                estado = pipe.hget(self._k("job", jid), "estado")
+                estado = estado.decode() if isinstance(estado, bytes) else estado
+                if estado in ("pendente", "em_execucao"):
+                    pipe.unwatch()
+                    return 0
+                pipe.multi()
+                pipe.hset(self._k("job", jid), mapping={
+                    "payload": json.dumps(p, ensure_ascii=False), "estado": "pendente",
+                    "tentativas": 0, "worker": "", "erro": "",
+                })
+                pipe.lpush(self._k("pendentes"), jid)
+                pipe.execute()
+                return 1
+
+            novos += self._transacao([self._k("job", jid)], colocar)
+        return novos
+
+    def reservar_lugares(self, place_ids, job_id, escopo="", ttl_s=RESERVA_LUGARES_S):
+        """
+        Mesmo contrato do FilaSQLite.reservar_lugares (HSETNX place_id -> job).
+        O prazo vale para o hash inteiro e renova a cada reserva.
+        """
+        place_ids = list(place_ids)
+        if not place_ids:
+            return []
+        chave = self._k("lugares", escopo)
+        pipe = self.r.pipeline(transaction=False)
+        for pid in place_ids:
+            pipe.hsetnx(chave, pid, job_id)
+        pipe.expire(chave, int(ttl_s))
+        pipe.hmget(chave, place_ids)
+        *_, donos = pipe.execute()
+        return [pid for pid, d in zip(place_ids, donos)
+                if (d.decode() if isinstance(d, bytes) else d) == job_id]
+
+    def _reenfileirar_expirados(self, agora):
+        for jid in self.r.zrangebyscore(self._k("leases"), 0, agora):
+            jid = jid.decode() if isinstance(jid, bytes) else jid
+
+            def devolver(pipe):
+                prazo = pipe.zscore(self._k("leases"), jid)
+                if prazo is None or prazo >= agora:
+                    pipe.unwatch()
+                    return
+                tent = int(pipe.hget(self._k("job", jid), "tentativas") or 0)
+                pipe.multi()
+                pipe.zrem(self._k("leases"), jid)
+                if tent >= self.tentativas_max:
+                    pipe.hset(self._k("job", jid), mapping={"estado": "falhou", "worker": "", "erro": "lease expirado"})
+                else:
+                    pipe.hset(self._k("job", jid), mapping={"estado": "pendente", "worker": ""})
+                    pipe.rpush(self._k("pendentes"), jid)
+                pipe.execute()
+
+            self._transacao([self._k("leases"), self._k("job", jid)], devolver)
+
+    def arrendar(self, worker, visibilidade_s=VISIBILIDADE_S):
+        agora = time.time()
+        self._reenfileirar_expirados(agora)
+
+        def pegar(pipe):
+            jid = pipe.lindex(self._k("pendentes"), -1)
+            if jid is None:
+                pipe.unwatch()
+                return None
+            jid = jid.decode() if isinstance(jid, bytes) else jid
+            dados = pipe.hgetall(self._k("job", jid))
+            dados = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                     for k, v in dados.items()}
+            pipe.multi()
+            pipe.rpop(self._k("pendentes"))
+            pipe.zadd(self._k("leases"), {jid: agora + visibilidade_s})
+            pipe.hset(self._k("job", jid), mapping={"estado": "em_execucao", "worker": worker})
+            pipe.hincrby(self._k("job", jid), "tentativas", 1)
+            pipe.execute()
+            return {"id": jid, "payload": json.loads(dados["payload"]), "tentativa": int(dados.get("tentativas", 0)) + 1}
+
+        return self._transacao([self._k("pendentes")], pegar)
+
+    def _dono(self, pipe, jid, worker):
+        atual = pipe.hget(self._k("job", jid), "worker")
+        atual = atual.decode() if isinstance(atual, bytes) else atual
+        return atual == worker and pipe.zscore(self._k("leases"), jid) is not None
+
+    def heartbeat(self, job_id, worker, visibilidade_s=VISIBILIDADE_S):
+        def renovar(pipe):
+            if not self._dono(pipe, job_id, worker):
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.zadd(self._k("leases"), {job_id: time.time() + visibilidade_s})
+            pipe.execute()
+            return True
+
+        return self._transacao([self._k("job", job_id), self._k("leases")], renovar)
+
+    def concluir(self, job_id, worker, leads):
+        agora = time.time()
+        self.r.zadd(self._k("producao"), {f"{job_id}|{worker}|{leads}|{agora}": agora})
+
+        def fechar(pipe):
+            if not self._dono(pipe, job_id, worker):
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.zrem(self._k("leases"), job_id)
+            pipe.hset(self._k("job", job_id), mapping={
+                "estado": "concluido", "leads": leads, "concluido_em": agora, "erro": "",
+            })
+            pipe.execute()
+            return True
+
+        return self._transacao([self._k("job", job_id), self._k("leases")], fechar)
+
+    def falhar(self, job_id, worker, erro):
+        def devolver(pipe):
+            if not self._dono(pipe, job_id, worker):
+                pipe.unwatch()
+                return False
+            tent = int(pipe.hget(self._k("job", job_id), "tentativas") or 0)
+            pipe.multi()
+            pipe.zrem(self._k("leases"), job_id)
+            if tent >= self.tentativas_max:
+                pipe.hset(self._k("job", job_id), mapping={"estado": "falhou", "worker": "", "erro": str(erro)[:500]})
+            else:
+                pipe.hset(self._k("job", job_id), mapping={"estado": "pendente", "worker": "", "erro": str(erro)[:500]})
+                pipe.rpush(self._k("pendentes"), job_id)
+            pipe.execute()
+            return True
+
+        return self._transacao([self._k("job", job_id), self._k("leases")], devolver)
+
+    def estatisticas(self, janela_s=JANELA_TAXA_S):
+        agora = time.time()
+        self._reenfileirar_expirados(agora)
+        estados = {}
+        for chave in self.r.scan_iter(match=self._k("job", "*")):
+            e = self.r.hget(chave, "estado")
+            e = e.decode() if isinstance(e, bytes) else e
+            estados[e] = estados.get(e, 0) + 1
+        eventos = []
+        for m in self.r.zrangebyscore(self._k("producao"), agora - janela_s, agora):
+            m = m.decode() if isinstance(m, bytes) else m
+            _jid, w, n, ts = m.rsplit("|", 3)
+            eventos.append((float(ts), int(n), w))
+        self.r.zremrangebyscore(self._k("producao"), 0, agora - 24 * 3600)
+        return _montar_estatisticas(estados, eventos, agora, janela_s)
+
+# ================================================================
+# CONEXAO
+# ================================================================
+
+_SERVIDORES_FAKE = {}
+
+
+def conectar(url=FILA_URL):
+    if url.startswith("sqlite:///"):
+        return FilaSQLite(url[len("sqlite:///"):])
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        import redis
+
+        return FilaRedis(redis.Redis.from_url(url))
+    if url.startswith("fake://"):
+        import fakeredis
+
+        # o mesmo servidor por url: workers (threads) do mesmo processo dividem a fila
+        servidor = _SERVIDORES_FAKE.setdefault(url, fakeredis.FakeServer())
+        return FilaRedis(fakeredis.FakeRedis(server=servidor))
+    raise ValueError(f"FILA_URL nao suportada: {url}")
+
+# ================================================================
+# WORKER
+# ================================================================
+
+def executar_job(payload, db=None, governador=None, fila=None, job_id=None):
+    """
+    Roda um job do scraper e devolve quantos leads saiu. Job de tile com
+    'fila' so extrai os lugares que reservar_lugares deixou com ele.
+    """
+    if payload.get("tipo") == "tile":
+        from busca_por_tiles import buscar_por_tiles, extrair_lugares
+
+        # busca so o tile arrendado: gerar a grade de novo sobre ele criaria
+        # tiles finos na borda que repetem a busca dos vizinhos
+        tile = {"bbox": tuple(payload["tile"]["bbox"]), "zoom": payload["tile"]["zoom"]}
+        lugares, _ = buscar_por_tiles(payload["nicho"], payload["cidade"], tiles=[tile],
+                                      navegadores=1, governador=governador)
+        if fila is not None and job_id is not None:
+            meus = set(fila.reservar_lugares(list(lugares), job_id, escopo_lugares(payload)))
+            if len(meus) < len(lugares):
+                print(f"   {len(lugares) - len(meus)} lugares ja extraidos por outros jobs, pulando.")
+            lugares = {pid: link for pid, link in lugares.items() if pid in meus}
+        return len(extrair_lugares(lugares, payload["nicho"], payload["cidade"], db, navegadores=1, governador=governador))
+
+    from scraper_firebase_direto import iniciar_prospeccao
+
+    leads = iniciar_prospeccao(payload["nicho"], payload["cidade"], payload.get("estado", "PA"),
+                               payload.get("max_leads", 20), db, governador=governador)
+    return len(leads)
+
+
+def executar_worker(fila, trabalho=None, worker=None, visibilidade_s=VISIBILIDADE_S,
+                    heartbeat_s=HEARTBEAT_S, ocioso_max_s=OCIOSO_MAX_S, max_jobs=None):
+    """
+    Pega jobs ate a fila ficar vazia por 'ocioso_max_s'. 'trabalho(payload)'
+    devolve o numero de leads (padrao: executar_job com o Firestore).
+    Um thread renova o lease a cada 'heartbeat_s' enquanto o job roda.
+    """
+    worker = worker or nome_worker()
+    if trabalho is None:
+        from scraper_firebase_direto import init_firebase
+
+        db = init_firebase()
+
+        def trabalho(payload):
+            # 'job' e o job atual do loop abaixo
+            return executar_job(payload, db, fila=fila, job_id=job["id"])
+
+    print(f"Worker {worker} pronto ({type(fila).__name__}).")
+    feitos = 0
+    ocioso_desde = time.monotonic()
+    while max_jobs is None or feitos < max_jobs:
+        job = fila.arrendar(worker, visibilidade_s)
+        if job is None:
+            if time.monotonic() - ocioso_desde > ocioso_max_s:
+                break
+            time.sleep(min(5, heartbeat_s))
+            continue
+
+        print(f"   Job {job['id']} (tentativa {job['tentativa']}): {job['payload']}")
+        parar = threading.Event()
+        perdeu = threading.Event()
+
+        def batimentos():
+            while not parar.wait(heartbeat_s):
+                if not fila.heartbeat(job["id"], worker, visibilidade_s):
+                    perdeu.set()
+                    print(f"   Lease do job {job['id']} perdido.")
+                    return
+
+        t = threading.Thread(target=batimentos, daemon=True)
+        t.start()
+        try:
+            leads = trabalho(job["payload"])
+            parar.set()
+            t.join()
+            fila.concluir(job["id"], worker, leads)
+            print(f"   Job {job['id']} concluido: {leads} leads")
+        except Exception as e:
+            parar.set()
+            t.join()
+            traceback.print_exc()
+            fila.falhar(job["id"], worker, f"{type(e).__name__}: {e}")
+        feitos += 1
+        ocioso_desde = time.monotonic()
+    print(f"Worker {worker} saindo ({feitos} jobs).")
+    return feitos
+
+
+def imprimir_status(est):
+    print("\nFILA:")
+    print(f"   Pendentes:      {est['pendentes']}")
+    print(f"   Em execucao:    {est['emExecucao']}")
+    print(f"   Concluidos:     {est['concluidos']}")
+    print(f"   Falhos:         {est['falhos']}")
+    print(f"   Workers ativos: {est['workersAtivos']} (ultima hora)")
+    print(f"   Leads/hora:     {est['leadsPorHora']} (cluster)\n")
+
+# ================================================================
+# SIMULACAO
+# ================================================================
+
+def _trabalho_falso(payload):
+    time.sleep(payload.get("segundos", 0.2))
+    return payload.get("leads", 10)
+
+
+def _processo_simulado(url, morrer):
+    fila = conectar(url)
+    if morrer:
+        # pega um job e "morre" sem concluir: o lease tem que expirar
+        job = fila.arrendar("morto", visibilidade_s=1)
+        print(f"   Worker morto segurando {job['id'] if job else None}")
+        os._exit(0)
+    executar_worker(fila, _trabalho_falso, visibilidade_s=1, heartbeat_s=0.3, ocioso_max_s=3)
+
+
+def simular(processos=4, jobs=40, url="sqlite:///fila_simulacao.db"):
+    import multiprocessing
+
+    caminho = url[len("sqlite:///"):] if url.startswith("sqlite:///") else None
+    if caminho:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.remove(caminho + sufixo)
+    fila = conectar(url)
+    fila.enfileirar([{"nicho": "teste", "n": i, "segundos": 0.2, "leads": 10} for i in range(jobs)])
+
+    inicio = time.time()
+    morto = multiprocessing.Process(target=_processo_simulado, args=(url, True))
+    morto.start()
+    morto.join()
+    ps = [multiprocessing.Process(target=_processo_simulado, args=(url, False)) for _ in range(processos)]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join()
+    est = fila.estatisticas()
+    imprimir_status(est)
+    print(f"   Tempo: {time.time() - inicio:.1f}s, leads por worker: {est['leadsPorWorker']}")
+    if caminho:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.remove(caminho + sufixo)
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if comando == "simular":
+        simular(int(sys.argv[2]) if len(sys.argv) > 2 else 4)
+    elif comando == "worker":
+        executar_worker(conectar())
+    elif comando == "enfileirar":
+        nicho, cidades = sys.argv[2], sys.argv[3:] or ["Belém"]
+        n = conectar().enfileirar([{"nicho": nicho, "cidade": c, "estado": "PA", "max_leads": 20} for c in cidades])
+        print(f"{n} jobs novos na fila.")
+    elif comando == "enfileirar-tiles":
+        from busca_por_tiles import BBOX_CIDADES, ZOOM_PADRAO, gerar_tiles
+
+        nicho, cidade = sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "Belém"
+        tiles = gerar_tiles(BBOX_CIDADES[cidade], ZOOM_PADRAO)
+        n = conectar().enfileirar([{"tipo": "tile", "nicho": nicho, "cidade": cidade, "tile": t} for t in tiles])
+        print(f"{n} jobs novos na fila ({len(tiles)} tiles).")
+    else:
+        imprimir_status(conectar().estatisticas())
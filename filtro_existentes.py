@@ -0,0 +1,185 @@
+"""
+FILTRO DE LEADS EXISTENTES
+Antes de abrir o navegador, baixa so os ids dos documentos da colecao
+'leads' do territorio (sem os campos) e guarda num filtro de Bloom
+compacto. O scraper consulta o filtro pelo nome do card e pula empresas
+que ja estao no Firestore sem gastar tempo clicando nelas. O filtro fica
+salvo em disco e nas proximas execucoes so os documentos escritos desde
+o ultimo 'updatedAt' visto (relogio do servidor) sao lidos.
+
+Como rodar:
+    python filtro_existentes.py Paragominas
+"""
+
+import hashlib, json, math, os, re, sys, time
+from datetime import datetime, timezone
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+PASTA_FILTROS    = "filtros"
+CAPACIDADE_MIN   = 10000
+TAXA_FALSO_POS   = 0.001
+
+# ================================================================
+# FILTRO DE BLOOM
+# ================================================================
+
+class FiltroBloom:
+    """Filtro de Bloom com hash duplo (blake2b) sobre um bytearray."""
+
+    def __init__(self, capacidade=CAPACIDADE_MIN, taxa_erro=TAXA_FALSO_POS):
+        self.capacidade = capacidade
+        self.taxa_erro  = taxa_erro
+        self.m = max(8, int(-capacidade * math.log(taxa_erro) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacidade * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.n = 0
+
+    def _posicoes(self, chave):
+        d  = hashlib.blake2b(chave.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, chave):
+        novo = False
+        for p in self._posicoes(chave):
+            byte, bit = p >> 3, 1 << (p & 7)
+            if not self.bits[byte] & bit:
+                self.bits[byte] |= bit
+                novo = True
+        if novo:
+            self.n += 1
+
+    def __contains__(self, chave):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(chave))
+
+    def __len__(self):
+        return self.n
+
+    def cheio(self):
+        return self.n >= self.capacidade
+
+    def salvar(self, caminho, meta=None):
+        cabecalho = {
+            "capacidade": self.capacidade,
+            "taxa_erro":  self.taxa_erro,
+            "n":          self.n,
+            **(meta or {}),
+        }
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        tmp = caminho + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(cabecalho).encode("utf-8") + b"\n")
+            f.write(self.bits)
+        os.replace(tmp, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Devolve (filtro, meta) ou (None, {}) se nao houver arquivo valido."""
+        if not os.path.exists(caminho):
+            return None, {}
+        try:
+            with open(caminho, "rb") as f:
+                cabecalho = json.loads(f.readline())
+                bits = f.read()
+            filtro = cls(cabecalho["capacidade"], cabecalho["taxa_erro"])
+            if len(bits) != len(filtro.bits):
+                raise ValueError("tamanho do filtro nao confere")
+            filtro.bits = bytearray(bits)
+            filtro.n    = cabecalho["n"]
+            return filtro, cabecalho
+        except Exception as e:
+            print(f"AVISO: filtro '{caminho}' invalido ({e}), reconstruindo.")
+            return None, {}
+
+# ================================================================
+# FIRESTORE
+# ================================================================
+
+def caminho_filtro(territorio):
+    return os.path.join(PASTA_FILTROS, "leads_" + re.sub(r"[^a-z0-9]", "", territorio.lower()) + ".bloom")
+
+
+def stream_ids(db, territorio, desde=None):
+    """
+    Le so os ids (e o 'updatedAt', para o marco) dos leads do territorio.
+    'updatedAt' e gravado em toda escrita; o 'createdAt' nao serve porque
+    o set com merge tambem o sobrescreve.
+    """
+    q = db.collection("leads").where("territory", "==", territorio)
+    if desde is not None:
+        # requer indice composto (territory, updatedAt)
+        q = q.where("updatedAt", ">=", desde)
+    for snap in q.select(["updatedAt"]).stream():
+        yield snap.id, (snap.to_dict() or {}).get("updatedAt")
+
+
+def _mais_recente(marco, atualizado):
+    """Marco em epoch segundos, sempre do relogio do servidor (updatedAt)."""
+    if atualizado is None or not hasattr(atualizado, "timestamp"):
+        return marco
+    ts = atualizado.timestamp()
+    return ts if marco is None or ts > marco else marco
+
+
+def atualizar_filtro(db, territorio, capacidade=CAPACIDADE_MIN):
+    """
+    Carrega o filtro salvo e acrescenta so os ids escritos desde a ultima
+    atualizacao. Sem filtro salvo (ou cheio) faz a leitura completa; se o
+    filtro encher no meio da leitura, recomeca com o dobro da capacidade
+    quantas vezes for preciso.
+    """
+    caminho = caminho_filtro(territorio)
+    filtro, meta = FiltroBloom.carregar(caminho)
+    inicio = time.time()
+
+    desde = None
+    if filtro is not None and not filtro.cheio() and meta.get("atualizadoEm"):
+        desde = datetime.fromtimestamp(meta["atualizadoEm"], tz=timezone.utc)
+    else:
+        if filtro is not None:
+            capacidade = max(capacidade, filtro.capacidade * 2)
+        filtro = FiltroBloom(capacidade)
+
+    marco = meta.get("atualizadoEm") if desde is not None else None
+    lidos = 0
+    while True:
+        for doc_id, atualizado in stream_ids(db, territorio, desde):
+            filtro.add(doc_id)
+            lidos += 1
+            marco = _mais_recente(marco, atualizado)
+            if filtro.cheio():
+                break
+        else:
+            break
+        print("   Filtro cheio, reconstruindo com o dobro da capacidade.")
+        filtro = FiltroBloom(filtro.capacidade * 2)
+        desde = marco = None
+
+    filtro.salvar(caminho, {"territorio": territorio, "atualizadoEm": marco})
+    modo = "incremental" if desde else "completa"
+    print(f"Filtro '{territorio}': leitura {modo}, {lidos} ids lidos, "
+          f"{len(filtro)} no filtro ({time.time() - inicio:.1f}s)")
+    return filtro
+
+
+def salvar_filtro(filtro, territorio):
+    """Persiste o filtro apos a execucao, mantendo o marco da ultima leitura."""
+    caminho = caminho_filtro(territorio)
+    _, meta = FiltroBloom.carregar(caminho)
+    filtro.salvar(caminho, {"territorio": territorio, "atualizadoEm": meta.get("atualizadoEm")})
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    from scraper_firebase_direto import init_firebase
+
+    territorio = sys.argv[1] if len(sys.argv) > 1 else "Paragominas"
+    db = init_firebase()
+    if db is None:
+        sys.exit(1)
+    atualizar_filtro(db, territorio)
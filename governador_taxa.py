@@ -0,0 +1,264 @@
+"""
+GOVERNADOR DE TAXA (AIMD)
+Controla, para todos os workers ao mesmo tempo, quantas abas trabalham
+em paralelo e quantas requisicoes por segundo saem. Cresce devagar
+(aditivo) enquanto tudo vai bem e corta pela metade (multiplicativo) em
+sinal de throttling: pagina de captcha/"trafego incomum" pausa todos os
+workers, e um pico de timeouts de wait_for_selector reduz o ritmo. Assim
+o scraper roda perto da maior taxa que o Google aguenta sem bloquear.
+
+Como rodar (simulacao com servidor local que bloqueia acima de N req/s):
+    python governador_taxa.py 8
+"""
+
+import collections, contextlib, sys, threading, time
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+CONCORRENCIA_INICIAL = 2
+CONCORRENCIA_MAXIMA  = 8
+TAXA_INICIAL         = 0.5    # requisicoes/s
+TAXA_MINIMA          = 0.05
+TAXA_MAXIMA          = 5.0
+PASSO_TAXA           = 0.05   # aumento aditivo a cada janela limpa
+SUCESSOS_POR_PASSO   = 10
+FATOR_CORTE          = 0.5
+JANELA_TIMEOUTS_S    = 60
+LIMIAR_TIMEOUTS      = 3      # timeouts na janela que contam como throttling
+PAUSA_BLOQUEIO_S     = 60
+PAUSA_MAXIMA_S       = 15 * 60
+
+TEXTOS_BLOQUEIO = [
+    "trafego incomum", "tráfego incomum", "unusual traffic",
+    "nao sou um robo", "não sou um robô", "i'm not a robot",
+]
+
+# ================================================================
+# DETECCAO
+# ================================================================
+
+def detectar_bloqueio(page):
+    """True se a pagina atual e o interstitial/captcha do Google."""
+    try:
+        if "/sorry/" in page.url or "recaptcha" in page.url:
+            return True
+        estado = page.evaluate("""() => ({
+            texto: (document.body ? document.body.innerText : "").slice(0, 3000).toLowerCase(),
+            captcha: !!document.querySelector('iframe[src*="recaptcha"], #captcha-form')
+        })""")
+        return estado["captcha"] or any(t in estado["texto"] for t in TEXTOS_BLOQUEIO)
+    except Exception:
+        return False
+
+# ================================================================
+# GOVERNADOR
+# ================================================================
+
+class GovernadorTaxa:
+    """
+    Compartilhado entre threads. Uso:
+
+        with governador.vaga():
+            ... uma requisicao / um lead ...
+        governador.sucesso() | governador.falha(page) | governador.bloqueio()
+    """
+
+    def __init__(self, concorrencia=CONCORRENCIA_INICIAL, taxa=TAXA_INICIAL,
+                 concorrencia_maxima=CONCORRENCIA_MAXIMA, taxa_maxima=TAXA_MAXIMA,
+                 passo_taxa=PASSO_TAXA, pausa_bloqueio=PAUSA_BLOQUEIO_S):
+        self.cond          = threading.Condition()
+        self.limite        = concorrencia
+        self.limite_max    = concorrencia_maxima
+        self.taxa          = taxa
+        self.taxa_max      = taxa_maxima
+        self.passo_taxa    = passo_taxa
+        self.pausa_base    = pausa_bloqueio
+        self.ativos        = 0
+        self.proxima_saida = 0.0
+        self.pausado_ate   = 0.0
+        self.pausa_atual   = pausa_bloqueio
+        self.sucessos      = 0
+        self.timeouts      = collections.deque()
+        self.contagem      = collections.Counter()
+
+    # ------------------------------------------------------------
+    # entrada
+    # ------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def vaga(self):
+        self.adquirir()
+        try:
+            yield
+        finally:
+            self.liberar()
+
+    def adquirir(self):
+        with self.cond:
+            while True:
+                agora = time.monotonic()
+                if agora < self.pausado_ate:
+                    self.cond.wait(self.pausado_ate - agora)
+                    continue
+                if self.ativos >= self.limite:
+                    self.cond.wait(1.0)
+                    continue
+                if agora < self.proxima_saida:
+                    self.cond.wait(self.proxima_saida - agora)
+                    continue
+                self.ativos += 1
+                self.proxima_saida = agora + 1.0 / self.taxa
+                return
+
+    def liberar(self):
+        with self.cond:
+            self.ativos -= 1
+            self.cond.notify_all()
+
+    # ------------------------------------------------------------
+    # sinais
+    # ------------------------------------------------------------
+
+    def sucesso(self):
+        with self.cond:
+            self.contagem["sucesso"] += 1
+            self.sucessos += 1
+            self.pausa_atual = self.pausa_base
+            if self.sucessos >= SUCESSOS_POR_PASSO:
+                self.sucessos = 0
+                self.taxa   = min(self.taxa_max, self.taxa + self.passo_taxa)
+                self.limite = min(self.limite_max, self.limite + 1)
+                self.cond.notify_all()
+
+    def timeout(self):
+        with self.cond:
+            self.contagem["timeout"] += 1
+            agora = time.monotonic()
+            self.timeouts.append(agora)
+            while self.timeouts and agora - self.timeouts[0] > JANELA_TIMEOUTS_S:
+                self.timeouts.popleft()
+            if len(self.timeouts) >= LIMIAR_TIMEOUTS:
+                self.timeouts.clear()
+                self._cortar("pico de timeouts")
+
+    def bloqueio(self):
+        with self.cond:
+            self.contagem["bloqueio"] += 1
+            if time.monotonic() < self.pausado_ate:
+                # resposta de uma requisicao que saiu antes do corte
+                return
+            self._cortar("captcha/bloqueio")
+            self.pausado_ate = time.monotonic() + self.pausa_atual
+            print(f"   GOVERNADOR: pausa global de {self.pausa_atual:.0f}s")
+            self.pausa_atual = min(PAUSA_MAXIMA_S, self.pausa_atual * 2)
+
+    def falha(self, page):
+        """Classifica uma falha olhando a pagina: bloqueio ou timeout comum."""
+        if detectar_bloqueio(page):
+            self.bloqueio()
+        else:
+            self.timeout()
+
+    def _cortar(self, motivo):
+        self.sucessos = 0
+        self.taxa   = max(TAXA_MINIMA, self.taxa * FATOR_CORTE)
+        self.limite = max(1, int(self.limite * FATOR_CORTE))
+        # a proxima saida respeita a taxa nova imediatamente
+        self.proxima_saida = time.monotonic() + 1.0 / self.taxa
+        print(f"   GOVERNADOR: {motivo} -> {self.taxa:.2f} req/s, {self.limite} abas")
+
+    def estado(self):
+        with self.cond:
+            return {
+                "taxa":       round(self.taxa, 3),
+                "limite":     self.limite,
+                "ativos":     self.ativos,
+                "pausado":    max(0.0, round(self.pausado_ate - time.monotonic(), 1)),
+                **self.contagem,
+            }
+
+# ================================================================
+# SIMULACAO COM SERVIDOR LOCAL
+# ================================================================
+
+def servidor_simulado(limite_rps, penalidade_s=5):
+    """
+    Sobe um servidor HTTP local que responde 200 ate 'limite_rps' e,
+    acima disso, passa 'penalidade_s' devolvendo a pagina de trafego
+    incomum (429). Devolve (servidor, url).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    lock = threading.Lock()
+    janela = collections.deque()
+    bloqueado_ate = [0.0]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            agora = time.monotonic()
+            with lock:
+                janela.append(agora)
+                while janela and agora - janela[0] > 1.0:
+                    janela.popleft()
+                if len(janela) > limite_rps:
+                    bloqueado_ate[0] = agora + penalidade_s
+                bloqueado = agora < bloqueado_ate[0]
+            corpo = (b"<html>Our systems have detected unusual traffic</html>" if bloqueado
+                     else b"<html><div role='article'>ok</div></html>")
+            self.send_response(429 if bloqueado else 200)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/"
+
+
+def simular(limite_rps=8, segundos=60, workers=CONCORRENCIA_MAXIMA):
+    import urllib.error, urllib.request
+
+    srv, url = servidor_simulado(limite_rps, penalidade_s=3)
+    # na simulacao passos e pausas sao menores para caber no tempo do teste
+    gov = GovernadorTaxa(taxa=1.0, taxa_maxima=limite_rps * 3,
+                         passo_taxa=limite_rps / 20, pausa_bloqueio=3)
+    fim = time.monotonic() + segundos
+    ok_por_segundo = collections.Counter()
+    inicio = time.monotonic()
+
+    def worker():
+        while time.monotonic() < fim:
+            with gov.vaga():
+                try:
+                    urllib.request.urlopen(url, timeout=5).read()
+                    ok_por_segundo[int(time.monotonic() - inicio)] += 1
+                    sinal = gov.sucesso
+                except urllib.error.HTTPError as e:
+                    sinal = gov.bloqueio if e.code == 429 else gov.timeout
+                except Exception:
+                    sinal = gov.timeout
+            sinal()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    srv.shutdown()
+
+    total = sum(ok_por_segundo.values())
+    print(f"\nSIMULACAO ({segundos}s, limite do servidor {limite_rps} req/s):")
+    print(f"   Sucessos:       {total} ({total/segundos:.2f} req/s, {total/segundos/limite_rps*100:.0f}% do limite)")
+    print(f"   Estado final:   {gov.estado()}")
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    limite = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    simular(limite)
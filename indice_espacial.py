@@ -0,0 +1,242 @@
+"""
+INDICE ESPACIAL DE LEADS
+Grade uniforme (lat/lng em celulas) sobre as coordenadas dos leads, para
+consultas rapidas por raio e por retangulo e para montar rotas de visita
+de vendas em campo (vizinho mais proximo a partir de um ponto de saida).
+As coordenadas vem das colunas Latitude/Longitude ou, em dados antigos,
+do pin ('!3d..!4d..') do link do Google Maps.
+
+Como rodar:
+    python indice_espacial.py                 # benchmark com 1M pontos
+    python indice_espacial.py leads_belem.csv # rota a partir do 1o lead
+"""
+
+import math, sys, time
+from array import array
+from collections import defaultdict
+
+from links_maps import extrair_coordenadas
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+TAMANHO_CELULA_GRAUS = 0.005   # ~550 m no equador
+METROS_POR_GRAU      = 6371000 * math.pi / 180
+
+# ================================================================
+# GEOMETRIA
+# ================================================================
+
+def distancia_m(lat1, lng1, lat2, lng2):
+    """Haversine em metros."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+def coordenadas_do_lead(lead):
+    lat, lng = lead.get("Latitude"), lead.get("Longitude")
+    try:
+        lat, lng = float(lat), float(lng)
+        if not (math.isnan(lat) or math.isnan(lng)):
+            return lat, lng
+    except (TypeError, ValueError):
+        pass
+    return extrair_coordenadas(lead.get("Google_Maps"), aceitar_viewport=False)
+
+# ================================================================
+# INDICE
+# ================================================================
+
+class IndiceGrade:
+    """
+    Pontos guardados em arrays compactos; cada celula da grade guarda so
+    os indices dos pontos. 'ids[i]' devolve o identificador do ponto i.
+    """
+
+    def __init__(self, tamanho_celula=TAMANHO_CELULA_GRAUS):
+        self.tam     = tamanho_celula
+        self.lats    = array("d")
+        self.lngs    = array("d")
+        self.ids     = []
+        self.celulas = defaultdict(lambda: array("l"))
+        self.extensao = None   # (x_min, y_min, x_max, y_max) das celulas ocupadas
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _celula(self, lat, lng):
+        return math.floor(lat / self.tam), math.floor(lng / self.tam)
+
+    def inserir(self, ident, lat, lng):
+        i = len(self.ids)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self.ids.append(ident)
+        x, y = self._celula(lat, lng)
+        self.celulas[(x, y)].append(i)
+        e = self.extensao
+        self.extensao = (x, y, x, y) if e is None else (min(e[0], x), min(e[1], y), max(e[2], x), max(e[3], y))
+        return i
+
+    @classmethod
+    def de_leads(cls, leads, chave="Empresa", tamanho_celula=TAMANHO_CELULA_GRAUS):
+        idx = cls(tamanho_celula)
+        sem = 0
+        for n, lead in enumerate(leads):
+            lat, lng = coordenadas_do_lead(lead)
+            if lat is None:
+                sem += 1
+                continue
+            idx.inserir(lead.get(chave, n), lat, lng)
+        if sem:
+            print(f"   Indice espacial: {sem} leads sem coordenadas ignorados.")
+        return idx
+
+    # ------------------------------------------------------------
+    # consultas
+    # ------------------------------------------------------------
+
+    def caixa(self, lat_min, lng_min, lat_max, lng_max):
+        """Indices dos pontos dentro do retangulo."""
+        c0 = self._celula(lat_min, lng_min)
+        c1 = self._celula(lat_max, lng_max)
+        lats, lngs = self.lats, self.lngs
+        res = []
+        for cx in range(c0[0], c1[0] + 1):
+            for cy in range(c0[1], c1[1] + 1):
+                for i in self.celulas.get((cx, cy), ()):
+                    if lat_min <= lats[i] <= lat_max and lng_min <= lngs[i] <= lng_max:
+                        res.append(i)
+        return res
+
+    def raio(self, lat, lng, metros):
+        """Lista de (distancia_m, indice) dentro do raio, ordenada."""
+        dlat = metros / METROS_POR_GRAU
+        dlng = metros / (METROS_POR_GRAU * max(math.cos(math.radians(lat)), 1e-6))
+        res = []
+        for i in self.caixa(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            d = distancia_m(lat, lng, self.lats[i], self.lngs[i])
+            if d <= metros:
+                res.append((d, i))
+        res.sort()
+        return res
+
+    def mais_proximo(self, lat, lng, excluir=None, raio_max_m=50000):
+        """
+        (distancia_m, indice) do ponto mais proximo, expandindo aneis de
+        celulas ate que nenhum anel mais distante possa ter algo melhor.
+        Os aneis param na extensao ocupada da grade, entao raio_max_m
+        infinito termina mesmo sem candidato: devolve (inf, None).
+        """
+        melhor = (float("inf"), None)
+        if self.extensao is None or (excluir is not None and len(excluir) >= len(self)):
+            return melhor
+        cx, cy = self._celula(lat, lng)
+        x0, y0, x1, y1 = self.extensao
+        # aneis fora da extensao ocupada nao tem pontos: comeca no primeiro que a toca
+        anel = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)
+        ultimo_anel = max(cx - x0, x1 - cx, cy - y0, y1 - cy, 0)
+        lado_m = self.tam * METROS_POR_GRAU * max(math.cos(math.radians(lat)), 1e-6)
+        while anel <= ultimo_anel and (anel - 1) * lado_m <= raio_max_m:
+            if melhor[1] is not None and (anel - 1) * lado_m > melhor[0]:
+                break
+            for x in range(max(cx - anel, x0), min(cx + anel, x1) + 1):
+                if abs(x - cx) == anel:
+                    ys = range(max(cy - anel, y0), min(cy + anel, y1) + 1)
+                else:
+                    ys = [y for y in (cy - anel, cy + anel) if y0 <= y <= y1] if anel else [cy]
+                for y in ys:
+                    for i in self.celulas.get((x, y), ()):
+                        if excluir is not None and i in excluir:
+                            continue
+                        d = distancia_m(lat, lng, self.lats[i], self.lngs[i])
+                        if d < melhor[0]:
+                            melhor = (d, i)
+            anel += 1
+        return melhor
+
+    def rota_visitas(self, lat, lng, indices=None, limite=None):
+        """
+        Rota gulosa de vizinho mais proximo partindo de (lat, lng) pelos
+        'indices' informados (ou todos). Devolve [(indice, distancia_m)].
+        """
+        if indices is not None:
+            sub = IndiceGrade(self.tam)
+            for i in indices:
+                sub.inserir(i, self.lats[i], self.lngs[i])
+            rota = sub.rota_visitas(lat, lng, limite=limite)
+            return [(sub.ids[j], d) for j, d in rota]
+
+        visitados = set()
+        rota = []
+        alvo = len(self) if limite is None else min(limite, len(self))
+        while len(rota) < alvo:
+            d, i = self.mais_proximo(lat, lng, excluir=visitados, raio_max_m=float("inf") if len(self) < 10000 else 50000)
+            if i is None:
+                break
+            visitados.add(i)
+            rota.append((i, d))
+            lat, lng = self.lats[i], self.lngs[i]
+        return rota
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def benchmark(n=1_000_000, consultas=1000, seed=7):
+    import random
+
+    rnd = random.Random(seed)
+    t0 = time.perf_counter()
+    idx = IndiceGrade()
+    for i in range(n):
+        idx.inserir(i, -1.45 + rnd.uniform(-0.5, 0.5), -48.48 + rnd.uniform(-0.5, 0.5))
+    t_build = time.perf_counter() - t0
+
+    pontos = [(-1.45 + rnd.uniform(-0.4, 0.4), -48.48 + rnd.uniform(-0.4, 0.4)) for _ in range(consultas)]
+
+    t0 = time.perf_counter()
+    total_raio = sum(len(idx.raio(la, lo, 500)) for la, lo in pontos)
+    t_raio = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    total_caixa = sum(len(idx.caixa(la, lo, la + 0.01, lo + 0.01)) for la, lo in pontos)
+    t_caixa = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for la, lo in pontos:
+        idx.mais_proximo(la, lo)
+    t_nn = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    perto = [i for _, i in idx.raio(-1.45, -48.48, 2000)][:200]
+    rota = idx.rota_visitas(-1.45, -48.48, perto)
+    t_rota = time.perf_counter() - t0
+
+    print(f"\nBENCHMARK INDICE ESPACIAL ({n} pontos, {consultas} consultas):")
+    print(f"   Construcao:        {t_build:.2f}s")
+    print(f"   Raio 500 m:        {t_raio/consultas*1000:.3f} ms/consulta (media {total_raio/consultas:.0f} pontos)")
+    print(f"   Caixa ~1.1 km:     {t_caixa/consultas*1000:.3f} ms/consulta (media {total_caixa/consultas:.0f} pontos)")
+    print(f"   Mais proximo:      {t_nn/consultas*1000:.3f} ms/consulta")
+    print(f"   Rota {len(rota)} visitas:  {t_rota*1000:.1f} ms ({sum(d for _, d in rota)/1000:.1f} km)")
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import pandas as pd
+
+        leads = pd.read_csv(sys.argv[1], encoding="utf-8-sig").to_dict(orient="records")
+        idx = IndiceGrade.de_leads(leads)
+        if len(idx):
+            rota = idx.rota_visitas(idx.lats[0], idx.lngs[0])
+            print("\nROTA DE VISITAS:")
+            for ordem, (i, d) in enumerate(rota, 1):
+                print(f"   {ordem:3d}. {idx.ids[i]}  (+{d/1000:.2f} km)")
+    else:
+        benchmark()
@@ -0,0 +1,34 @@
+"""
+LINKS DO GOOGLE MAPS
+Leitura do place id e das coordenadas a partir dos links do Maps. Fica
+num modulo sem dependencias para poder ser usado pelo conversor, pela
+deduplicacao e pelo indice espacial sem importar Playwright/Firebase.
+"""
+
+import re
+
+
+def extrair_place_id(url):
+    """Id estavel do lugar no Maps ('0x...:0x...') a partir do link."""
+    if not url:
+        return None
+    m = re.search(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", url)
+    if m:
+        return m.group(1)
+    m = re.search(r"/maps/place/([^/@?]+)", url)
+    return ("nome:" + m.group(1).lower()) if m else None
+
+
+def extrair_coordenadas(url, aceitar_viewport=True):
+    """
+    (lat, lng) do lugar: '!3d..!4d..' (o pin) ou, na falta, '@lat,lng'
+    (centro do mapa, nao do lugar; use aceitar_viewport=False para ignorar).
+    """
+    if not url or not isinstance(url, str):
+        return None, None
+    m = re.search(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)", url)
+    if not m and aceitar_viewport:
+        m = re.search(r"@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)", url)
+    if not m:
+        return None, None
+    return float(m.group(1)), float(m.group(2))
@@ -0,0 +1,363 @@
+"""
+LOG DE ESCRITAS DO FIRESTORE (WRITE-AHEAD)
+Toda escrita no Firestore passa primeiro por um log local em disco
+(JSONL, com fsync) e so depois vai para a rede. Se o init_firebase
+falhou ou a escrita deu erro, a entrada fica pendente no log em vez de
+sumir; quando a conexao voltar, o replay manda tudo em batches grandes.
+As escritas sao set por id de documento (merge), entao mandar a mesma
+entrada duas vezes nao estraga nada.
+
+Formato do log, uma linha por evento:
+    {"t": "w", "id": ..., "col": "leads", "doc": ..., "dados": {...}, "merge": true}
+    {"t": "ok", "ids": [...]}     <- confirmacao das escritas gravadas
+Uma escrita confirmada supera as pendentes mais antigas do mesmo
+documento: os campos que ela gravou saem delas, para o replay nao
+sobrescrever um dado novo com um velho. A compactacao joga fora o que ja
+foi confirmado e mantem as pendentes com os ids originais, entao uma
+confirmacao que chega depois (escrita em voo) continua valendo.
+
+Como rodar:
+    python log_firestore.py status
+    python log_firestore.py replay
+    python log_firestore.py compactar
+"""
+
+import contextlib, json, os, sys, threading, time, uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+ARQUIVO_LOG        = "firestore_wal.jsonl"
+LOTE_REPLAY        = 400    # escritas por batch (limite do Firestore: 500)
+COMPACTAR_A_CADA   = 2000   # confirmacoes acumuladas antes de compactar sozinho
+
+# ================================================================
+# CODIFICACAO
+# ================================================================
+_SENTINELAS = None
+
+
+def _sentinelas():
+    """Valores especiais do Firestore que nao sao JSON (firebase_admin so e importado aqui)."""
+    global _SENTINELAS
+    if _SENTINELAS is None:
+        from firebase_admin import firestore
+
+        _SENTINELAS = {"SERVER_TIMESTAMP": firestore.SERVER_TIMESTAMP}
+    return _SENTINELAS
+
+
+def _codificar(dados):
+    # sem o firestore carregado ninguem pode ter posto uma sentinela nos dados
+    if "firebase_admin.firestore" not in sys.modules:
+        return dict(dados)
+    saida = {}
+    for k, v in dados.items():
+        for nome, sentinela in _sentinelas().items():
+            if v is sentinela:
+                v = {"__sentinela__": nome}
+                break
+        saida[k] = v
+    return saida
+
+
+def _decodificar(dados):
+    return {
+        k: _sentinelas()[v["__sentinela__"]] if isinstance(v, dict) and "__sentinela__" in v else v
+        for k, v in dados.items()
+    }
+
+
+def _superar(pendentes, por_doc, gravada):
+    """
+    'gravada' chegou no Firestore: tira das pendentes mais antigas do mesmo
+    documento os campos que ela gravou (todos, se ela nao era merge) e
+    descarta as que ficaram vazias.
+    """
+    ids = por_doc.get((gravada["col"], gravada["doc"]), [])
+    if gravada["id"] not in ids:
+        return
+    pos = ids.index(gravada["id"])
+    restantes = []
+    for id_ in ids[:pos]:
+        e = pendentes.get(id_)
+        if e is None:
+            continue
+        if gravada["merge"]:
+            for campo in gravada["dados"]:
+                e["dados"].pop(campo, None)
+            # um set sem merge agora apagaria o que a gravada escreveu
+            e["merge"] = True
+        else:
+            e["dados"] = {}
+        if e["dados"]:
+            restantes.append(id_)
+        else:
+            del pendentes[id_]
+    ids[:pos + 1] = restantes
+
+
+def _juntar(pendentes):
+    """
+    Junta as escritas pendentes por documento, na ordem do log: set com
+    merge soma os campos, set sem merge substitui o documento.
+    Devolve [{"col", "doc", "dados", "merge", "ids", "em"}].
+    """
+    por_doc = {}
+    for e in pendentes:
+        chave = (e["col"], e["doc"])
+        atual = por_doc.get(chave)
+        if atual is None or not e["merge"]:
+            por_doc[chave] = {"col": e["col"], "doc": e["doc"], "dados": dict(e["dados"]), "merge": e["merge"],
+                              "ids": (atual["ids"] if atual else []) + [e["id"]],
+                              "em": atual["em"] if atual else e.get("em")}
+        else:
+            atual["dados"].update(e["dados"])
+            atual["ids"].append(e["id"])
+    return list(por_doc.values())
+
+# ================================================================
+# LOG
+# ================================================================
+
+class LogFirestore:
+    """
+    Um arquivo de log, seguro entre threads (e entre processos no Linux,
+    via flock). Uso direto:
+
+        log = LogFirestore()
+        id_ = log.registrar("leads", doc_id, dados)
+        ... grava no Firestore ...
+        log.confirmar([id_])
+    """
+
+    def __init__(self, caminho=ARQUIVO_LOG):
+        self.caminho   = caminho
+        self.lock      = threading.Lock()
+        self.confirmados_desde_compactar = 0
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+
+    @contextlib.contextmanager
+    def _travado(self):
+        """Exclusao entre threads e, onde ha flock, entre processos."""
+        with self.lock, open(self.caminho + ".trava", "a") as trava:
+            if fcntl is not None:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _acrescentar(self, linhas):
+        texto = "".join(json.dumps(l, ensure_ascii=False) + "\n" for l in linhas)
+        with self._travado(), open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ------------------------------------------------------------
+    # escrita
+    # ------------------------------------------------------------
+
+    def registrar(self, colecao, doc_id, dados, merge=True):
+        """Grava a escrita no log (duravel) e devolve o id da entrada."""
+        return self.registrar_varios([(colecao, doc_id, dados)], merge)[0]
+
+    def registrar_varios(self, escritas, merge=True):
+        """[(colecao, doc_id, dados)] com um fsync so. Devolve os ids."""
+        entradas = [
+            {"t": "w", "id": uuid.uuid4().hex, "col": col, "doc": doc, "dados": _codificar(dados),
+             "merge": merge, "em": round(time.time(), 3)}
+            for col, doc, dados in escritas
+        ]
+        if entradas:
+            self._acrescentar(entradas)
+        return [e["id"] for e in entradas]
+
+    def confirmar(self, ids):
+        if not ids:
+            return
+        self._acrescentar([{"t": "ok", "ids": list(ids)}])
+        self.confirmados_desde_compactar += len(ids)
+        if self.confirmados_desde_compactar >= COMPACTAR_A_CADA:
+            self.compactar()
+
+    # ------------------------------------------------------------
+    # leitura / compactacao
+    # ------------------------------------------------------------
+
+    def _ler(self):
+        """Pendentes {id: entrada} na ordem do log, ja sem o que foi superado."""
+        pendentes = {}
+        por_doc = {}   # (col, doc) -> ids pendentes, na ordem do log
+        if not os.path.exists(self.caminho):
+            return pendentes
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    ev = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue  # linha cortada por um crash no meio da escrita
+                if ev.get("t") == "w":
+                    pendentes[ev["id"]] = ev
+                    por_doc.setdefault((ev["col"], ev["doc"]), []).append(ev["id"])
+                elif ev.get("t") == "ok":
+                    for i in ev["ids"]:
+                        gravada = pendentes.pop(i, None)
+                        if gravada is not None:
+                            _superar(pendentes, por_doc, gravada)
+        return pendentes
+
+    def pendentes(self):
+        """Escritas ainda nao confirmadas, ja juntadas por documento."""
+        with self.lock:
+            return _juntar(self._ler().values())
+
+    def compactar(self):
+        """
+        Reescreve o log so com as escritas pendentes, na ordem e com os ids
+        originais: uma escrita em voo durante a compactacao ainda e
+        confirmada pelo id dela. Devolve quantos documentos ficaram pendentes.
+        """
+        with self._travado():
+            pendentes = self._ler()
+            tmp = self.caminho + ".parcial"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for e in pendentes.values():
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.caminho)
+            self.confirmados_desde_compactar = 0
+        return len(_juntar(pendentes.values()))
+
+    def estatisticas(self):
+        with self.lock:
+            brutas = self._ler()
+            tamanho = os.path.getsize(self.caminho) if os.path.exists(self.caminho) else 0
+        return {
+            "pendentes":  len(brutas),
+            "documentos": len(_juntar(brutas.values())),
+            "bytes":      tamanho,
+            "maisAntiga": min((e["em"] for e in brutas.values() if e.get("em")), default=None),
+        }
+
+    # ------------------------------------------------------------
+    # replay
+    # ------------------------------------------------------------
+
+    def replay(self, db, lote=LOTE_REPLAY):
+        """
+        Manda as pendentes em batches de 'lote' e confirma cada batch que
+        deu certo. Para no primeiro erro (o resto continua no log).
+        Devolve (documentos_gravados, documentos_pendentes).
+        """
+        juntas = self.pendentes()
+        gravados = 0
+        for i in range(0, len(juntas), lote):
+            parte = juntas[i:i + lote]
+            try:
+                batch = db.batch()
+                for e in parte:
+                    ref = db.collection(e["col"]).document(e["doc"])
+                    batch.set(ref, _decodificar(e["dados"]), merge=e["merge"])
+                batch.commit()
+            except Exception as ex:
+                print(f"   Replay parou: {type(ex).__name__}: {ex}")
+                break
+            self.confirmar([id_ for e in parte for id_ in e["ids"]])
+            gravados += len(parte)
+            print(f"   Replay: {gravados}/{len(juntas)} documentos")
+        restantes = self.compactar()
+        return gravados, restantes
+
+
+_LOG_PADRAO = None
+_LOCK_PADRAO = threading.Lock()
+
+
+def log_padrao():
+    global _LOG_PADRAO
+    with _LOCK_PADRAO:
+        if _LOG_PADRAO is None:
+            _LOG_PADRAO = LogFirestore()
+        return _LOG_PADRAO
+
+# ================================================================
+# GRAVACAO ATRAVES DO LOG
+# ================================================================
+
+def gravar(db, colecao, doc_id, dados, merge=True, log=None):
+    """
+    Registra a escrita no log e tenta gravar direto. Sem db (ou com erro)
+    ela fica pendente para o replay. Devolve True se chegou no Firestore.
+    """
+    log = log or log_padrao()
+    id_ = log.registrar(colecao, doc_id, dados, merge)
+    if db is None:
+        return False
+    try:
+        db.collection(colecao).document(doc_id).set(dados, merge=merge)
+    except Exception as e:
+        print(f"   Firebase ERRO ao gravar '{doc_id}': {type(e).__name__}: {e} (pendente no log)")
+        return False
+    log.confirmar([id_])
+    return True
+
+
+def gravar_lote(db, escritas, merge=True, log=None, lote=LOTE_REPLAY):
+    """
+    [(colecao, doc_id, dados)]: registra tudo com um fsync so e grava em
+    batches. Devolve quantas chegaram no Firestore.
+    """
+    log = log or log_padrao()
+    ids = log.registrar_varios(escritas, merge)
+    if db is None:
+        return 0
+    gravadas = 0
+    for i in range(0, len(escritas), lote):
+        try:
+            batch = db.batch()
+            for col, doc, dados in escritas[i:i + lote]:
+                batch.set(db.collection(col).document(doc), dados, merge=merge)
+            batch.commit()
+        except Exception as e:
+            print(f"   Firebase ERRO no batch: {type(e).__name__}: {e} (pendente no log)")
+            break
+        log.confirmar(ids[i:i + lote])
+        gravadas += len(ids[i:i + lote])
+    return gravadas
+
+
+def imprimir_status(log=None):
+    est = (log or log_padrao()).estatisticas()
+    idade = ""
+    if est["maisAntiga"]:
+        idade = f", mais antiga ha {(time.time() - est['maisAntiga']) / 60:.0f} min"
+    print(f"Log do Firestore: {est['pendentes']} escritas pendentes em {est['documentos']} documentos "
+          f"({est['bytes'] / 1024:.0f} KB{idade})")
+    return est
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "status"
+    log = LogFirestore(sys.argv[2]) if len(sys.argv) > 2 else log_padrao()
+
+    if comando == "replay":
+        from scraper_firebase_direto import init_firebase
+
+        db = init_firebase()
+        if db is None:
+            print("Sem conexao com o Firestore; nada foi enviado.")
+            sys.exit(1)
+        gravados, restantes = log.replay(db)
+        print(f"Replay: {gravados} documentos gravados, {restantes} pendentes.")
+    elif comando == "compactar":
+        print(f"Log compactado: {log.compactar()} documentos pendentes.")
+    else:
+        imprimir_status(log)
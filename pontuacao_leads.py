@@ -0,0 +1,291 @@
+"""
+PONTUACAO DE LEADS
+Substitui o "Oportunidade"/"Nao" por um score numerico (0-100) calculado
+de uma vez sobre o DataFrame inteiro. Cada feature vira uma coluna
+'Score_<feature>' com quantos pontos ela somou, entao da para explicar
+por que um lead ficou no topo. 'Score_Hash' guarda a assinatura das
+entradas + pesos: repontuar_df so recalcula as linhas que mudaram (ou
+so as que quem chama diz que mudaram). pontuar_lead tem um caminho
+escalar, sem montar DataFrame, para pontuar lead a lead no scraper.
+
+Como rodar:
+    python pontuacao_leads.py leads_paragominas.csv
+    python pontuacao_leads.py --benchmark 1000000
+"""
+
+import hashlib, json, math, re, sys, time
+import numpy as np
+import pandas as pd
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+PESOS = {
+    "sem_site":        40,   # nao tem site nenhum
+    "site_fraco":      25,   # linktree/bio.link/sites.google ou site ruim na sondagem
+    "sem_instagram":   15,
+    "telefone_valido":  5,   # da para chamar no WhatsApp
+    "avaliacoes":       5,   # maximo, em escala log (1000+ avaliacoes = cheio)
+    "nota_baixa":       5,   # nota < NOTA_BAIXA: argumento de reputacao
+}
+PESOS_NICHO = {
+    # multiplicador do score por nicho (nicho ausente = 1.0)
+    "Clinica Odontologica": 1.2,
+    "Academias":            1.0,
+}
+NOTA_BAIXA           = 4.0
+LIMIAR_OPORTUNIDADE  = 20
+
+HOSTS_FRACOS = ["linktree", "linktr.ee", "bio.link", "meulink.com", "beacons.ai", "sites.google.com"]
+RE_FRACOS    = re.compile("|".join(h.replace(".", r"\.") for h in HOSTS_FRACOS))
+QUALIDADES_SONDADAS = ["good", "poor"]   # "none"/"indeterminado" nao dizem nada sobre o site
+ENTRADAS     = ["Site", "WebsiteQuality", "Instagram", "WhatsApp", "Nota", "Avaliacoes", "Nicho"]
+NUMERICAS    = {"Nota", "Avaliacoes"}
+
+# ================================================================
+# FEATURES
+# ================================================================
+
+def _coluna(df, nome):
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(np.nan, index=df.index, dtype="object")
+
+
+def _bruto(df, nome):
+    col = _coluna(df, nome)
+    return col.where(col.notna(), "").astype(str)
+
+
+def _texto(df, nome):
+    return _bruto(df, nome).str.strip().str.lower()
+
+
+def calcular_features(df):
+    """DataFrame com uma coluna 0..1 por feature (mesmo indice do df)."""
+    site      = _texto(df, "Site")
+    qualidade = _texto(df, "WebsiteQuality")
+    insta     = _texto(df, "Instagram")
+    digitos   = _texto(df, "WhatsApp").str.replace(r"\D", "", regex=True)
+    digitos   = digitos.where(~(digitos.str.startswith("55") & (digitos.str.len() > 11)), digitos.str[2:])
+    nota      = pd.to_numeric(_coluna(df, "Nota"), errors="coerce")
+    aval      = pd.to_numeric(_coluna(df, "Avaliacoes"), errors="coerce").fillna(0).clip(lower=0)
+
+    # sem site vem do campo Site: "none" tambem ja marcou sondagem que falhou
+    sem_site = ((site == "") | (site == "sem site")).to_numpy()
+    fraco    = np.where(qualidade.isin(QUALIDADES_SONDADAS), qualidade == "poor",
+                        site.str.contains(RE_FRACOS.pattern, regex=True))
+
+    return pd.DataFrame({
+        "sem_site":        sem_site.astype(float),
+        "site_fraco":      (fraco & ~sem_site).astype(float),
+        "sem_instagram":   ((insta == "") | insta.str.contains("encontrado")).astype(float),
+        "telefone_valido": digitos.str.len().isin([10, 11]).astype(float),
+        "avaliacoes":      np.minimum(np.log10(1 + aval.to_numpy(dtype=float)) / 3, 1.0),
+        "nota_baixa":      (nota < NOTA_BAIXA).astype(float),
+    }, index=df.index)
+
+
+def versao_pesos(pesos=PESOS, pesos_nicho=PESOS_NICHO):
+    txt = json.dumps([pesos, pesos_nicho, NOTA_BAIXA], sort_keys=True)
+    return hashlib.blake2b(txt.encode(), digest_size=4).hexdigest()
+
+
+def assinatura(df, pesos=PESOS, pesos_nicho=PESOS_NICHO):
+    """Hash por linha das entradas do score + versao dos pesos (texto hex)."""
+    entradas = pd.DataFrame({
+        c: pd.to_numeric(_coluna(df, c), errors="coerce").astype(float) if c in NUMERICAS else _bruto(df, c)
+        for c in ENTRADAS
+    }, index=df.index)
+    h = pd.util.hash_pandas_object(entradas, index=False).to_numpy()
+    versao = versao_pesos(pesos, pesos_nicho)
+    return pd.Series([f"{versao}{x:016x}" for x in h.tolist()], index=df.index, dtype="object")
+
+# ================================================================
+# SCORE
+# ================================================================
+
+def pontuar_df(df, pesos=PESOS, pesos_nicho=PESOS_NICHO):
+    """
+    Devolve uma copia do df com 'Score', 'Score_<feature>', 'Score_nicho'
+    e 'Score_Hash'. A soma das contribuicoes e o Score (antes do corte em 100).
+    """
+    df  = df.copy()
+    fts = calcular_features(df)
+    contrib = {f"Score_{f}": fts[f] * peso for f, peso in pesos.items()}
+    bruto = sum(contrib.values()) if contrib else pd.Series(0.0, index=df.index)
+
+    mult = _coluna(df, "Nicho").map(pesos_nicho).astype(float).fillna(1.0)
+    contrib["Score_nicho"] = bruto * (mult - 1.0)
+
+    for col, valores in contrib.items():
+        df[col] = valores.round(2)
+    df["Score"]      = (bruto * mult).clip(0, 100).round(1)
+    df["Score_Hash"] = assinatura(df, pesos, pesos_nicho)
+    return df
+
+
+def _mascara(df, alterados):
+    """'alterados' como mascara booleana ou rotulos do indice -> array bool."""
+    arr = np.asarray(alterados)
+    if arr.dtype == bool and len(arr) == len(df):
+        return arr
+    return df.index.isin(list(alterados))
+
+
+def repontuar_df(df, alterados=None, pesos=PESOS, pesos_nicho=PESOS_NICHO):
+    """
+    Pontua so as linhas que precisam. Com 'alterados' (mascara ou rotulos
+    do indice das linhas cujas entradas mudaram) nao ha hash de linha
+    nenhuma: entram essas, as sem score e as pontuadas com outros pesos.
+    Sem 'alterados' compara a assinatura de todas as linhas (confere tudo,
+    mas faz o hash do DataFrame inteiro). Devolve (df, quantas_repontuadas).
+    """
+    if "Score_Hash" not in df.columns or "Score" not in df.columns:
+        return pontuar_df(df, pesos, pesos_nicho), len(df)
+    guardado = _bruto(df, "Score_Hash")
+    if alterados is None:
+        mudou = (guardado != assinatura(df, pesos, pesos_nicho)).to_numpy()
+    else:
+        versao = versao_pesos(pesos, pesos_nicho)
+        mudou = (~guardado.str.startswith(versao) | _coluna(df, "Score").isna()).to_numpy()
+        mudou = mudou | _mascara(df, alterados)
+    if not mudou.any():
+        return df, 0
+    df = df.copy()
+    novos = pontuar_df(df.loc[mudou], pesos, pesos_nicho)
+    for col in novos.columns:
+        if col == "Score_Hash" or col.startswith("Score"):
+            if col not in df.columns:
+                df[col] = np.nan
+            df.loc[mudou, col] = novos[col]
+    return df, int(mudou.sum())
+
+
+def _escalar(v):
+    return "" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v)
+
+
+def _numero(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def features_lead(lead):
+    """Mesmas features do calcular_features, para um lead (dict) so."""
+    site      = _escalar(lead.get("Site")).strip().lower()
+    qualidade = _escalar(lead.get("WebsiteQuality")).strip().lower()
+    insta     = _escalar(lead.get("Instagram")).strip().lower()
+    digitos   = re.sub(r"\D", "", _escalar(lead.get("WhatsApp")).strip().lower())
+    if digitos.startswith("55") and len(digitos) > 11:
+        digitos = digitos[2:]
+    nota = _numero(lead.get("Nota"))
+    aval = _numero(lead.get("Avaliacoes"))
+    aval = 0.0 if math.isnan(aval) else max(aval, 0.0)
+
+    sem_site = site in ("", "sem site")
+    fraco    = qualidade == "poor" if qualidade in QUALIDADES_SONDADAS else bool(RE_FRACOS.search(site))
+    return {
+        "sem_site":        float(sem_site),
+        "site_fraco":      float(fraco and not sem_site),
+        "sem_instagram":   float(insta == "" or "encontrado" in insta),
+        "telefone_valido": float(len(digitos) in (10, 11)),
+        "avaliacoes":      min(math.log10(1 + aval) / 3, 1.0),
+        "nota_baixa":      float(nota < NOTA_BAIXA),
+    }
+
+
+def pontuar_lead(lead, pesos=PESOS, pesos_nicho=PESOS_NICHO):
+    """
+    Pontua um lead (dict) in-place e devolve o Score, sem DataFrame.
+    Nao grava 'Score_Hash': o repontuar_df preenche quando o lead chega
+    no CSV (linha sem hash conta como alterada).
+    """
+    fts   = features_lead(lead)
+    bruto = sum(fts[f] * peso for f, peso in pesos.items())
+    mult  = pesos_nicho.get(lead.get("Nicho"), 1.0)
+    for f, peso in pesos.items():
+        lead[f"Score_{f}"] = float(np.round(fts[f] * peso, 2))
+    lead["Score_nicho"] = float(np.round(bruto * (mult - 1.0), 2))
+    lead["Score"]       = float(np.round(min(max(bruto * mult, 0), 100), 1))
+    return lead["Score"]
+
+
+def oportunidades(df, limiar=LIMIAR_OPORTUNIDADE):
+    """Mascara booleana dos leads com Score >= limiar."""
+    return pd.to_numeric(_coluna(df, "Score"), errors="coerce").fillna(0) >= limiar
+
+
+def resumo_scores(df):
+    score = pd.to_numeric(_coluna(df, "Score"), errors="coerce").dropna()
+    contrib = [c for c in df.columns if c.startswith("Score_") and c != "Score_Hash"]
+    return {
+        "total":          int(len(df)),
+        "oportunidades":  int(oportunidades(df).sum()),
+        "media":          round(float(score.mean()), 1) if len(score) else 0.0,
+        "p90":            round(float(score.quantile(0.9)), 1) if len(score) else 0.0,
+        "mediaPorFeature": {c[6:]: round(float(df[c].mean()), 2) for c in contrib},
+    }
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def gerar_sinteticos(n, seed=11):
+    rnd = np.random.default_rng(seed)
+    sites = np.array(["SEM SITE", "https://linktr.ee/x", "https://www.exemplo.com.br", "https://sites.google.com/x"])
+    instas = np.array(["Nao encontrado", "https://instagram.com/x"])
+    return pd.DataFrame({
+        "Site":       sites[rnd.integers(0, len(sites), n)],
+        "Instagram":  instas[rnd.integers(0, 2, n)],
+        "WhatsApp":   [f"(91) 9{a}-{b}" for a, b in zip(rnd.integers(1000, 9999, n), rnd.integers(1000, 9999, n))],
+        "Nota":       np.round(rnd.uniform(2.5, 5.0, n), 1),
+        "Avaliacoes": rnd.integers(0, 3000, n),
+        "Nicho":      np.array(["Clinica Odontologica", "Academias", "Pet Shop"])[rnd.integers(0, 3, n)],
+    })
+
+
+def benchmark(n=1_000_000):
+    df = gerar_sinteticos(n)
+    t0 = time.perf_counter()
+    pont = pontuar_df(df)
+    t_total = time.perf_counter() - t0
+
+    alterados = pont.sample(frac=0.01, random_state=1).index
+    pont.loc[alterados, "Instagram"] = "Nao encontrado"
+    t0 = time.perf_counter()
+    _, n_rep = repontuar_df(pont)
+    t_inc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _, n_chaves = repontuar_df(pont, alterados)
+    t_chaves = time.perf_counter() - t0
+
+    amostra = df.head(10_000).to_dict(orient="records")
+    t0 = time.perf_counter()
+    for lead in amostra:
+        pontuar_lead(lead)
+    t_lead = time.perf_counter() - t0
+
+    print(f"\nBENCHMARK PONTUACAO ({n} leads):")
+    print(f"   Pontuacao completa:   {t_total:.2f}s ({n/t_total:,.0f} leads/s)")
+    print(f"   Repontuacao 1% (hash de todas as linhas): {t_inc:.2f}s ({n_rep} linhas recalculadas)")
+    print(f"   Repontuacao 1% (chaves alteradas):        {t_chaves:.2f}s ({n_chaves} linhas recalculadas)")
+    print(f"   pontuar_lead escalar: {t_lead/len(amostra)*1e6:.0f} us/lead")
+    print(f"   Resumo:               {resumo_scores(pont)}")
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+    else:
+        arquivo = sys.argv[1] if len(sys.argv) > 1 else "leads_paragominas.csv"
+        df = pd.read_csv(arquivo, encoding="utf-8-sig")
+        df, n = repontuar_df(df)
+        df.to_csv(arquivo, index=False, encoding="utf-8-sig")
+        print(f"{n} leads repontuados em {arquivo}")
+        print(json.dumps(resumo_scores(df), ensure_ascii=False, indent=2))
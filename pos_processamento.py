@@ -0,0 +1,195 @@
+"""
+POS-PROCESSAMENTO EM LOTE
+Para backfills de CSVs historicos: le o CSV em blocos (chunks), roda o
+enriquecimento (analisar_qualidade, qualidade_site_campo, formatacao do
+WhatsApp e Link_WhatsApp, score) e as estatisticas em um pool de processos e
+grava os blocos na mesma ordem. O resultado e identico ao caminho serial
+(enriquecer_df no DataFrame inteiro). Notas/WebsiteQuality que ja vieram
+preenchidas (ex: pela sondagem dos sites) sao mantidas; a heuristica so
+preenche as vazias.
+
+Como rodar:
+    python pos_processamento.py entrada.csv saida.csv [workers]
+    python pos_processamento.py --benchmark 500000
+"""
+
+import collections, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# so modulos leves: cada processo filho importa este arquivo
+from enriquecimento_leads import analisar_qualidade, qualidade_site_campo
+from pontuacao_leads import oportunidades, pontuar_df
+from registro_lead import formatar_whatsapp
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+TAMANHO_BLOCO = 50000
+WORKERS       = os.cpu_count() or 1
+BLOCOS_POR_WORKER = 2   # blocos em voo por processo (limita a memoria)
+
+# ================================================================
+# ENRIQUECIMENTO (roda dentro de cada processo)
+# ================================================================
+
+def _vazio(v):
+    return v is None or (isinstance(v, float) and v != v) or (isinstance(v, str) and not v.strip())
+
+
+def _texto(v, padrao):
+    return padrao if _vazio(v) else str(v)
+
+
+def _coluna(df, nome):
+    return df[nome].tolist() if nome in df.columns else [None] * len(df)
+
+
+def enriquecer_df(df):
+    """Caminho serial de referencia: devolve (df_enriquecido, estatisticas)."""
+    df = df.copy()
+    sites  = [_texto(v, "SEM SITE") for v in df["Site"]] if "Site" in df.columns else ["SEM SITE"] * len(df)
+    instas = [_texto(v, "Nao encontrado") for v in df["Instagram"]] if "Instagram" in df.columns else ["Nao encontrado"] * len(df)
+    tels   = df["WhatsApp"].tolist() if "WhatsApp" in df.columns else [None] * len(df)
+
+    wpps = [formatar_whatsapp(t) for t in tels]
+    df["Notas"] = [
+        analisar_qualidade(s, i) if _vazio(n) else n
+        for s, i, n in zip(sites, instas, _coluna(df, "Notas"))
+    ]
+    df["WebsiteQuality"] = [
+        qualidade_site_campo(s) if _vazio(q) else q
+        for s, q in zip(sites, _coluna(df, "WebsiteQuality"))
+    ]
+    df["Link_WhatsApp"]  = [("https://wa.me/" + w) if w else None for w in wpps]
+    df = pontuar_df(df)
+
+    stats = {
+        "total":         len(df),
+        "sem_site":      sum(1 for s in sites if "SEM SITE" in s),
+        "sem_insta":     sum(1 for i in instas if "encontrado" in i.lower()),
+        "oportunidades": int(oportunidades(df).sum()),
+    }
+    return df, stats
+
+
+def somar_estatisticas(parciais):
+    total = {}
+    for p in parciais:
+        for k, v in p.items():
+            total[k] = total.get(k, 0) + v
+    return total
+
+# ================================================================
+# PIPELINE EM PARALELO
+# ================================================================
+
+def processar_csv(entrada, saida, workers=WORKERS, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Le 'entrada' em blocos, enriquece em 'workers' processos e grava em
+    'saida' na ordem original. Devolve as estatisticas somadas.
+    """
+    inicio = time.perf_counter()
+    blocos = pd.read_csv(entrada, encoding="utf-8-sig", dtype=str, chunksize=tamanho_bloco)
+    parciais = []
+    primeiro = True
+
+    def gravar(resultado):
+        nonlocal primeiro
+        df, stats = resultado
+        df.to_csv(saida, mode="w" if primeiro else "a", header=primeiro, index=False,
+                  encoding="utf-8-sig" if primeiro else "utf-8")
+        primeiro = False
+        parciais.append(stats)
+
+    if workers <= 1:
+        for b in blocos:
+            gravar(enriquecer_df(b))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # janela limitada em ordem: o leitor so avanca quando o bloco mais
+            # antigo foi gravado (pool.map leria o CSV inteiro de uma vez)
+            janela = collections.deque()
+            for b in blocos:
+                janela.append(pool.submit(enriquecer_df, b))
+                if len(janela) >= workers * BLOCOS_POR_WORKER:
+                    gravar(janela.popleft().result())
+            while janela:
+                gravar(janela.popleft().result())
+
+    stats = somar_estatisticas(parciais)
+    stats["segundos"] = round(time.perf_counter() - inicio, 2)
+    return stats
+
+
+def imprimir_estatisticas(stats):
+    total = stats.get("total", 0) or 1
+    print(f"\nESTATISTICAS:")
+    print(f"   Total:         {stats.get('total', 0)}")
+    print(f"   Sem site:      {stats['sem_site']} ({stats['sem_site']/total*100:.1f}%)")
+    print(f"   Sem Instagram: {stats['sem_insta']} ({stats['sem_insta']/total*100:.1f}%)")
+    print(f"   Oportunidades: {stats['oportunidades']} ({stats['oportunidades']/total*100:.1f}%)")
+    print(f"   Tempo:         {stats['segundos']}s\n")
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def gerar_csv_sintetico(caminho, n, seed=3):
+    import random
+
+    rnd = random.Random(seed)
+    sites = ["SEM SITE", "https://linktr.ee/x", "https://www.exemplo.com.br", "https://sites.google.com/x"]
+    instas = ["Nao encontrado", "https://instagram.com/x"]
+    pd.DataFrame({
+        "Empresa":   [f"EMPRESA {i}" for i in range(n)],
+        "Site":      [rnd.choice(sites) for _ in range(n)],
+        "WhatsApp":  [f"(91) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}" for _ in range(n)],
+        "Instagram": [rnd.choice(instas) for _ in range(n)],
+        # parte ja sondada: tem que sobreviver ao enriquecimento
+        "WebsiteQuality": [rnd.choice(["poor", None, None]) for _ in range(n)],
+    }).to_csv(caminho, index=False, encoding="utf-8-sig")
+
+
+def benchmark(n=500000):
+    entrada = "bench_pos_entrada.csv"
+    gerar_csv_sintetico(entrada, n)
+
+    bruto = pd.read_csv(entrada, encoding="utf-8-sig", dtype=str)
+    t0 = time.perf_counter()
+    ref, _ = enriquecer_df(bruto)
+    t_enriquecer = time.perf_counter() - t0
+    ref = ref.astype(str).reset_index(drop=True)
+
+    nucleos = os.cpu_count() or 1
+    print(f"\nBENCHMARK POS-PROCESSAMENTO ({n} linhas, {nucleos} nucleos):")
+    base = None
+    workers = 1
+    while workers <= max(nucleos, 2):
+        saida = f"bench_pos_saida_{workers}.csv"
+        stats = processar_csv(entrada, saida, workers)
+        out = pd.read_csv(saida, encoding="utf-8-sig", dtype=str).astype(str)
+        igual = out.equals(ref)
+        base = base or stats["segundos"]
+        print(f"   {workers:2d} processos: {stats['segundos']:6.2f}s  speedup {base/stats['segundos']:.2f}x  identico={igual}")
+        os.remove(saida)
+        workers *= 2
+
+    # leitura e escrita do CSV ficam no processo pai; so o enriquecimento paraleliza
+    fracao = min(1.0, t_enriquecer / base) if base else 0.0
+    projecao = "  ".join(f"{k}: {1 / ((1 - fracao) + fracao / k):.2f}x" for k in (2, 4, 8))
+    print(f"   Parte paralelizavel: {fracao:.0%} do tempo serial; teto pela lei de Amdahl (estimativa): {projecao}")
+    os.remove(entrada)
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 500000)
+    else:
+        entrada = sys.argv[1] if len(sys.argv) > 1 else "leads_paragominas.csv"
+        saida   = sys.argv[2] if len(sys.argv) > 2 else "leads_enriquecidos.csv"
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else WORKERS
+        imprimir_estatisticas(processar_csv(entrada, saida, workers))
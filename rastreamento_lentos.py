@@ -0,0 +1,116 @@
+"""
+RASTREAMENTO DE LEADS LENTOS
+Quando um lead leva 30s em vez de 10s nao da para saber o porque. Com
+isto ligado, o contexto do Playwright grava um trace (screenshots,
+snapshots do DOM e rede) em chunks, um por lead. O chunk fica so no
+diretorio temporario do navegador e e descartado se o lead foi rapido;
+so e gravado em disco quando passa do limiar de tempo ou da erro. A
+pasta de traces tem um teto de tamanho: os mais antigos saem primeiro.
+
+Para abrir um trace salvo:
+    playwright show-trace traces_lentos/<arquivo>.zip
+"""
+
+import contextlib, json, os, re, time, uuid
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+PASTA_TRACES = "traces_lentos"
+LIMIAR_S     = 20      # leads acima disso tem o trace salvo
+LIMITE_MB    = 500     # teto da pasta de traces
+
+# ================================================================
+# RASTREADOR
+# ================================================================
+
+def _slug(txt):
+    return re.sub(r"[^a-zA-Z0-9]+", "_", str(txt)).strip("_")[:60] or "lead"
+
+
+class RastreadorLentos:
+    """
+    Um por contexto do Playwright. Uso:
+
+        rastreador = RastreadorLentos(ctx)
+        with rastreador.lead("card 3") as registro:
+            ... extrai o lead ...
+            if lead is None:
+                registro["erro"] = "sem titulo"
+        rastreador.fechar()
+    """
+
+    def __init__(self, ctx, limiar_s=LIMIAR_S, pasta=PASTA_TRACES, limite_mb=LIMITE_MB):
+        self.ctx       = ctx
+        self.limiar_s  = limiar_s
+        self.pasta     = pasta
+        self.limite    = limite_mb * 1024 * 1024
+        self.contagem  = {"leads": 0, "salvos": 0, "descartados": 0, "removidos": 0}
+        os.makedirs(pasta, exist_ok=True)
+        ctx.tracing.start(screenshots=True, snapshots=True, sources=False)
+
+    @contextlib.contextmanager
+    def lead(self, rotulo):
+        self.ctx.tracing.start_chunk(title=str(rotulo))
+        registro = {"rotulo": str(rotulo), "erro": None}
+        inicio = time.monotonic()
+        try:
+            yield registro
+        except Exception as e:
+            registro["erro"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro["segundos"] = round(time.monotonic() - inicio, 2)
+            self._fechar_chunk(registro)
+
+    def _fechar_chunk(self, registro):
+        self.contagem["leads"] += 1
+        lento = registro["segundos"] >= self.limiar_s
+        try:
+            if not (lento or registro["erro"]):
+                self.ctx.tracing.stop_chunk()
+                self.contagem["descartados"] += 1
+                return
+
+            # sufixo aleatorio: varios workers gravam na mesma pasta no mesmo segundo
+            nome = f"{time.strftime('%Y%m%d-%H%M%S')}_{_slug(registro['rotulo'])}_{uuid.uuid4().hex[:8]}"
+            base = os.path.join(self.pasta, nome)
+            self.ctx.tracing.stop_chunk(path=base + ".zip")
+            registro["motivo"] = "erro" if registro["erro"] else "lento"
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(registro, f, ensure_ascii=False, indent=2)
+            self.contagem["salvos"] += 1
+            print(f"   Trace salvo ({registro['motivo']}, {registro['segundos']}s): {base}.zip")
+            self.podar()
+        except Exception as e:
+            # o trace nunca pode derrubar a extracao
+            print(f"   Erro ao fechar trace: {e}")
+
+    def podar(self):
+        """Apaga os traces mais antigos ate a pasta caber no limite."""
+        traces = []
+        for nome in os.listdir(self.pasta):
+            if not nome.endswith(".zip"):
+                continue
+            base = os.path.join(self.pasta, nome[:-4])
+            par  = [c for c in (base + ".zip", base + ".json") if os.path.exists(c)]
+            traces.append((os.path.getmtime(base + ".zip"), sum(os.path.getsize(c) for c in par), par))
+        traces.sort()
+        total = sum(tam for _, tam, _ in traces)
+        for _, tam, par in traces:
+            if total <= self.limite:
+                break
+            for caminho in par:
+                os.remove(caminho)
+            total -= tam
+            self.contagem["removidos"] += 1
+
+    def fechar(self):
+        try:
+            self.ctx.tracing.stop()
+        except Exception:
+            pass
+        c = self.contagem
+        if c["leads"]:
+            print(f"   Traces: {c['salvos']} salvos, {c['descartados']} descartados, "
+                  f"{c['removidos']} removidos pelo limite de disco")
@@ -0,0 +1,266 @@
+"""
+REGISTRO DE LEAD
+Um lead so, tipado e com __slots__, no lugar dos tres dicts montados campo
+a campo (scraper/CSV com 'Empresa'/'WhatsApp', Firestore com
+'companyName'/'phone', LeadFlow com 'empresa'/'telefone'). Os mapeadores
+de/para cada esquema ficam aqui, cada esquema com seus proprios valores
+padrao, e lotes grandes ocupam bem menos memoria que listas de dicts.
+
+Como rodar (memoria por 100k leads, dict x registro):
+    python registro_lead.py
+"""
+
+import math, re, sys, time
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import Optional
+
+# ================================================================
+# WHATSAPP
+# ================================================================
+
+def formatar_whatsapp(tel_bruto):
+    if not tel_bruto or tel_bruto in ("Nao encontrado", "Nao encontrado"):
+        return None
+    num = re.sub(r"\D", "", str(tel_bruto))
+    if num.startswith("55"):
+        num = num[2:]
+    num = "55" + num
+    return num if len(num) >= 12 else None
+
+
+def _vazio(v):
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+def _ou(v, padrao):
+    return padrao if v is None else v
+
+# ================================================================
+# REGISTRO
+# ================================================================
+
+@dataclass(slots=True)
+class RegistroLead:
+    empresa:         Optional[str] = None
+    nicho:           Optional[str] = None
+    site:            Optional[str] = None
+    whatsapp:        Optional[str] = None
+    instagram:       Optional[str] = None
+    google_maps:     Optional[str] = None
+    latitude:        Optional[float] = None
+    longitude:       Optional[float] = None
+    territorio:      Optional[str] = None
+    status:          Optional[str] = None
+    notas:           Optional[str] = None
+    website_quality: Optional[str] = None
+    nota:            Optional[float] = None
+    avaliacoes:      Optional[int] = None
+    score:           Optional[float] = None
+    # chaves do scraper fora do esquema (ex: 'Score_<feature>'), para o CSV/JSON
+    extras:          Optional[dict] = None
+
+    # ------------------------------------------------------------
+    # scraper / CSV ('Empresa', 'WhatsApp', ...)
+    # ------------------------------------------------------------
+
+    @classmethod
+    def de_scraper(cls, d):
+        extras = None
+        if not d.keys() <= _CHAVES_SCRAPER:
+            extras = {k: v for k, v in d.items() if k not in _CHAVES_SCRAPER}
+        # NaN (float) vira None; o teste de classe evita a chamada do _vazio por campo
+        return cls(*[None if v.__class__ is float and v != v else v for v in map(d.get, CHAVES_SCRAPER)], extras)
+
+    def para_scraper(self):
+        d = dict(zip(CHAVES_SCRAPER, _valores(self)))
+        if self.extras:
+            d.update(self.extras)
+        return d
+
+    @classmethod
+    def de_df(cls, df):
+        """Um registro por linha (itertuples, sem montar dict por linha)."""
+        presentes = [c for c in CHAVES_SCRAPER if c in df.columns]
+        posicoes  = [CHAVES_SCRAPER.index(c) for c in presentes]
+        registros = []
+        for linha in df[presentes].itertuples(index=False, name=None):
+            valores = [None] * len(CHAVES_SCRAPER)
+            for p, v in zip(posicoes, linha):
+                if not _vazio(v):
+                    valores[p] = v
+            registros.append(cls(*valores))
+        return registros
+
+    @property
+    def whatsapp_formatado(self):
+        return formatar_whatsapp(self.whatsapp)
+
+    @property
+    def link_whatsapp(self):
+        wpp = self.whatsapp_formatado
+        return ("https://wa.me/" + wpp) if wpp else None
+
+    # ------------------------------------------------------------
+    # Firestore ('companyName', 'phone', ...)
+    # ------------------------------------------------------------
+
+    def para_firestore(self):
+        """Campos do documento, sem os timestamps (quem grava poe os dele)."""
+        wpp = self.whatsapp_formatado
+        return {
+            "companyName":    _ou(self.empresa, "sem_nome"),
+            "niche":          _ou(self.nicho, ""),
+            "phone":          _ou(self.whatsapp, ""),
+            "website":        _ou(self.site, ""),
+            "instagram":      _ou(self.instagram, ""),
+            "googleMaps":     _ou(self.google_maps, ""),
+            "lat":            self.latitude,
+            "lng":            self.longitude,
+            "territory":      _ou(self.territorio, "belem"),
+            "stage":          "new",
+            "source":         "scraper",
+            "notes":          _ou(self.notas, ""),
+            "websiteQuality": _ou(self.website_quality, "none"),
+            "score":          self.score,
+            "whatsapp":       wpp,
+            "linkWhatsApp":   ("https://wa.me/" + wpp) if wpp else "",
+            "valor":          0,
+            "contactName":    "",
+            "email":          "",
+        }
+
+    @classmethod
+    def de_firestore(cls, doc):
+        return cls(
+            empresa=doc.get("companyName"), nicho=doc.get("niche"), site=doc.get("website"),
+            whatsapp=doc.get("phone"), instagram=doc.get("instagram"), google_maps=doc.get("googleMaps"),
+            latitude=doc.get("lat"), longitude=doc.get("lng"), territorio=doc.get("territory"),
+            notas=doc.get("notes"), website_quality=doc.get("websiteQuality"), score=doc.get("score"),
+        )
+
+    # ------------------------------------------------------------
+    # LeadFlow ('empresa', 'telefone', ...)
+    # ------------------------------------------------------------
+
+    def para_leadflow(self, id_lead, data_contato):
+        tel = str(self.whatsapp) if self.whatsapp is not None else ""
+        wpp = ""
+        if self.whatsapp is not None and self.whatsapp != "Não encontrado":
+            wpp = tel.replace("(", "").replace(")", "").replace("-", "").replace(" ", "")
+        return {
+            "id":           str(id_lead),
+            "empresa":      str(self.empresa) if self.empresa is not None else "",
+            "contato":      "",
+            "email":        "",
+            "telefone":     tel,
+            "whatsapp":     wpp,
+            "site":         str(self.site) if self.site is not None else "SEM SITE",
+            "instagram":    str(self.instagram) if self.instagram is not None else "",
+            "googleMaps":   str(self.google_maps) if self.google_maps is not None else "",
+            "latitude":     self.latitude,
+            "longitude":    self.longitude,
+            "nicho":        str(self.nicho) if self.nicho is not None else "",
+            "status":       "Novo",
+            "notas":        str(self.notas) if self.notas is not None else "",
+            "score":        float(self.score) if self.score is not None else None,
+            "dataContato":  data_contato,
+            "valor":        0,
+            "linkWhatsApp": self.link_whatsapp or "",
+        }
+
+    @classmethod
+    def de_leadflow(cls, d):
+        return cls(
+            empresa=d.get("empresa"), nicho=d.get("nicho"), site=d.get("site"),
+            whatsapp=d.get("telefone") or None, instagram=d.get("instagram") or None,
+            google_maps=d.get("googleMaps") or None, latitude=d.get("latitude"), longitude=d.get("longitude"),
+            notas=d.get("notas") or None, score=d.get("score"),
+        )
+
+
+# ordem igual a dos campos do registro
+CHAVES_SCRAPER = (
+    "Empresa", "Nicho", "Site", "WhatsApp", "Instagram", "Google_Maps", "Latitude", "Longitude",
+    "Territorio", "Status", "Notas", "WebsiteQuality", "Nota", "Avaliacoes", "Score",
+)
+_CHAVES_SCRAPER = frozenset(CHAVES_SCRAPER)
+_valores = attrgetter(*(f.name for f in fields(RegistroLead) if f.name != "extras"))
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def _sintetico(i):
+    return {
+        "Empresa": f"EMPRESA {i}", "Nicho": "Academias", "Site": f"https://site{i}.com.br",
+        "WhatsApp": f"(91) 9{i % 10000:04d}-{i % 7919:04d}", "Instagram": f"https://instagram.com/e{i}",
+        "Google_Maps": f"https://www.google.com/maps/place/e{i}/data=!3d-1.{i}!4d-48.{i}",
+        "Latitude": -1.4 - i * 1e-6, "Longitude": -48.4 - i * 1e-6, "Territorio": "Belém",
+        "Status": "Pendente", "Notas": "Oportunidade", "WebsiteQuality": "good",
+        "Nota": 4.5, "Avaliacoes": i % 500, "Score": float(i % 100),
+    }
+
+
+def _medir(fn, repeticoes=0, preparar=None):
+    """
+    Benchmarks: roda fn() e devolve (resultado, melhor tempo, memoria, pico).
+    O tempo e o melhor de 'repeticoes' execucoes (None se 0); memoria e pico
+    vem do tracemalloc numa execucao a parte. 'preparar()' roda antes de
+    cada execucao (ex.: apagar os arquivos de saida).
+    """
+    import gc, tracemalloc
+
+    preparar = preparar or (lambda: None)
+    tempos = []
+    for _ in range(repeticoes):
+        preparar()
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    preparar()
+    gc.collect()
+    tracemalloc.start()
+    resultado = fn()
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, min(tempos) if tempos else None, atual, pico
+
+
+def benchmark(n=100_000):
+    # os textos/numeros sao os mesmos nos dois casos; a diferenca e o container
+    brutos = [_sintetico(i) for i in range(n)]
+    valores = [tuple(d.values()) for d in brutos]
+    del brutos
+
+    dicts, _, mem_dict, _ = _medir(lambda: [dict(zip(CHAVES_SCRAPER, v)) for v in valores])
+    regs, _, mem_reg, _   = _medir(lambda: [RegistroLead(*v) for v in valores])
+
+    t0 = time.perf_counter()
+    for r in regs:
+        r.para_firestore()
+    t_fs = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i, r in enumerate(regs):
+        r.para_leadflow(i + 1, "2026-01-01")
+    t_lf = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for d in dicts:
+        RegistroLead.de_scraper(d)
+    t_de = time.perf_counter() - t0
+
+    print(f"\nBENCHMARK REGISTRO DE LEAD ({n} leads, so o container; textos compartilhados):")
+    print(f"   list[dict]:          {mem_dict/1024/1024:7.1f} MB ({sys.getsizeof(dicts[0])} bytes/lead)")
+    print(f"   list[RegistroLead]:  {mem_reg/1024/1024:7.1f} MB ({sys.getsizeof(regs[0])} bytes/lead)")
+    print(f"   Economia:            {(1 - mem_reg/mem_dict)*100:.0f}%")
+    print(f"   de_scraper:          {t_de/n*1e6:.2f} us/lead")
+    print(f"   para_firestore:      {t_fs/n*1e6:.2f} us/lead")
+    print(f"   para_leadflow:       {t_lf/n*1e6:.2f} us/lead")
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,14 +1,35 @@
-import time, re, json, os, pandas as pd, traceback
+import collections, time, re, json, os, pandas as pd, traceback
+from contextlib import nullcontext
 import firebase_admin
 from firebase_admin import credentials, firestore
 from playwright.sync_api import sync_playwright
+from sondagem_sites import sondar_leads
+from filtro_existentes import atualizar_filtro, salvar_filtro
+from deduplicacao import deduplicar_df, imprimir_relatorio
+from links_maps import extrair_coordenadas, extrair_place_id
+from rastreamento_lentos import RastreadorLentos
+from pontuacao_leads import pontuar_lead, repontuar_df
+from registro_lead import RegistroLead, formatar_whatsapp
+from enriquecimento_leads import analisar_qualidade, qualidade_site_campo
+from log_firestore import gravar, gravar_lote, log_padrao
+from agregados_leads import ARQUIVO_RESUMO, ids_do_df, imprimir_totais, versao_arquivo, sincronizar as sincronizar_agregados
 
 # ================================================================
 # CONFIGURACOES
 # ================================================================
 PASTA_REACT        = "lead-compass"
 ARQUIVO_CSV        = "leads_paragominas.csv"
+ARQUIVO_EXECUCAO   = "leads_execucao.csv"   # leads desta execucao, gravados em streaming
 SERVICE_ACCOUNT_KEY = "serviceAccountKey.json"
+SONDAR_SITES       = True   # baixa cada site e classifica pela resposta real
+PULAR_EXISTENTES   = True   # pula empresas que ja estao no Firestore
+RASTREAR_LENTOS    = False  # salva trace do Playwright de leads lentos/com erro
+RECUPERACOES_MAXIMAS = 5    # reaberturas da busca por execucao (aba caiu, handles invalidos)
+ROLAGENS_RECUPERACAO = 10   # rolagens extras para reencontrar os cards restantes
+
+# por que extrair_lead_da_pagina voltou None
+MOTIVO_TIMEOUT       = "timeout"
+MOTIVO_NOME_INVALIDO = "nome invalido"
 
 # ================================================================
 # FIREBASE
@@ -26,6 +47,7 @@ def init_firebase():
         # Testa a conexao com uma leitura simples
         db.collection("leads").limit(1).get()
         print("Firebase: conexao OK!")
+        replay_pendentes(db)
         return db
     except Exception as e:
         print(f"Firebase ERRO na inicializacao: {type(e).__name__}: {e}")
@@ -33,68 +55,93 @@ def init_firebase():
         return None
 
 
-def salvar_no_firebase(db, lead):
-    if db is None:
-        print("   Firebase: desabilitado.")
-        return
-
-    try:
+def gerar_id_doc(lead):
+    """'lead' e o dict do scraper ou um RegistroLead."""
+    if isinstance(lead, RegistroLead):
+        empresa = "sem_nome" if lead.empresa is None else lead.empresa
+        cidade  = "belem" if lead.territorio is None else lead.territorio
+    else:
         empresa = lead.get("Empresa", "sem_nome")
         cidade  = lead.get("Territorio", "belem")
 
-        nome_limpo   = re.sub(r"[^a-z0-9]", "_", empresa.lower()).strip("_")
-        cidade_limpa = re.sub(r"[^a-z0-9]", "",  cidade.lower())
-        id_doc = (nome_limpo + "_" + cidade_limpa)[:120]
+    nome_limpo   = re.sub(r"[^a-z0-9]", "_", empresa.lower()).strip("_")
+    cidade_limpa = re.sub(r"[^a-z0-9]", "",  cidade.lower())
+    return (nome_limpo + "_" + cidade_limpa)[:120]
 
-        print(f"   Firebase: salvando '{id_doc}'...")
 
-        wpp = formatar_whatsapp(lead.get("WhatsApp"))
-
-        doc = {
-            "companyName":    empresa,
-            "niche":          lead.get("Nicho", ""),
-            "phone":          lead.get("WhatsApp", ""),
-            "website":        lead.get("Site", ""),
-            "instagram":      lead.get("Instagram", ""),
-            "googleMaps":     lead.get("Google_Maps", ""),
-            "territory":      cidade,
-            "stage":          "new",
-            "source":         "scraper",
-            "notes":          lead.get("Notas", ""),
-            "websiteQuality": lead.get("WebsiteQuality", "none"),
-            "whatsapp":       wpp,
-            "linkWhatsApp":   ("https://wa.me/" + wpp) if wpp else "",
-            "valor":          0,
-            "contactName":    "",
-            "email":          "",
-            "createdAt":      firestore.SERVER_TIMESTAMP,
-            "updatedAt":      firestore.SERVER_TIMESTAMP,
-        }
-
-        db.collection("leads").document(id_doc).set(doc, merge=True)
-        print(f"   Firebase: SALVO! (id: {id_doc})")
+def montar_doc_firebase(lead):
+    registro = lead if isinstance(lead, RegistroLead) else RegistroLead.de_scraper(lead)
+    doc = registro.para_firestore()
+    doc["createdAt"] = doc["updatedAt"] = doc["scrapedAt"] = firestore.SERVER_TIMESTAMP
+    return doc
+
+
+def replay_pendentes(db):
+    """Manda para o Firestore o que ficou no log enquanto estava sem conexao."""
+    log = log_padrao()
+    if db is None or not log.pendentes():
+        return
+    try:
+        gravados, restantes = log.replay(db)
+        print(f"Firebase: {gravados} documentos pendentes do log reenviados ({restantes} ainda pendentes).")
+    except Exception as e:
+        print(f"Firebase ERRO no replay do log: {type(e).__name__}: {e}")
+
+
+def salvar_no_firebase(db, lead):
+    # vai primeiro para o log local; sem conexao fica la para o replay
+    try:
+        id_doc = gerar_id_doc(lead)
+        if db is None:
+            gravar(None, "leads", id_doc, montar_doc_firebase(lead))
+            print(f"   Firebase: desabilitado, '{id_doc}' guardado no log para replay.")
+            return
+        print(f"   Firebase: salvando '{id_doc}'...")
+        if gravar(db, "leads", id_doc, montar_doc_firebase(lead)):
+            print(f"   Firebase: SALVO! (id: {id_doc})")
 
     except Exception as e:
         print(f"   Firebase ERRO ao salvar: {type(e).__name__}: {e}")
         traceback.print_exc()
 
+
+def atualizar_qualidade_firebase(db, leads):
+    if not leads:
+        return
+    try:
+        escritas = []
+        for lead in leads:
+            pontuar_lead(lead)  # a qualidade sondada muda o score
+            escritas.append(("leads", gerar_id_doc(lead), {
+                "websiteQuality": lead.get("WebsiteQuality", "none"),
+                "score":          lead.get("Score"),
+                "updatedAt":      firestore.SERVER_TIMESTAMP,
+            }))
+        gravadas = gravar_lote(db, escritas)
+        print(f"Firebase: websiteQuality e score atualizados em {gravadas}/{len(leads)} leads"
+              f"{'' if gravadas == len(leads) else ' (resto pendente no log)'}.")
+    except Exception as e:
+        print(f"Firebase ERRO ao atualizar qualidade: {type(e).__name__}: {e}")
+        traceback.print_exc()
+
 # ================================================================
 # HELPERS
 # ================================================================
 
-def formatar_whatsapp(tel_bruto):
-    if not tel_bruto or tel_bruto in ("Nao encontrado", "Nao encontrado"):
-        return None
-    num = re.sub(r"\D", "", str(tel_bruto))
-    if num.startswith("55"):
-        num = num[2:]
-    num = "55" + num
-    return num if len(num) >= 12 else None
-
-
 # alias para compatibilidade com pandas apply
 limpar_whatsapp = formatar_whatsapp
 
+
+def montar_url_busca(nicho, cidade, estado):
+    return (
+        "https://www.google.com.br/maps/search/"
+        + nicho.replace(" ", "+")
+        + "+em+"
+        + cidade.replace(" ", "+")
+        + ","
+        + estado
+    )
+
 # ================================================================
 # EXTRATORES PLAYWRIGHT
 # ================================================================
@@ -185,26 +232,6 @@ def extrair_instagram(page):
     return "Nao encontrado"
 
 
-def analisar_qualidade(site, instagram):
-    problemas = []
-    if site == "SEM SITE":
-        problemas.append("Sem site proprio")
-    elif "linktree" in site.lower() or "linktr.ee" in site.lower():
-        problemas.append("Usando Linktree ao inves de site")
-    if "nao encontrado" in instagram.lower():
-        problemas.append("Sem Instagram")
-    return "Oportunidade" if problemas else "Nao"
-
-
-def qualidade_site_campo(site):
-    if not site or site.upper() == "SEM SITE":
-        return "none"
-    ruins = ["linktree", "linktr.ee", "bio.link", "meulink.com", "beacons.ai", "sites.google.com"]
-    if any(r in site.lower() for r in ruins):
-        return "poor"
-    return "good"
-
-
 def scroll_lista_lateral(page, vezes=3):
     try:
         for _ in range(vezes):
@@ -230,130 +257,400 @@ def scroll_painel_detalhes(page, tentativas=4):
     except Exception as e:
         print(f"   Erro scroll painel: {e}")
 
+
+def fechar_banner_consentimento(page):
+    try:
+        btn = page.locator(
+            'button[aria-label*="Aceitar tudo"], button[aria-label*="Rejeitar tudo"]'
+        ).first
+        if btn.is_visible(timeout=5000):
+            btn.click()
+            time.sleep(2)
+            print("   Banner fechado.")
+    except:
+        pass
+
+
+def extrair_lead_da_pagina(page, nicho, cidade, motivo=None):
+    """
+    Le o painel de detalhes aberto e monta o lead (ou None). Se 'motivo'
+    (dict) for passado, recebe em motivo["motivo"] por que voltou None:
+    MOTIVO_TIMEOUT (pagina nao carregou) ou MOTIVO_NOME_INVALIDO (pulo normal).
+    """
+    motivo = motivo if motivo is not None else {}
+    try:
+        page.wait_for_selector("h1", timeout=5000)
+    except:
+        print("   Timeout titulo, pulando.")
+        motivo["motivo"] = MOTIVO_TIMEOUT
+        return None
+
+    nome = extrair_nome(page)
+    if not nome or "patrocinado" in nome.lower():
+        print("   Nome invalido, pulando.")
+        motivo["motivo"] = MOTIVO_NOME_INVALIDO
+        return None
+
+    print(f"   Empresa: {nome}")
+    scroll_painel_detalhes(page)
+
+    site      = extrair_site(page)
+    telefone  = extrair_telefone(page)
+    instagram = extrair_instagram(page)
+    analise   = analisar_qualidade(site, instagram)
+    lat, lng  = extrair_coordenadas(page.url, aceitar_viewport=False)
+
+    registro = RegistroLead(
+        empresa=nome, nicho=nicho, site=site, whatsapp=telefone, instagram=instagram,
+        google_maps=page.url, latitude=lat, longitude=lng, territorio=cidade,
+        status="Pendente", notas=analise, website_quality=qualidade_site_campo(site),
+    )
+
+    print(f"   Site:      {site}")
+    print(f"   WhatsApp:  {telefone}")
+    print(f"   Instagram: {instagram}")
+    print(f"   Analise:   {analise}")
+    return registro.para_scraper()
+
+
+def extrair_lead_por_url(page, url, nicho, cidade, motivo=None):
+    """Abre direto a pagina do lugar (sem busca) e extrai o lead."""
+    page.goto(url, wait_until="domcontentloaded")
+    fechar_banner_consentimento(page)
+    return extrair_lead_da_pagina(page, nicho, cidade, motivo)
+
 # ================================================================
 # SCRAPING PRINCIPAL
 # ================================================================
 
-def iniciar_prospeccao(nicho, cidade="Belém", estado="PA", max_leads=20, db=None):
-    leads_extraidos = []
-
+JS_LER_CARDS = """els => els.map(el => {
+    const a  = el.querySelector('a[href*="/maps/place/"]');
+    const h  = el.querySelector('div[class*="fontHeadlineSmall"]');
+    const nt = el.querySelector('span[role="img"][aria-label]');
+    return {
+        nome:  el.getAttribute('aria-label') || (a && a.getAttribute('aria-label')) || (h && h.innerText) || null,
+        link:  a ? a.href : null,
+        nota:  nt ? nt.getAttribute('aria-label') : null,
+        texto: el.innerText || ""
+    };
+})"""
+
+
+def interpretar_card(bruto, indice):
+    """Converte o que o navegador devolveu em metadados do card."""
+    patrocinado = "Patrocinado" in bruto["texto"] or "Sponsored" in bruto["texto"]
+    linhas = [l.strip() for l in bruto["texto"].split("\n")
+              if l.strip() and l.strip() not in ("Patrocinado", "Sponsored")]
+    nome   = (bruto["nome"] or (linhas[0] if linhas else "")).strip() or None
+    nota   = re.search(r"(\d[.,]\d)", bruto["nota"] or "")
+    aval   = re.search(r"([\d.]+)\s*(?:avalia|review)", bruto["nota"] or "", re.I) \
+             or re.search(r"\(([\d.]+)\)", bruto["texto"])
+    categoria = None
+    for l in linhas[1:]:
+        partes = [p.strip() for p in l.split("·")]
+        if len(partes) > 1 and partes[0] and not re.match(r"^[\d.,()\s]+$", partes[0]):
+            categoria = partes[0]
+            break
+    return {
+        "indice":      indice,
+        "patrocinado": patrocinado,
+        "nome":        nome,
+        "nota":        float(nota.group(1).replace(",", ".")) if nota else None,
+        "avaliacoes":  int(aval.group(1).replace(".", "")) if aval else None,
+        "categoria":   categoria,
+        "link":        bruto["link"],
+        "place_id":    extrair_place_id(bruto["link"]) if bruto["link"] else None,
+    }
+
+
+def ler_cards(page):
+    """
+    Le todos os cards da lista em uma so ida ao navegador: patrocinado,
+    nome, nota, categoria e link do lugar, na ordem da lista.
+    """
+    brutos = page.eval_on_selector_all('div[role="article"]', JS_LER_CARDS)
+    return [interpretar_card(b, i) for i, b in enumerate(brutos)]
+
+
+ERROS_DE_PAGINA = [
+    "target closed", "has been closed", "page crashed", "not attached to the dom",
+    "element is detached", "execution context was destroyed", "frame was detached",
+]
+
+
+def chave_card(meta):
+    """Identifica o card entre recargas da busca: place id, senao o nome."""
+    return meta["place_id"] or ("nome:" + meta["nome"] if meta["nome"] else f"indice:{meta['indice']}")
+
+
+def card_confere(page, meta):
+    """O painel aberto e o do card esperado? Sem place id no card nao da para conferir."""
+    return meta["place_id"] is None or extrair_place_id(page.url) == meta["place_id"]
+
+
+def pagina_quebrada(page, erro=None, exigir_lista=True):
+    """
+    True se a aba caiu/fechou, o erro e de handle invalido, ou (com
+    'exigir_lista') a lista de resultados sumiu da pagina.
+    """
+    if erro is not None and any(t in str(erro).lower() for t in ERROS_DE_PAGINA):
+        return True
+    try:
+        if page.is_closed():
+            return True
+        return exigir_lista and page.locator('div[role="article"]').count() == 0
+    except Exception:
+        return True
+
+
+def abrir_busca(page, url, alvos=None, rolagens_extras=ROLAGENS_RECUPERACAO):
+    """
+    Abre a busca, rola a lista e devolve os metadados dos cards (None se
+    os resultados nao carregaram). Com 'alvos' (chaves de cards) continua
+    rolando ate encontrar todos ou a lista parar de crescer.
+    """
+    page.goto(url, wait_until="domcontentloaded")
+    fechar_banner_consentimento(page)
+    try:
+        page.wait_for_selector('div[role="article"]', timeout=15000)
+    except:
+        return None
+    time.sleep(3)
+    scroll_lista_lateral(page, vezes=3)
+    metas = ler_cards(page)
+    for _ in range(rolagens_extras if alvos else 0):
+        if alvos <= {chave_card(m) for m in metas}:
+            break
+        antes = len(metas)
+        scroll_lista_lateral(page, vezes=2)
+        metas = ler_cards(page)
+        if len(metas) == antes:
+            break
+    return metas
+
+
+def iter_leads(nicho, cidade="Belém", estado="PA", max_leads=20, conhecidos=None, governador=None,
+               rastrear_lentos=RASTREAR_LENTOS, recuperacoes_maximas=RECUPERACOES_MAXIMAS):
+    """
+    Gera cada lead assim que ele e extraido. Os cards sao lidos um a um
+    (handle descartado logo apos o uso), entao a memoria nao cresce com
+    max_leads e quem consome pode persistir lead a lead.
+    'conhecidos' (set ou FiltroBloom de ids) faz pular empresas ja salvas.
+    'governador' (GovernadorTaxa) dita o ritmo e pausa ao detectar bloqueio.
+    'rastrear_lentos' salva o trace do Playwright so dos leads lentos ou com erro.
+    Se a aba cair ou os handles ficarem invalidos, a busca e reaberta numa
+    aba nova e os cards restantes sao reencontrados pelo place id, ate
+    'recuperacoes_maximas' vezes por execucao.
+    """
     with sync_playwright() as p:
         print("\n" + "="*60)
         print("CLICK FACIL - PROSPECCAO INTELIGENTE")
         print("="*60)
         print(f"Cidade: {cidade} | Nicho: {nicho} | Meta: {max_leads}")
-        print(f"Firebase: {'Ativo' if db else 'Desabilitado'}")
         print("="*60 + "\n")
 
         browser = p.chromium.launch(headless=False, slow_mo=50)
         ctx     = browser.new_context(viewport={"width": 1400, "height": 900}, locale="pt-BR")
         page    = ctx.new_page()
+        rastreador = RastreadorLentos(ctx) if rastrear_lentos else None
+        caiu    = {"aba": False}
+        page.on("crash", lambda _: caiu.update(aba=True))
 
-        url = (
-            "https://www.google.com.br/maps/search/"
-            + nicho.replace(" ", "+")
-            + "+em+"
-            + cidade.replace(" ", "+")
-            + ","
-            + estado
-        )
-        print("Acessando Google Maps...")
-        page.goto(url, wait_until="domcontentloaded")
-
-        # Banner de consentimento
         try:
-            btn = page.locator(
-                'button[aria-label*="Aceitar tudo"], button[aria-label*="Rejeitar tudo"]'
-            ).first
-            if btn.is_visible(timeout=5000):
-                btn.click()
-                time.sleep(2)
-                print("   Banner fechado.")
-        except:
-            pass
-
-        try:
-            page.wait_for_selector('div[role="article"]', timeout=15000)
+            url = montar_url_busca(nicho, cidade, estado)
+            print("Acessando Google Maps...")
+            metas = abrir_busca(page, url)
+            if metas is None:
+                print("ERRO: timeout nos resultados")
+                if governador is not None:
+                    governador.falha(page)
+                return
             print("Pagina carregada!")
-        except:
-            print("ERRO: timeout nos resultados")
-            browser.close()
-            return []
-
-        time.sleep(3)
-        scroll_lista_lateral(page, vezes=3)
 
-        todos = page.query_selector_all('div[role="article"]')
-        print(f"{len(todos)} cards encontrados.")
-
-        # Remove patrocinados
-        validos = []
-        for c in todos:
-            try:
-                if "Patrocinado" in c.inner_text():
+            cards = page.locator('div[role="article"]')
+            total = len(metas)
+            print(f"{total} cards encontrados. Meta: {max_leads}.\n" + "="*60 + "\n")
+
+            # idas ao navegador: o loop antigo fazia element_handle + inner_text
+            # (+ aria-label com 'conhecidos') por card visitado; agora e uma
+            # leitura para a lista toda + um element_handle por card clicado.
+            idas_antes   = 1
+            idas_agora   = 1
+            fila         = collections.deque(metas)
+            tratados     = set()
+            tentativas   = collections.Counter()
+            recuperacoes = 0
+            perdidos     = 0
+            extraidos    = 0
+            invalidos    = 0
+            realocados   = 0
+            desalinhados = 0
+
+            def recuperar(meta_atual, motivo):
+                """Reabre a busca numa aba nova e refaz a fila pelo place id."""
+                nonlocal page, cards, fila, recuperacoes, perdidos
+                recuperacoes += 1
+                print(f"   Aba invalida ({motivo}), reabrindo a busca "
+                      f"({recuperacoes}/{recuperacoes_maximas})...")
+                pendentes = [m for m in fila if chave_card(m) not in tratados]
+                chave = chave_card(meta_atual)
+                tentativas[chave] += 1
+                if tentativas[chave] == 1:
+                    tratados.discard(chave)
+                    pendentes.insert(0, meta_atual)
+                while True:
+                    # logo depois de uma queda a reabertura tambem pode falhar:
+                    # cada falha gasta uma recuperacao, e sem orcamento a execucao
+                    # termina normalmente (quem consome ainda salva o que veio)
+                    try:
+                        try:
+                            page.close()
+                        except Exception:
+                            pass
+                        page = ctx.new_page()
+                        caiu["aba"] = False
+                        page.on("crash", lambda _: caiu.update(aba=True))
+                        with (governador.vaga() if governador is not None else nullcontext()):
+                            novas = abrir_busca(page, url, alvos={chave_card(m) for m in pendentes})
+                        break
+                    except Exception as e:
+                        print(f"   Falha ao reabrir a busca: {type(e).__name__}: {(str(e).splitlines() or [''])[0][:80]}")
+                        if governador is not None:
+                            governador.falha(page)
+                        if recuperacoes >= recuperacoes_maximas:
+                            print(f"   Orcamento de {recuperacoes_maximas} recuperacoes esgotado, parando.")
+                            fila = collections.deque()
+                            return False
+                        recuperacoes += 1
+                        print(f"   Nova tentativa ({recuperacoes}/{recuperacoes_maximas})...")
+                if novas is None:
+                    print("   Busca nao recarregou.")
+                    fila = collections.deque()
+                    return False
+                por_chave = {chave_card(m): m for m in novas}
+                fila  = collections.deque(por_chave[chave_card(m)] for m in pendentes if chave_card(m) in por_chave)
+                cards = page.locator('div[role="article"]')
+                perdidos += len(pendentes) - len(fila)
+                print(f"   Busca reaberta: {len(fila)} cards restantes reencontrados.")
+                return True
+
+            while fila and extraidos < max_leads:
+                meta  = fila.popleft()
+                chave = chave_card(meta)
+                if chave in tratados:
+                    continue
+                tratados.add(chave)
+                i = meta["indice"]
+                idas_antes += 2
+                if meta["patrocinado"]:
                     continue
-                validos.append(c)
-            except:
-                validos.append(c)
 
-        meta = min(max_leads, len(validos))
-        print(f"{len(validos)} empresas organicas. Processando {meta}.\n" + "="*60 + "\n")
-
-        for i, card in enumerate(validos[:meta], 1):
-            try:
-                print(f"\n[{i}/{meta}] Processando...")
-                card.click()
-                time.sleep(2)
+                if conhecidos is not None:
+                    idas_antes += 1
+                    if meta["nome"] and gerar_id_doc({"Empresa": meta["nome"], "Territorio": cidade}) in conhecidos:
+                        print(f"   Ja existe: {meta['nome']}, pulando.")
+                        continue
 
+                card = None
                 try:
-                    page.wait_for_selector("h1", timeout=5000)
-                except:
-                    print("   Timeout titulo, pulando.")
-                    continue
+                    if caiu["aba"]:
+                        raise RuntimeError("page crashed")
+                    idas_agora += 1
+                    card = cards.nth(i).element_handle(timeout=5000)
+
+                    print(f"\n[{extraidos + 1}/{max_leads}] Processando card {i + 1}/{total}: {meta['nome']}"
+                          + (f" ({meta['categoria']}, {meta['nota']})" if meta["categoria"] else ""))
+                    motivo = {}
+                    with (governador.vaga() if governador is not None else nullcontext()):
+                        # o tempo do lead comeca com a vaga ja concedida: espera/pausa
+                        # do governador nao e lentidao do lead
+                        with (rastreador.lead(f"{nicho} card {i + 1}") if rastreador is not None else nullcontext({})) as registro:
+                            card.click()
+                            time.sleep(2)
+                            confere = card_confere(page, meta)
+                            if not confere:
+                                # a lista mudou desde o ler_cards: acha o card pelo place id
+                                idas_agora += 1
+                                atual = next((m["indice"] for m in ler_cards(page)
+                                              if m["place_id"] == meta["place_id"]), None)
+                                if atual is not None and atual != i:
+                                    card.dispose()
+                                    idas_agora += 1
+                                    card = cards.nth(atual).element_handle(timeout=5000)
+                                    card.click()
+                                    time.sleep(2)
+                                    confere = card_confere(page, meta)
+                                if confere:
+                                    realocados += 1
+                                else:
+                                    desalinhados += 1
+                                    print(f"   AVISO: painel aberto nao e o de '{meta['nome']}' (card nao reencontrado).")
+                            lead = extrair_lead_da_pagina(page, nicho, cidade, motivo)
+                            if lead is None and motivo.get("motivo") != MOTIVO_NOME_INVALIDO:
+                                registro["erro"] = "extracao sem resultado"
+
+                    if lead is None:
+                        # nome invalido/patrocinado e pulo normal, nao sinal de lentidao
+                        if motivo.get("motivo") == MOTIVO_NOME_INVALIDO:
+                            invalidos += 1
+                        elif governador is not None:
+                            governador.falha(page)
+                        continue
+
+                    if governador is not None:
+                        governador.sucesso()
+                    if confere:
+                        # nota/avaliacoes vem do card: so valem se o painel e dele
+                        lead["Nota"]       = meta["nota"]
+                        lead["Avaliacoes"] = meta["avaliacoes"]
+                    pontuar_lead(lead)
+                    extraidos += 1
+                    if conhecidos is not None:
+                        conhecidos.add(gerar_id_doc(lead))
+                    print("   Lead capturado!")
+                    yield lead
+                    time.sleep(1)
+
+                except Exception as e:
+                    if not (caiu["aba"] or pagina_quebrada(page, e)):
+                        print(f"   ERRO card {i + 1}: {e}")
+                        traceback.print_exc()
+                        continue
+                    if governador is not None:
+                        governador.falha(page)
+                    if recuperacoes >= recuperacoes_maximas:
+                        print(f"   Aba invalida e orcamento de {recuperacoes_maximas} recuperacoes esgotado, parando.")
+                        break
+                    recuperar(meta, f"{type(e).__name__}: {str(e).splitlines()[0][:80]}")
+                finally:
+                    if card is not None:
+                        try:
+                            card.dispose()
+                        except:
+                            pass
+
+            # idas_agora e contado; idas_antes e estimado (2-3 por card no loop antigo)
+            print(f"\nIdas ao navegador na lista: {idas_agora} (loop antigo, estimado: {idas_antes}; "
+                  f"economia estimada: {idas_antes - idas_agora})")
+            if realocados or desalinhados:
+                print(f"Cards que mudaram de posicao: {realocados} reencontrados pelo place id, "
+                      f"{desalinhados} nao")
+            if invalidos:
+                print(f"Cards pulados por nome invalido: {invalidos}")
+            if recuperacoes:
+                print(f"Recuperacoes de aba: {recuperacoes} ({perdidos} cards nao reencontrados)")
+        finally:
+            if rastreador is not None:
+                rastreador.fechar()
+            browser.close()
 
-                nome = extrair_nome(page)
-                if not nome or "patrocinado" in nome.lower():
-                    print("   Nome invalido, pulando.")
-                    continue
 
-                print(f"   Empresa: {nome}")
-                scroll_painel_detalhes(page)
-
-                site      = extrair_site(page)
-                telefone  = extrair_telefone(page)
-                instagram = extrair_instagram(page)
-                analise   = analisar_qualidade(site, instagram)
-
-                lead = {
-                    "Empresa":        nome,
-                    "Nicho":          nicho,
-                    "Site":           site,
-                    "WhatsApp":       telefone,
-                    "Instagram":      instagram,
-                    "Google_Maps":    page.url,
-                    "Territorio":     cidade,
-                    "Status":         "Pendente",
-                    "Notas":          analise,
-                    "WebsiteQuality": qualidade_site_campo(site),
-                }
-
-                leads_extraidos.append(lead)
-                print(f"   Site:      {site}")
-                print(f"   WhatsApp:  {telefone}")
-                print(f"   Instagram: {instagram}")
-                print(f"   Analise:   {analise}")
-
-                salvar_no_firebase(db, lead)
-
-                print("   Lead capturado!")
-                time.sleep(1)
-
-            except Exception as e:
-                print(f"   ERRO lead {i}: {e}")
-                traceback.print_exc()
-                continue
-
-        browser.close()
+def iniciar_prospeccao(nicho, cidade="Belém", estado="PA", max_leads=20, db=None, conhecidos=None, governador=None):
+    print(f"Firebase: {'Ativo' if db else 'Desabilitado'}")
+    leads_extraidos = []
+    for lead in iter_leads(nicho, cidade, estado, max_leads, conhecidos, governador):
+        salvar_no_firebase(db, lead)
+        leads_extraidos.append(lead)
 
     print("\n" + "="*60)
     print(f"FINALIZADO! Total: {len(leads_extraidos)} leads")
@@ -364,6 +661,28 @@ def iniciar_prospeccao(nicho, cidade="Belém", estado="PA", max_leads=20, db=Non
 # SALVAR CSV + JSON
 # ================================================================
 
+def delta_da_mescla(df_final, df_antigo):
+    """
+    Tira do df_final as colunas de marcacao '_novo'/'_linha' e devolve
+    (alterados, removidos): mascara das linhas novas ou mudadas pela
+    mescla, e as posicoes do df_antigo que a deduplicacao juntou em outras.
+    """
+    novo  = df_final.pop("_novo").eq(True)
+    # a mescla preenche campos vazios da linha nova com os da antiga, '_linha' inclusive
+    linha = df_final.pop("_linha").where(~novo) if "_linha" in df_final.columns else pd.Series(index=df_final.index, dtype=float)
+    alterados = novo.copy()
+    velhos = linha.notna()
+    if velhos.any():
+        depois = df_final[velhos]
+        antes  = df_antigo.iloc[linha[velhos].astype(int)].reindex(columns=depois.columns)
+        antes.index = depois.index
+        igual = (antes == depois) | (antes.isna() & depois.isna())
+        alterados[velhos] = ~igual.all(axis=1)
+    sobreviventes = set(linha.dropna().astype(int))
+    removidos = [k for k in range(len(df_antigo)) if k not in sobreviventes] if df_antigo is not None else []
+    return alterados.to_numpy(), removidos
+
+
 def sincronizar_local(leads, cidade="Belém"):
     if not leads:
         print("Nenhum lead extraido.")
@@ -376,7 +695,9 @@ def sincronizar_local(leads, cidade="Belém"):
         lambda x: ("https://wa.me/" + (limpar_whatsapp(x) or "")) if limpar_whatsapp(x) else None
     )
 
-    df_final = df_novo  # default: so novos leads
+    df_final = df_novo.assign(_novo=True)  # default: so novos leads
+    df_antigo = None
+    versao_base = versao_arquivo(ARQUIVO_CSV)
 
     if os.path.exists(ARQUIVO_CSV):
         try:
@@ -385,37 +706,53 @@ def sincronizar_local(leads, cidade="Belém"):
                 df_antigo = pd.read_csv(ARQUIVO_CSV, encoding="utf-8-sig")
                 if not df_antigo.empty and "Empresa" in df_antigo.columns:
                     print(f"   {len(df_antigo)} leads existentes no CSV")
-                    df_final = pd.concat([df_antigo, df_novo], ignore_index=True)
-                    df_final = df_final.drop_duplicates(subset=["Empresa"], keep="last")
+                    # as marcas sobrevivem a mescla: o registro mais recente do cluster e a base
+                    df_final = pd.concat([df_antigo.assign(_linha=range(len(df_antigo))),
+                                          df_novo.assign(_novo=True)], ignore_index=True)
+                    df_final, relatorio = deduplicar_df(df_final)
+                    imprimir_relatorio(relatorio)
                     print(f"   Apos mescla: {len(df_final)} leads")
                 else:
+                    df_antigo = None
                     print("   CSV existente invalido, recriando.")
             else:
                 print("   CSV vazio, recriando.")
         except Exception as e:
+            df_antigo = None
+            df_final  = df_novo.assign(_novo=True)
             print(f"   Erro ao ler CSV ({e}), usando so novos leads.")
     else:
         print(f"   Criando novo CSV com {len(df_final)} leads")
 
+    alterados, removidos = delta_da_mescla(df_final, df_antigo)
+    df_final, repontuados = repontuar_df(df_final, alterados)
+    print(f"   Score recalculado em {repontuados} leads")
+
     df_final.to_csv(ARQUIVO_CSV, index=False, encoding="utf-8-sig")
     print(f"CSV salvo: {ARQUIVO_CSV}")
 
+    try:
+        # pyarrow e opcional: sem ele fica so o CSV
+        from snapshots_colunares import salvar_snapshot
+
+        salvar_snapshot(df_novo, cidade)
+    except Exception as e:
+        print(f"   Erro ao salvar snapshot ({e}), seguindo so com o CSV.")
+
     caminho_json = os.path.join(PASTA_REACT, "src", "data", "leads.json")
     os.makedirs(os.path.dirname(caminho_json), exist_ok=True)
     with open(caminho_json, "w", encoding="utf-8") as f:
         json.dump(df_final.to_dict(orient="records"), f, ensure_ascii=False, indent=2)
     print(f"JSON salvo: {caminho_json}")
 
-    sem_site      = len(df_final[df_final["Site"].str.contains("SEM SITE", na=False)])
-    sem_insta     = len(df_final[df_final["Instagram"].str.contains("encontrado", case=False, na=False)])
-    oportunidades = len(df_final[df_final["Notas"] == "Oportunidade"])
-    total         = len(df_final)
-
-    print(f"\nESTATISTICAS:")
-    print(f"   Total:         {total}")
-    print(f"   Sem site:      {sem_site} ({sem_site/total*100:.1f}%)")
-    print(f"   Sem Instagram: {sem_insta} ({sem_insta/total*100:.1f}%)")
-    print(f"   Oportunidades: {oportunidades} ({oportunidades/total*100:.1f}%)\n")
+    # agregados: so o delta (linhas novas/mescladas entram, as juntadas saem)
+    ids_removidos = ids_do_df(df_antigo.iloc[removidos]) if removidos else []
+    agregados = sincronizar_agregados(df_final, alterados, ids_removidos,
+                                      origem=ARQUIVO_CSV, versao_base=versao_base)
+    caminho_resumo = os.path.join(PASTA_REACT, ARQUIVO_RESUMO)
+    agregados.exportar(caminho_resumo)
+    print(f"Resumo salvo: {caminho_resumo}")
+    imprimir_totais(agregados.totais())
 
 # ================================================================
 # EXECUCAO
@@ -427,6 +764,27 @@ if __name__ == "__main__":
     ESTADO    = "PA"
     MAX_LEADS = 20
 
-    db    = init_firebase()
-    leads = iniciar_prospeccao(NICHO, CIDADE, ESTADO, MAX_LEADS, db)
-    sincronizar_local(leads, CIDADE)
\ No newline at end of file
+    from destinos_leads import DestinoCSV, DestinoFirestore, processar_stream
+
+    db     = init_firebase()
+    filtro = atualizar_filtro(db, CIDADE) if (db and PULAR_EXISTENTES) else None
+    # cada lote vai para o CSV da execucao e para o Firestore na hora; um
+    # crash no meio deixa os ja extraidos no arquivo, e a proxima execucao
+    # continua acrescentando nele ate o sincronizar_local dar certo
+    print(f"Firebase: {'Ativo' if db else 'Desabilitado'}")
+    total = processar_stream(iter_leads(NICHO, CIDADE, ESTADO, MAX_LEADS, filtro),
+                             [DestinoCSV(ARQUIVO_EXECUCAO), DestinoFirestore(db)])
+    print(f"\nFINALIZADO! Total: {total} leads")
+    if filtro is not None:
+        salvar_filtro(filtro, CIDADE)
+
+    leads = []
+    if os.path.exists(ARQUIVO_EXECUCAO):
+        execucao = pd.read_csv(ARQUIVO_EXECUCAO, encoding="utf-8-sig").drop(columns=["Link_WhatsApp"], errors="ignore")
+        leads = execucao.astype(object).where(execucao.notna(), None).to_dict(orient="records")
+    if SONDAR_SITES and leads:
+        sondar_leads(leads)
+        atualizar_qualidade_firebase(db, leads)
+    sincronizar_local(leads, CIDADE)
+    if leads:
+        os.remove(ARQUIVO_EXECUCAO)
@@ -0,0 +1,205 @@
+"""
+SNAPSHOTS COLUNARES
+Cada execucao do scraper grava tambem um snapshot Parquet (zstd) dos
+leads extraidos, particionado por territorio e data, com as colunas de
+baixa cardinalidade (Nicho, Territorio, Status, Notas, WebsiteQuality)
+como categoricas. O carregador le so as colunas e particoes pedidas, em
+vez de carregar o CSV inteiro com pd.read_csv.
+
+Como rodar:
+    python snapshots_colunares.py importar leads_paragominas.csv Paragominas
+    python snapshots_colunares.py benchmark leads_paragominas.csv
+"""
+
+import os, sys, time
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+PASTA_HISTORICO = "historico"
+COMPRESSAO      = "zstd"
+
+COLUNAS_TEXTO = ["Empresa", "Site", "WhatsApp", "Instagram", "Google_Maps", "Link_WhatsApp"]
+COLUNAS_CATEGORICAS = ["Nicho", "Status", "Notas", "WebsiteQuality"]
+COLUNAS_NUMERICAS = ["Latitude", "Longitude", "Nota", "Avaliacoes", "Score"]
+PARTICOES = ["Territorio", "Data"]
+
+# ================================================================
+# ESCRITA
+# ================================================================
+
+def preparar_snapshot(df, cidade, quando=None):
+    quando = quando or datetime.now()
+    snap = pd.DataFrame(index=df.index)
+    for c in COLUNAS_TEXTO:
+        snap[c] = df[c].astype("string") if c in df.columns else pd.Series(pd.NA, index=df.index, dtype="string")
+    for c in COLUNAS_CATEGORICAS:
+        col = df[c] if c in df.columns else pd.Series(pd.NA, index=df.index)
+        snap[c] = col.astype("string").astype("category")
+    for c in COLUNAS_NUMERICAS:
+        # sempre float64: um snapshot so com inteiros nao pode virar int64 no Parquet
+        snap[c] = pd.to_numeric(df[c], errors="coerce").astype("float64") if c in df.columns else float("nan")
+    terr = df["Territorio"] if "Territorio" in df.columns else pd.Series(cidade, index=df.index)
+    snap["Territorio"] = terr.fillna(cidade).astype("string")
+    snap["Data"]       = quando.strftime("%Y-%m-%d")
+    snap["ColetadoEm"] = pd.Timestamp(quando)
+    return snap.reset_index(drop=True)
+
+
+def salvar_snapshot(df, cidade, pasta=PASTA_HISTORICO, quando=None):
+    """Acrescenta um snapshot particionado; nunca reescreve arquivos antigos."""
+    if df is None or df.empty:
+        return
+    quando = quando or datetime.now()
+    tabela = pa.Table.from_pandas(preparar_snapshot(df, cidade, quando), preserve_index=False)
+    pq.write_to_dataset(
+        tabela,
+        root_path=pasta,
+        partition_cols=PARTICOES,
+        basename_template="run-" + quando.strftime("%H%M%S%f") + "-{i}.parquet",
+        compression=COMPRESSAO,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    print(f"Snapshot salvo em '{pasta}' ({len(df)} leads, {cidade}, {quando:%Y-%m-%d})")
+
+# ================================================================
+# LEITURA
+# ================================================================
+
+def carregar_historico(colunas=None, territorios=None, desde=None, ate=None, pasta=PASTA_HISTORICO):
+    """
+    Le o historico lendo apenas as colunas e particoes necessarias.
+    'desde'/'ate' sao strings 'AAAA-MM-DD'. As categoricas voltam como
+    pandas.Categorical.
+    """
+    if not os.path.isdir(pasta):
+        return pd.DataFrame(columns=colunas or [])
+
+    esquema_part = ds.partitioning(
+        pa.schema([("Territorio", pa.string()), ("Data", pa.string())]), flavor="hive"
+    )
+    dataset = ds.dataset(pasta, format="parquet", partitioning=esquema_part)
+
+    filtro = None
+    if territorios:
+        filtro = ds.field("Territorio").isin(list(territorios))
+    if desde:
+        f = ds.field("Data") >= desde
+        filtro = f if filtro is None else filtro & f
+    if ate:
+        f = ds.field("Data") <= ate
+        filtro = f if filtro is None else filtro & f
+
+    # o ds.dataset pega o esquema do primeiro arquivo; snapshots antigos podem
+    # ter Score int64, coluna so nula etc. Junta os esquemas dos arquivos lidos.
+    fragmentos = list(dataset.get_fragments(filter=filtro))
+    if not fragmentos:
+        return pd.DataFrame(columns=colunas or [])
+    esquema = pa.unify_schemas(
+        [f.physical_schema for f in fragmentos] + [esquema_part.schema],
+        promote_options="permissive",
+    )
+    tabela = dataset.replace_schema(esquema).to_table(columns=colunas, filter=filtro)
+    df = tabela.to_pandas()
+    for c in ("Territorio", "Data"):
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def importar_csv(caminho_csv, cidade, pasta=PASTA_HISTORICO):
+    """Converte um CSV antigo num snapshot (util para migrar o historico)."""
+    df = pd.read_csv(caminho_csv, encoding="utf-8-sig", dtype=str)
+    quando = datetime.fromtimestamp(os.path.getmtime(caminho_csv))
+    salvar_snapshot(df, cidade, pasta, quando)
+
+# ================================================================
+# BENCHMARK
+# ================================================================
+
+def _agrupar_csv(caminho):
+    df = pd.read_csv(caminho, encoding="utf-8-sig")
+    return df.groupby(["Nicho", "WebsiteQuality"], dropna=False).size()
+
+
+def _agrupar_parquet(pasta):
+    df = carregar_historico(["Nicho", "WebsiteQuality"], pasta=pasta)
+    return df.groupby(["Nicho", "WebsiteQuality"], observed=True, dropna=False).size()
+
+
+def _rss_atual_kb():
+    """RSS atual em KB (Linux); None onde nao ha /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _medir_no_filho(fn, arg, saida):
+    """
+    Roda num processo novo: o pico de RSS (ru_maxrss) conta a memoria do
+    Arrow, que o tracemalloc nao ve, e o pico do pool do Arrow mostra
+    quanto disso e buffer colunar.
+    """
+    import resource
+
+    base = _rss_atual_kb() or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    fn(arg)
+    dt = time.perf_counter() - t0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    saida.put((dt, (pico - base) / 1024, pa.default_memory_pool().max_memory() / 1e6))
+
+
+def benchmark(caminho_csv, copias=365, pasta="historico_benchmark"):
+    """Compara CSV x Parquet para 'copias' execucoes (um ano diario)."""
+    import multiprocessing, shutil
+
+    base = pd.read_csv(caminho_csv, encoding="utf-8-sig", dtype=str)
+    grande = pd.concat([base] * copias, ignore_index=True)
+    csv_tmp = pasta + ".csv"
+    grande.to_csv(csv_tmp, index=False, encoding="utf-8-sig")
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    for d in range(copias):
+        salvar_snapshot(base, "Benchmark", pasta, datetime(2025, 1, 1) + pd.Timedelta(days=d))
+
+    ctx = multiprocessing.get_context("spawn")
+
+    def medir(fn, arg):
+        saida = ctx.Queue()
+        p = ctx.Process(target=_medir_no_filho, args=(fn, arg, saida))
+        p.start()
+        r = saida.get()
+        p.join()
+        return r
+
+    t_csv, m_csv, a_csv = medir(_agrupar_csv, csv_tmp)
+    t_pq,  m_pq,  a_pq  = medir(_agrupar_parquet, pasta)
+
+    tam_pq = sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(pasta) for f in fs)
+    print(f"\nBENCHMARK ({len(grande)} linhas, {copias} execucoes; pico de RSS acima do processo ja importado):")
+    print(f"   CSV:     {t_csv:.2f}s  pico RSS {m_csv:.0f} MB (Arrow {a_csv:.0f} MB)  disco {os.path.getsize(csv_tmp)/1e6:.1f} MB")
+    print(f"   Parquet: {t_pq:.2f}s  pico RSS {m_pq:.0f} MB (Arrow {a_pq:.0f} MB)  disco {tam_pq/1e6:.1f} MB")
+
+    os.remove(csv_tmp)
+    shutil.rmtree(pasta, ignore_errors=True)
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "benchmark"
+    arquivo = sys.argv[2] if len(sys.argv) > 2 else "leads_paragominas.csv"
+
+    if comando == "importar":
+        importar_csv(arquivo, sys.argv[3] if len(sys.argv) > 3 else "Paragominas")
+    else:
+        benchmark(arquivo)
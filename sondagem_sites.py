@@ -0,0 +1,249 @@
+"""
+SONDAGEM DE SITES
+Baixa o 'Site' de cada lead uma unica vez (cliente HTTP com pool e
+concorrencia limitada) e mede status, redirecionamentos, TTFB, tempo
+total, peso da pagina, HTTPS e meta viewport. Os resultados ficam em
+cache com TTL para que novas execucoes nao baixem tudo de novo.
+
+Falha de rede (timeout, DNS, conexao recusada) ou resposta de erro do
+servidor nao quer dizer que o lead nao tem site: isso vira
+'indeterminado', que nunca sobrescreve o WebsiteQuality do lead e fica
+em cache so por CACHE_TTL_ERRO_HORAS.
+
+Como rodar (grava o WebsiteQuality sondado de volta no CSV):
+    python sondagem_sites.py leads_paragominas.csv
+"""
+
+import asyncio, json, os, re, ssl, sys, time
+
+# ================================================================
+# CONFIGURACOES
+# ================================================================
+ARQUIVO_CACHE     = "cache_sondagem_sites.json"
+CACHE_TTL_HORAS   = 72
+CACHE_TTL_ERRO_HORAS = 1    # sondagem que falhou e tentada de novo logo
+CONCORRENCIA      = 100
+TIMEOUT_SEGUNDOS  = 15
+LIMITE_LENTO_SEG  = 4.0
+LIMITE_PESADO_MB  = 5.0     # a leitura para logo depois de passar disso
+USER_AGENT        = (
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Mobile Safari/537.36"
+)
+
+HOSTS_RUINS = ["linktree", "linktr.ee", "bio.link", "meulink.com", "beacons.ai", "sites.google.com"]
+RE_VIEWPORT = re.compile(rb"<meta[^>]+name\s*=\s*[\"']?viewport", re.IGNORECASE)
+
+INDETERMINADO = "indeterminado"   # a sondagem falhou; nao diz nada sobre o site
+
+# ================================================================
+# CACHE
+# ================================================================
+
+def carregar_cache(caminho=ARQUIVO_CACHE):
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"AVISO: cache de sondagem invalido ({e}), ignorando.")
+        return {}
+
+
+def salvar_cache(cache, caminho=ARQUIVO_CACHE):
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, caminho)
+
+
+def falhou(sondagem):
+    """Sondagem sem resposta util (erro de rede ou do servidor), exceto TLS invalido."""
+    if not sondagem or sondagem.get("tlsInvalido"):
+        return False
+    return bool(sondagem.get("erro")) or not sondagem.get("status") or sondagem["status"] >= 400
+
+
+def cache_valido(entrada, ttl_horas=CACHE_TTL_HORAS, ttl_erro_horas=CACHE_TTL_ERRO_HORAS):
+    if not entrada:
+        return False
+    ttl = min(ttl_horas, ttl_erro_horas) if falhou(entrada) else ttl_horas
+    return (time.time() - entrada.get("sondadoEm", 0)) < ttl * 3600
+
+# ================================================================
+# SONDAGEM
+# ================================================================
+
+def normalizar_url(site):
+    if not site or not isinstance(site, str):
+        return None
+    site = site.strip()
+    if not site or site.upper().startswith("SEM SITE"):
+        return None
+    if not re.match(r"^https?://", site, re.IGNORECASE):
+        site = "http://" + site
+    return site
+
+
+def erro_tls(exc):
+    """Certificado invalido/vencido ou TLS quebrado: o site existe, mas esta ruim."""
+    if "Timeout" in type(exc).__name__:
+        return False
+    while exc is not None:
+        if isinstance(exc, ssl.SSLError) or "CERTIFICATE_VERIFY_FAILED" in str(exc):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _limite_pesado():
+    return int(LIMITE_PESADO_MB * 1024 * 1024)
+
+
+async def sondar_site(client, url):
+    """Baixa a pagina uma vez e devolve as metricas da sondagem."""
+    res = {
+        "url":            url,
+        "status":         None,
+        "urlFinal":       None,
+        "redirecionamentos": [],
+        "ttfb":           None,
+        "tempoTotal":     None,
+        "bytes":          0,
+        "https":          False,
+        "viewport":       False,
+        "erro":           None,
+        "tlsInvalido":    False,
+        "truncado":       False,
+        "sondadoEm":      time.time(),
+    }
+    inicio = time.perf_counter()
+    try:
+        async with client.stream("GET", url) as resp:
+            res["ttfb"]     = round(time.perf_counter() - inicio, 3)
+            res["status"]   = resp.status_code
+            res["urlFinal"] = str(resp.url)
+            res["https"]    = resp.url.scheme == "https"
+            res["redirecionamentos"] = [str(r.url) for r in resp.history]
+
+            # so precisa ler ate saber se passa do limite de pagina pesada
+            limite = _limite_pesado()
+            declarado = resp.headers.get("content-length", "")
+            declarado = int(declarado) if declarado.isdigit() else 0
+            inicio_html = b""
+            async for bloco in resp.aiter_bytes():
+                res["bytes"] += len(bloco)
+                if len(inicio_html) < 65536:
+                    inicio_html += bloco
+                if res["bytes"] > limite or (declarado > limite and len(inicio_html) >= 65536):
+                    res["truncado"] = True
+                    break
+            res["bytes"] = max(res["bytes"], declarado)
+            res["viewport"] = bool(RE_VIEWPORT.search(inicio_html))
+    except Exception as e:
+        res["erro"] = f"{type(e).__name__}: {e}"[:200]
+        res["tlsInvalido"] = erro_tls(e)
+    res["tempoTotal"] = round(time.perf_counter() - inicio, 3)
+    return res
+
+
+async def sondar_sites(urls, concorrencia=CONCORRENCIA, timeout=TIMEOUT_SEGUNDOS):
+    """Sonda varias URLs com um unico pool de conexoes e semaforo."""
+    import httpx
+
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    sem     = asyncio.Semaphore(concorrencia)
+
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=timeout,
+        limits=limites,
+        headers={"User-Agent": USER_AGENT, "Accept-Language": "pt-BR,pt;q=0.9"},
+    ) as client:
+
+        async def uma(url):
+            async with sem:
+                return await sondar_site(client, url)
+
+        return await asyncio.gather(*(uma(u) for u in urls))
+
+
+def qualidade_por_sondagem(site, sondagem):
+    """
+    Classifica o site como none/poor/good a partir da sondagem. 'none' so
+    quando o lead nao tem site; sondagem que falhou vira INDETERMINADO.
+    """
+    if not normalizar_url(site):
+        return "none"
+    if not sondagem:
+        return INDETERMINADO
+    if sondagem.get("tlsInvalido"):
+        return "poor"
+    if falhou(sondagem):
+        return INDETERMINADO
+    final = (sondagem.get("urlFinal") or site).lower()
+    if any(r in final or r in site.lower() for r in HOSTS_RUINS):
+        return "poor"
+    if not sondagem.get("https") or not sondagem.get("viewport"):
+        return "poor"
+    if (sondagem.get("tempoTotal") or 0) > LIMITE_LENTO_SEG:
+        return "poor"
+    if sondagem.get("bytes", 0) > _limite_pesado():
+        return "poor"
+    return "good"
+
+
+def sondar_leads(leads, cache=None, ttl_horas=CACHE_TTL_HORAS, concorrencia=CONCORRENCIA):
+    """
+    Sonda o 'Site' de cada lead (uma vez por URL, respeitando o cache)
+    e atualiza 'WebsiteQuality' in-place. Os detalhes ficam no cache.
+    Leads com sondagem indeterminada mantem o WebsiteQuality que ja tinham.
+    """
+    usar_cache_disco = cache is None
+    if usar_cache_disco:
+        cache = carregar_cache()
+
+    urls = {normalizar_url(l.get("Site")) for l in leads} - {None}
+    pendentes = [u for u in urls if not cache_valido(cache.get(u), ttl_horas)]
+
+    print(f"Sondagem: {len(urls)} sites, {len(urls) - len(pendentes)} em cache, {len(pendentes)} a baixar.")
+    if pendentes:
+        inicio = time.perf_counter()
+        for r in asyncio.run(sondar_sites(pendentes, concorrencia)):
+            cache[r["url"]] = r
+        dt = time.perf_counter() - inicio
+        print(f"Sondagem: {len(pendentes)} sites em {dt:.1f}s ({len(pendentes)/max(dt, 1e-9):.0f} sites/s)")
+        if usar_cache_disco:
+            salvar_cache(cache)
+
+    indeterminados = 0
+    for lead in leads:
+        url = normalizar_url(lead.get("Site"))
+        s   = cache.get(url) if url else None
+        qualidade = qualidade_por_sondagem(lead.get("Site"), s)
+        if qualidade == INDETERMINADO:
+            indeterminados += 1
+            continue
+        lead["WebsiteQuality"] = qualidade
+    if indeterminados:
+        print(f"Sondagem: {indeterminados} leads indeterminados (falha de rede/servidor), qualidade mantida.")
+    return leads
+
+# ================================================================
+# EXECUCAO
+# ================================================================
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else "leads_paragominas.csv"
+    df      = pd.read_csv(arquivo, encoding="utf-8-sig")
+    leads   = sondar_leads(df.to_dict(orient="records"))
+
+    df["WebsiteQuality"] = [l.get("WebsiteQuality") for l in leads]
+    df.to_csv(arquivo, index=False, encoding="utf-8-sig")
+
+    contagem = df["WebsiteQuality"].fillna("").value_counts().to_dict()
+    print(f"\nRESULTADO: {contagem}")
+    print(f"WebsiteQuality gravado em {arquivo}")
@@ -88,10 +88,13 @@ const fromFirestore = (id: string, data: any): Lead => ({
   linkedin:       data.linkedin       || '',
   website:        data.website        || '',
   googleMaps:     data.googleMaps     || '',
+  lat:            data.lat,
+  lng:            data.lng,
   linkWhatsApp:   data.linkWhatsApp   || '',
   stage:          data.stage          as LeadStatus,
   source:         data.source,
   websiteQuality: data.websiteQuality,
+  score:          data.score,
   notes:          data.notes          || '',
   dataContato:    data.dataContato,
   valor:          data.valor          || 0,
@@ -78,10 +78,13 @@ export interface Lead {
   linkedin?: string;
   website?: string;
   googleMaps?: string;
+  lat?: number;
+  lng?: number;
   linkWhatsApp?: string;
   stage: LeadStatus;
   source?: 'manual' | 'scraper' | 'import' | 'google_maps_api';
   websiteQuality?: WebsiteQuality;
+  score?: number;
   notes?: string;
   dataContato?: string;
   valor?: number;
@@ -96,4 +99,30 @@ export interface Script {
   category: 'initial' | 'followup' | 'proposal' | 'closing' | 'other';
   createdAt: Date;
   updatedAt: Date;
-}
\ No newline at end of file
+}
+
+// Resumo gerado pelo scraper (resumo_leads.json): contagens já agregadas
+export interface LeadRollupCounts {
+  total: number;
+  semSite: number;
+  semInstagram: number;
+  semTelefone: number;
+  oportunidades: number;
+}
+
+export interface LeadRollupCell extends LeadRollupCounts {
+  territory: string;
+  niche: string;
+  stage: LeadStatus;
+  websiteQuality: WebsiteQuality;
+}
+
+export interface LeadRollup {
+  geradoEm: string;
+  totais: LeadRollupCounts;
+  porTerritorio: Record<string, LeadRollupCounts>;
+  porNicho: Record<string, LeadRollupCounts>;
+  porEstagio: Record<string, LeadRollupCounts>;
+  porWebsiteQuality: Record<string, LeadRollupCounts>;
+  celulas: LeadRollupCell[];
+}
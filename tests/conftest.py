@@ -0,0 +1,4 @@
+import os, sys
+
+# os modulos ficam na raiz do repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,109 @@
+"""Fila de jobs nos backends SQLite e Redis (fakeredis): lease, re-enfileiramento e conclusao."""
+
+import time
+
+import pytest
+
+import fila_distribuida as fd
+
+JOB_A = {"nicho": "Academias", "cidade": "Belém"}
+JOB_B = {"nicho": "Academias", "cidade": "Ananindeua"}
+
+
+@pytest.fixture(params=["sqlite", "fake"])
+def nova_fila(request, tmp_path):
+    """nova_fila(**kw) abre uma conexao (nova a cada chamada) a mesma fila do backend do parametro."""
+    if request.param == "sqlite":
+        caminho = str(tmp_path / "fila.db")
+
+        def abrir(**kw):
+            return fd.FilaSQLite(caminho, **kw)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        servidor = fakeredis.FakeServer()
+
+        def abrir(**kw):
+            return fd.FilaRedis(fakeredis.FakeRedis(server=servidor), **kw)
+    return abrir
+
+
+def test_enfileirar_nao_duplica_pendente(nova_fila):
+    fila = nova_fila()
+    assert fila.enfileirar([JOB_A, JOB_B]) == 2
+    assert fila.enfileirar([JOB_A]) == 0
+    assert fila.estatisticas()["pendentes"] == 2
+
+
+def test_conclusao_e_reenfileirar_depois(nova_fila):
+    fila = nova_fila()
+    fila.enfileirar([JOB_A])
+    job = fila.arrendar("w1")
+    assert job["payload"] == JOB_A and job["tentativa"] == 1
+
+    # em execucao continua sem duplicar
+    assert fila.enfileirar([JOB_A]) == 0
+    assert fila.concluir(job["id"], "w1", 7)
+    assert fila.arrendar("w1") is None
+    est = fila.estatisticas()
+    assert est["concluidos"] == 1 and est["leadsNaJanela"] == 7
+
+    # concluido volta para a fila numa nova rodada, com as tentativas zeradas
+    assert fila.enfileirar([JOB_A]) == 1
+    job = fila.arrendar("w2")
+    assert job["id"] == fd.id_job(JOB_A) and job["tentativa"] == 1
+
+
+def test_lease_expirado_volta_para_a_fila(nova_fila):
+    fila = nova_fila()
+    fila.enfileirar([JOB_A])
+    job = fila.arrendar("w1", visibilidade_s=0.05)
+    assert fila.arrendar("w2", visibilidade_s=0.05) is None
+
+    time.sleep(0.1)
+    job2 = fila.arrendar("w2")
+    assert job2["id"] == job["id"] and job2["tentativa"] == 2
+
+    # o worker antigo perdeu o lease
+    assert not fila.heartbeat(job["id"], "w1")
+    assert not fila.concluir(job["id"], "w1", 3)
+    assert fila.heartbeat(job2["id"], "w2")
+    assert fila.concluir(job2["id"], "w2", 3)
+
+
+def test_falha_reenfileira_ate_o_limite(nova_fila):
+    fila = nova_fila(tentativas_max=2)
+    fila.enfileirar([JOB_A])
+    job = fila.arrendar("w1")
+    fila.falhar(job["id"], "w1", "erro 1")
+    job = fila.arrendar("w1")
+    assert job["tentativa"] == 2
+    fila.falhar(job["id"], "w1", "erro 2")
+    assert fila.arrendar("w1") is None
+    assert fila.estatisticas()["falhos"] == 1
+
+    # falho tambem pode ser enfileirado de novo
+    assert fila.enfileirar([JOB_A]) == 1
+    assert fila.arrendar("w1")["tentativa"] == 1
+
+
+def test_reservar_lugares_entre_jobs(nova_fila):
+    fila = nova_fila()
+    assert fila.reservar_lugares(["p1", "p2"], "tile-1") == ["p1", "p2"]
+    # p2 esta na borda dos dois tiles: fica com o primeiro
+    assert fila.reservar_lugares(["p2", "p3"], "tile-2") == ["p3"]
+    # nova tentativa do mesmo job mantem os seus
+    assert fila.reservar_lugares(["p1", "p2"], "tile-1") == ["p1", "p2"]
+    assert nova_fila().reservar_lugares(["p3"], "tile-3") == []
+
+
+def test_reserva_separada_por_escopo_e_expira(nova_fila):
+    fila = nova_fila()
+    assert fila.reservar_lugares(["p1"], "tile-1", "Academias|Belém") == ["p1"]
+    # outro nicho na mesma cidade extrai o mesmo lugar
+    assert fila.reservar_lugares(["p1"], "tile-9", "Padarias|Belém") == ["p1"]
+    assert fila.reservar_lugares(["p1"], "tile-2", "Academias|Belém") == []
+
+    # reserva vencida: uma rodada nova pega o lugar de novo
+    fila.reservar_lugares(["p2"], "tile-1", "Academias|Ananindeua", ttl_s=1)
+    time.sleep(1.1)
+    assert fila.reservar_lugares(["p2"], "tile-2", "Academias|Ananindeua", ttl_s=1) == ["p2"]
@@ -0,0 +1,118 @@
+"""Governador contra o servidor_simulado (bloqueia acima de N req/s)."""
+
+import time, urllib.error, urllib.request
+
+import pytest
+
+import governador_taxa as gt
+
+
+class PaginaFalsa:
+    """O suficiente de uma page do Playwright para o detectar_bloqueio."""
+
+    def __init__(self, url, corpo):
+        self.url, self.corpo = url, corpo
+
+    def evaluate(self, _js):
+        return {"texto": self.corpo.lower(), "captcha": False}
+
+
+@pytest.fixture
+def servidor():
+    srv, url = gt.servidor_simulado(limite_rps=10, penalidade_s=0.5)
+    yield url
+    srv.shutdown()
+
+
+def requisitar(gov, url):
+    """Uma requisicao pelo governador; devolve (status, corpo) e manda o sinal."""
+    with gov.vaga():
+        try:
+            resp = urllib.request.urlopen(url, timeout=5)
+            status, corpo = resp.status, resp.read().decode()
+        except urllib.error.HTTPError as e:
+            status, corpo = e.code, e.read().decode()
+    if status == 200:
+        gov.sucesso()
+    return status, corpo
+
+
+def estourar(gov, url):
+    """Requisita ate o servidor bloquear; devolve o corpo da resposta bloqueada."""
+    for _ in range(50):
+        status, corpo = requisitar(gov, url)
+        if status == 429:
+            return corpo
+    raise AssertionError("o servidor simulado nao bloqueou")
+
+
+def novo_governador(**kw):
+    return gt.GovernadorTaxa(**{"concorrencia": 4, "taxa": 100.0, "taxa_maxima": 200.0,
+                                "passo_taxa": 1.0, "pausa_bloqueio": 0.3, **kw})
+
+
+def test_429_corta_taxa_e_concorrencia(servidor):
+    gov = novo_governador()
+    estourar(gov, servidor)
+    antes = gov.estado()
+    gov.bloqueio()
+    est = gov.estado()
+    assert est["taxa"] == antes["taxa"] * gt.FATOR_CORTE and est["limite"] == antes["limite"] // 2
+    assert est["pausado"] > 0 and est["bloqueio"] == 1
+
+
+def test_pagina_de_trafego_incomum_conta_como_bloqueio(servidor):
+    gov = novo_governador()
+    corpo = estourar(gov, servidor)
+    assert "unusual traffic" in corpo
+    antes = gov.estado()
+    gov.falha(PaginaFalsa(servidor, corpo))
+    est = gov.estado()
+    assert est["bloqueio"] == 1 and est.get("timeout", 0) == 0
+    assert est["taxa"] == antes["taxa"] * gt.FATOR_CORTE and est["limite"] == antes["limite"] // 2
+
+
+def test_pausa_global_cresce_com_bloqueios_seguidos(servidor):
+    gov = novo_governador()
+    estourar(gov, servidor)
+    gov.bloqueio()
+
+    # ninguem sai durante a pausa
+    t0 = time.monotonic()
+    with gov.vaga():
+        pass
+    assert time.monotonic() - t0 >= 0.25
+
+    # novo bloqueio logo depois: pausa dobra
+    gov.bloqueio()
+    assert gov.estado()["pausado"] >= 0.5
+    # bloqueio que chega durante a pausa nao corta de novo
+    taxa = gov.estado()["taxa"]
+    gov.bloqueio()
+    assert gov.estado()["taxa"] == taxa
+
+
+def test_volta_a_subir_aditivamente(servidor):
+    gov = novo_governador()
+    estourar(gov, servidor)
+    gov.bloqueio()
+    cortado = gov.estado()
+    time.sleep(1.2)   # janela de 1s e penalidade do servidor e pausa do governador acabam
+
+    # 10 req/s e o limite do servidor: espaca para nao bloquear de novo
+    for passo in (1, 2):
+        for _ in range(gt.SUCESSOS_POR_PASSO):
+            status, _ = requisitar(gov, servidor)
+            assert status == 200
+            time.sleep(0.15)
+        est = gov.estado()
+        assert est["taxa"] == cortado["taxa"] + passo * 1.0
+        assert est["limite"] == cortado["limite"] + passo
+
+
+def test_pico_de_timeouts_corta_sem_pausar():
+    gov = novo_governador()
+    for _ in range(gt.LIMIAR_TIMEOUTS):
+        gov.timeout()
+    est = gov.estado()
+    assert est["taxa"] == 50.0 and est["pausado"] == 0
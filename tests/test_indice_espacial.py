@@ -0,0 +1,43 @@
+"""Indice de grade: vizinho mais proximo sem limite de raio termina."""
+
+import random
+
+import indice_espacial as ie
+
+INF = float("inf")
+
+
+def test_indice_vazio_sem_raio():
+    assert ie.IndiceGrade().mais_proximo(-1.45, -48.48, raio_max_m=INF) == (INF, None)
+
+
+def test_todos_excluidos_sem_raio():
+    idx = ie.IndiceGrade()
+    idx.inserir("a", -1.45, -48.48)
+    idx.inserir("b", -1.30, -48.20)
+    assert idx.mais_proximo(-1.45, -48.48, excluir={0, 1}, raio_max_m=INF) == (INF, None)
+    # so o ponto longe resta: os aneis chegam ate ele e param na borda da grade
+    d, i = idx.mais_proximo(-1.45, -48.48, excluir={0}, raio_max_m=INF)
+    assert i == 1 and d == ie.distancia_m(-1.45, -48.48, -1.30, -48.20)
+    # consulta de fora da extensao ocupada
+    assert idx.mais_proximo(10.0, 10.0, raio_max_m=INF)[1] in (0, 1)
+
+
+def test_mais_proximo_igual_a_forca_bruta():
+    rnd = random.Random(1)
+    idx = ie.IndiceGrade()
+    pontos = [(-1.45 + rnd.uniform(-0.1, 0.1), -48.48 + rnd.uniform(-0.1, 0.1)) for _ in range(500)]
+    for n, (la, lo) in enumerate(pontos):
+        idx.inserir(n, la, lo)
+    for _ in range(50):
+        la, lo = -1.45 + rnd.uniform(-0.2, 0.2), -48.48 + rnd.uniform(-0.2, 0.2)
+        esperado = min(range(len(pontos)), key=lambda k: ie.distancia_m(la, lo, *pontos[k]))
+        assert idx.mais_proximo(la, lo, raio_max_m=INF)[1] == esperado
+
+
+def test_rota_visita_todos():
+    idx = ie.IndiceGrade()
+    for n in range(20):
+        idx.inserir(n, -1.45 + n * 0.01, -48.48)
+    rota = idx.rota_visitas(-1.45, -48.48)
+    assert [i for i, _ in rota] == list(range(20))
@@ -0,0 +1,79 @@
+"""Log de escritas do Firestore com um db falso em memoria."""
+
+import log_firestore as lf
+
+
+class DocFalso:
+    def __init__(self, db, chave):
+        self.db, self.chave = db, chave
+
+    def set(self, dados, merge=True):
+        if self.db.fora:
+            raise ConnectionError("sem rede")
+        atual = self.db.docs.get(self.chave, {}) if merge else {}
+        self.db.docs[self.chave] = {**atual, **dados}
+
+
+class BatchFalso:
+    def __init__(self, db):
+        self.db, self.sets = db, []
+
+    def set(self, ref, dados, merge=True):
+        self.sets.append((ref, dados, merge))
+
+    def commit(self):
+        for ref, dados, merge in self.sets:
+            ref.set(dados, merge=merge)
+
+
+class DbFalso:
+    def __init__(self):
+        self.docs = {}
+        self.fora = False
+
+    def collection(self, col):
+        db = self
+
+        class Colecao:
+            def document(self, doc):
+                return DocFalso(db, (col, doc))
+
+        return Colecao()
+
+    def batch(self):
+        return BatchFalso(self)
+
+
+def test_gravacao_nova_supera_pendente_antiga(tmp_path):
+    log, db = lf.LogFirestore(str(tmp_path / "wal.jsonl")), DbFalso()
+    db.fora = True
+    assert not lf.gravar(db, "leads", "a", {"score": 10, "notes": "velha"}, log=log)
+    db.fora = False
+    assert lf.gravar(db, "leads", "a", {"score": 90}, log=log)
+
+    # o replay so manda o campo que a gravacao nova nao cobriu
+    assert log.replay(db) == (1, 0)
+    assert db.docs[("leads", "a")] == {"score": 90, "notes": "velha"}
+
+
+def test_pendente_so_com_campos_superados_some(tmp_path):
+    log, db = lf.LogFirestore(str(tmp_path / "wal.jsonl")), DbFalso()
+    lf.gravar(None, "leads", "a", {"score": 10}, log=log)
+    lf.gravar(None, "leads", "b", {"score": 20}, log=log)
+    assert lf.gravar(db, "leads", "a", {"score": 90}, log=log)
+    assert [e["doc"] for e in log.pendentes()] == ["b"]
+    assert log.estatisticas()["pendentes"] == 1
+
+
+def test_compactar_mantem_ids_em_voo(tmp_path):
+    log, db = lf.LogFirestore(str(tmp_path / "wal.jsonl")), DbFalso()
+    lf.gravar(None, "leads", "a", {"notes": "x"}, log=log)
+    em_voo = log.registrar("leads", "a", {"score": 50})
+    assert log.compactar() == 1
+
+    # a confirmacao atrasada ainda acha a entrada e nada e reenviado por cima
+    db.collection("leads").document("a").set({"score": 50})
+    log.confirmar([em_voo])
+    assert log.replay(db) == (1, 0)
+    assert db.docs[("leads", "a")] == {"score": 50, "notes": "x"}
+    assert log.pendentes() == []
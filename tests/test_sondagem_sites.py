@@ -0,0 +1,163 @@
+"""Sondagem contra um servidor HTTP local (sem rede externa)."""
+
+import asyncio, os, shutil, socket, ssl, subprocess, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import sondagem_sites as ss
+
+PAGINA = b'<html><head><meta name="viewport" content="width=device-width"></head><body>ok</body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/redireciona":
+            self.send_response(301)
+            self.send_header("Location", "/pagina")
+            self.end_headers()
+            return
+        if self.path == "/erro":
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.path == "/lento":
+            time.sleep(2)
+        if self.path.startswith("/pesada"):
+            # pagina acima do LIMITE_PESADO_MB, com e sem Content-Length
+            corpo = PAGINA + b" " * int((ss.LIMITE_PESADO_MB + 0.5) * 1024 * 1024)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            if self.path == "/pesada-declarada":
+                self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            try:
+                self.wfile.write(corpo)
+            except (BrokenPipeError, ConnectionResetError):
+                pass   # o cliente para de ler depois do limite
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGINA)))
+        self.end_headers()
+        self.wfile.write(PAGINA)
+
+
+def _subir(contexto_tls=None):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    if contexto_tls is not None:
+        srv.socket = contexto_tls.wrap_socket(srv.socket, server_side=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    srv = _subir()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+def _porta_fechada():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _sondar(urls, **kw):
+    return {r["url"]: r for r in asyncio.run(ss.sondar_sites(urls, **kw))}
+
+
+def test_metricas_e_redirecionamento(servidor):
+    r = _sondar([servidor + "/redireciona"])[servidor + "/redireciona"]
+    assert r["status"] == 200
+    assert r["urlFinal"] == servidor + "/pagina"
+    assert r["redirecionamentos"] == [servidor + "/redireciona"]
+    assert r["viewport"] is True and r["https"] is False
+    assert r["bytes"] == len(PAGINA)
+    assert r["ttfb"] is not None and r["tempoTotal"] >= r["ttfb"]
+    # http puro: o site existe, mas e fraco
+    assert ss.qualidade_por_sondagem(servidor + "/redireciona", r) == "poor"
+
+
+def test_pagina_pesada_e_poor(servidor):
+    limite = ss.LIMITE_PESADO_MB * 1024 * 1024
+    res = _sondar([servidor + "/pesada", servidor + "/pesada-declarada", servidor + "/pagina"])
+    for url in (servidor + "/pesada", servidor + "/pesada-declarada"):
+        r = res[url]
+        assert not ss.falhou(r) and r["truncado"] and r["viewport"]
+        assert r["bytes"] > limite
+        # so o peso separa do site bom (o servidor local e http)
+        assert ss.qualidade_por_sondagem(url, dict(r, https=True, tempoTotal=0.1)) == "poor"
+    leve = res[servidor + "/pagina"]
+    assert not leve["truncado"]
+    assert ss.qualidade_por_sondagem(servidor + "/pagina", dict(leve, https=True, tempoTotal=0.1)) == "good"
+
+
+def test_falhas_sao_indeterminadas_e_nunca_none(servidor):
+    fechada = f"http://127.0.0.1:{_porta_fechada()}/"
+    res = _sondar([servidor + "/erro", fechada, servidor + "/lento"], timeout=0.5)
+    for url, r in res.items():
+        assert ss.falhou(r), url
+        assert ss.qualidade_por_sondagem(url, r) == ss.INDETERMINADO
+
+
+def test_sem_site_e_none():
+    assert ss.qualidade_por_sondagem("SEM SITE", None) == "none"
+    assert ss.qualidade_por_sondagem("", None) == "none"
+
+
+def test_site_bom():
+    s = {"status": 200, "urlFinal": "https://exemplo.com.br/", "https": True, "viewport": True,
+         "tempoTotal": 0.3, "bytes": 1000, "erro": None}
+    assert ss.qualidade_por_sondagem("https://exemplo.com.br", s) == "good"
+
+
+def test_indeterminado_mantem_qualidade_e_tem_ttl_curto(servidor):
+    fechada = f"http://127.0.0.1:{_porta_fechada()}/"
+    leads = [
+        {"Site": fechada, "WebsiteQuality": "good"},
+        {"Site": servidor + "/pagina", "WebsiteQuality": "good"},
+        {"Site": "SEM SITE", "WebsiteQuality": "none"},
+    ]
+    cache = {}
+    ss.sondar_leads(leads, cache=cache)
+    assert [l["WebsiteQuality"] for l in leads] == ["good", "poor", "none"]
+
+    erro, ok = cache[fechada], cache[servidor + "/pagina"]
+    assert ss.cache_valido(ok) and ss.cache_valido(erro)
+    erro["sondadoEm"] -= (ss.CACHE_TTL_ERRO_HORAS + 0.1) * 3600
+    ok["sondadoEm"]   -= (ss.CACHE_TTL_ERRO_HORAS + 0.1) * 3600
+    assert not ss.cache_valido(erro)
+    assert ss.cache_valido(ok)
+
+
+def test_cache_evita_nova_requisicao(servidor, monkeypatch):
+    url = servidor + "/pagina"
+    cache = {}
+    ss.sondar_leads([{"Site": url}], cache=cache)
+    chamadas = []
+    monkeypatch.setattr(ss, "sondar_sites", lambda urls, *a, **k: chamadas.append(urls))
+    ss.sondar_leads([{"Site": url}], cache=cache)
+    assert chamadas == []
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl indisponivel")
+def test_certificado_invalido_e_poor(tmp_path):
+    cert, chave = tmp_path / "c.pem", tmp_path / "k.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=localhost", "-keyout", str(chave), "-out", str(cert)],
+                   check=True, capture_output=True)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, chave)
+    srv = _subir(ctx)
+    try:
+        url = f"https://127.0.0.1:{srv.server_address[1]}/pagina"
+        r = _sondar([url])[url]
+        assert r["tlsInvalido"] and not ss.falhou(r)
+        assert ss.qualidade_por_sondagem(url, r) == "poor"
+    finally:
+        srv.shutdown()